@@ -0,0 +1,82 @@
+from django.contrib import admin
+from django.utils.safestring import mark_safe
+
+from api.models import RequestProfile, SlowQuery
+from api.profiling import render_flame_graph
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Админ модель для профилей запросов."""
+    list_display = (
+        'created_at',
+        'method',
+        'path',
+        'status',
+        'duration',
+        'samples',
+        'user',
+    )
+    search_fields = (
+        'path',
+    )
+    list_filter = (
+        'method',
+        'status',
+    )
+    readonly_fields = (
+        'created_at',
+        'user',
+        'method',
+        'path',
+        'status',
+        'duration',
+        'samples',
+        'flame_graph',
+        'fields',
+        'queries',
+        'stacks',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='Flame graph')
+    def flame_graph(self, obj):
+        return mark_safe(
+            '<div style="overflow-x: auto">'
+            f'{render_flame_graph(obj.stacks)}</div>'
+        )
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Админ модель для медленных запросов."""
+    list_display = (
+        'created_at',
+        'fingerprint',
+        'duration',
+        'view',
+    )
+    search_fields = (
+        'fingerprint',
+        'normalized_sql',
+        'view',
+    )
+    list_filter = (
+        'view',
+    )
+    readonly_fields = (
+        'created_at',
+        'fingerprint',
+        'normalized_sql',
+        'sql',
+        'duration',
+        'view',
+        'params',
+        'sql_params',
+        'plan',
+    )
+
+    def has_add_permission(self, request):
+        return False
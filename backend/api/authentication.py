@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+TOKEN_CACHE_KEY = 'auth_token:{key}'
+
+User = get_user_model()
+
+
+def get_token_cache_key(key):
+    """Возвращает ключ кеша для токена."""
+    return TOKEN_CACHE_KEY.format(key=key)
+
+
+def invalidate_tokens(*keys):
+    """Удаляет из кеша записи для переданных токенов."""
+    cache.delete_many([get_token_cache_key(key) for key in keys])
+
+
+def get_cached_user(user_id, is_active):
+    """Пользователь, у которого загружены только id и is_active.
+
+    Остальные поля Django догрузит при первом обращении: большинству
+    запросов хватает id, а пароль и личные данные не попадают в кеш.
+    """
+    return User.from_db(
+        DEFAULT_DB_ALIAS, ['id', 'is_active'], [user_id, is_active],
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кешированием пары id-is_active."""
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(
+                cache_key,
+                (user.id, user.is_active),
+                settings.AUTH_TOKEN_CACHE_TIMEOUT,
+            )
+            return user, token
+        user_id, is_active = cached
+        if not is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        user = get_cached_user(user_id, is_active)
+        token = self.get_model()(key=key, user_id=user_id)
+        token.user = user
+        return user, token
@@ -0,0 +1,96 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from api.viewer import ViewerContext
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+def make_etag(*parts):
+    """Слабый ETag: представление зависит от пользователя и хоста."""
+    digest = hashlib.md5(
+        ':'.join(str(part) for part in parts).encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def get_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise Http404
+
+
+def get_recipe_validators(request, pk):
+    """ETag и дата изменения рецепта по одной выборке по первичному ключу.
+
+    Флаги текущего пользователя входят в ETag, поэтому Last-Modified
+    отдаётся только анонимам: для них ответ от флагов не зависит.
+    """
+    pk = get_pk(pk)
+    row = Recipe.objects.filter(pk=pk).values_list(
+        'updated_at',
+        'author_id',
+        'author__updated_at',
+    ).first()
+    if row is None:
+        raise Http404
+    updated_at, author_id, author_updated_at = row
+    last_modified = max(updated_at, author_updated_at)
+    viewer = ViewerContext.for_request(request)
+    viewer.prime(recipe_ids=[pk], author_ids=[author_id])
+    etag = make_etag(
+        'recipe',
+        pk,
+        last_modified.timestamp(),
+        request.get_host(),
+        viewer.is_favorited(pk),
+        viewer.is_in_shopping_cart(pk),
+        viewer.is_subscribed(author_id),
+    )
+    return etag, last_modified
+
+
+def get_user_validators(request, pk):
+    """ETag и дата изменения профиля пользователя."""
+    pk = get_pk(pk)
+    updated_at = User.objects.filter(pk=pk).values_list(
+        'updated_at',
+        flat=True,
+    ).first()
+    if updated_at is None:
+        raise Http404
+    viewer = ViewerContext.for_request(request)
+    etag = make_etag(
+        'user',
+        pk,
+        updated_at.timestamp(),
+        viewer.is_subscribed(pk),
+    )
+    return etag, updated_at
+
+
+def conditional_response(request, validators, get_response):
+    """Отвечает 304, если у клиента актуальная версия, иначе вызывает
+    get_response и проставляет ETag и Last-Modified."""
+    etag, last_modified = validators
+    if request.user.is_authenticated:
+        last_modified = None
+    timestamp = last_modified and int(last_modified.timestamp())
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=timestamp,
+    )
+    if response is None:
+        response = get_response()
+    response['ETag'] = etag
+    if timestamp:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from api.fast_serializers import build_recipe_document
+from api.fieldsets import get_sparse_serializer_class
+from api.projections import project
+from api.serializers import RecipeReadSerializer
+from api.versions import bump_versions, get_versions
+from recipes.models import Recipe
+
+RECIPE_DOCUMENT_KEY = (
+    'recipe_document:{id}:{version}:{catalog_version}{fields}'
+)
+RECIPE_NAMESPACE = 'recipe:{id}'
+CATALOG_NAMESPACE = 'recipes'
+TAGS_NAMESPACE = 'tags'
+INGREDIENTS_NAMESPACE = 'ingredients'
+
+
+def get_document_queryset(fields=None):
+    """Рецепты со всеми связями, нужными для сборки документа.
+
+    Документ повторяет RecipeReadSerializer, поэтому из базы читаются
+    только выводимые им колонки: без пароля автора и служебных полей.
+    Если указаны fields, связи остальных полей не подгружаются.
+    """
+    return project(
+        Recipe.objects.all(),
+        get_sparse_serializer_class(RecipeReadSerializer, fields),
+    )
+
+
+def invalidate_recipe_documents(*recipe_ids):
+    """Сбрасывает закешированные документы указанных рецептов."""
+    bump_versions(*[
+        RECIPE_NAMESPACE.format(id=recipe_id) for recipe_id in recipe_ids
+    ])
+
+
+def invalidate_all_recipe_documents():
+    """Сбрасывает документы всех рецептов, например при правке тега."""
+    bump_versions(CATALOG_NAMESPACE)
+
+
+def get_recipe_documents(recipe_ids, fields=None):
+    """Возвращает документы рецептов в порядке recipe_ids.
+
+    Документы берутся из кеша одним запросом, недостающие собираются
+    одним запросом к базе и кладутся обратно в кеш. Документы с частью
+    полей из fields кешируются отдельно от полных.
+    """
+    namespaces = {
+        recipe_id: RECIPE_NAMESPACE.format(id=recipe_id)
+        for recipe_id in recipe_ids
+    }
+    versions = get_versions([*namespaces.values(), CATALOG_NAMESPACE])
+    document_keys = {
+        recipe_id: RECIPE_DOCUMENT_KEY.format(
+            id=recipe_id,
+            version=versions[namespace],
+            catalog_version=versions[CATALOG_NAMESPACE],
+            fields=f':{",".join(fields)}' if fields else '',
+        )
+        for recipe_id, namespace in namespaces.items()
+    }
+    cached = cache.get_many(document_keys.values())
+    documents = {
+        recipe_id: cached[key]
+        for recipe_id, key in document_keys.items()
+        if key in cached
+    }
+    missing = [
+        recipe_id for recipe_id in recipe_ids if recipe_id not in documents
+    ]
+    if missing:
+        fresh = {
+            recipe.id: build_recipe_document(recipe, fields)
+            for recipe in get_document_queryset(fields).filter(
+                id__in=missing,
+            )
+        }
+        cache.set_many(
+            {
+                document_keys[recipe_id]: document
+                for recipe_id, document in fresh.items()
+            },
+            settings.RECIPE_DOCUMENT_CACHE_TIMEOUT,
+        )
+        documents.update(fresh)
+    return [
+        documents[recipe_id]
+        for recipe_id in recipe_ids
+        if recipe_id in documents
+    ]
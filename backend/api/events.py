@@ -0,0 +1,354 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import close_old_connections, connection, connections
+from rest_framework.authtoken.models import Token
+
+from users.models import Subscriber
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+TICKET_SALT = 'api.events.ticket'
+CHANNEL = 'recipe_events'
+RECIPE = 'recipe'
+SUBSCRIBED = 'subscribed'
+UNSUBSCRIBED = 'unsubscribed'
+RESET = 'reset'
+CLOSED = 'closed'
+
+
+def publish(event):
+    """Отправляет событие всем процессам, раздающим поток событий.
+
+    Событие уходит через NOTIFY и доставляется после коммита текущей
+    транзакции. Без Postgres события не рассылаются.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_notify(%s, %s)',
+            [CHANNEL, json.dumps(event)],
+        )
+
+
+def publish_recipe(recipe):
+    publish({
+        'type': RECIPE,
+        'id': recipe.id,
+        'name': recipe.name,
+        'author': {
+            'id': recipe.author_id,
+            'username': recipe.author.username,
+        },
+    })
+
+
+def publish_subscription(user_id, author_id, subscribed):
+    publish({
+        'type': SUBSCRIBED if subscribed else UNSUBSCRIBED,
+        'user': user_id,
+        'author': author_id,
+    })
+
+
+def format_event(event):
+    data = json.dumps(
+        {key: value for key, value in event.items() if key != 'type'},
+        ensure_ascii=False,
+    )
+    return f'id: {event["id"]}\nevent: {RECIPE}\ndata: {data}\n\n'.encode()
+
+
+class Stream:
+    """Очередь событий одного подключения.
+
+    Очередь ограничена: если клиент не успевает читать, накопленные
+    события выбрасываются, а клиенту уходит reset, после которого он
+    перечитывает ленту через API и переподключается.
+    """
+    __slots__ = ('user_id', 'authors', 'queue', 'closed')
+
+    def __init__(self, user_id, authors, size):
+        self.user_id = user_id
+        self.authors = authors
+        self.queue = asyncio.Queue(maxsize=size)
+        self.closed = False
+
+    def push(self, event):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.close(RESET)
+
+    def close(self, reason=CLOSED):
+        """Заменяет содержимое очереди причиной закрытия."""
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(reason)
+
+
+def create_listener():
+    wrapper = connections['default']
+    listener = wrapper.get_new_connection(wrapper.get_connection_params())
+    listener.autocommit = True
+    with listener.cursor() as cursor:
+        cursor.execute(f'LISTEN {CHANNEL}')
+    return listener
+
+
+class EventBroker:
+    """Раздаёт события из LISTEN подключениям процесса.
+
+    На процесс приходится одно соединение с базой: его сокет читает
+    цикл событий, а события раскладываются по подключениям подписчиков
+    автора рецепта без отдельных задач и потоков.
+    """
+    def __init__(self):
+        self.listener = None
+        self.started = False
+        self.streams_by_author = defaultdict(set)
+        self.streams_by_user = defaultdict(set)
+
+    async def start(self):
+        if self.started or connections['default'].vendor != 'postgresql':
+            return
+        self.started = True
+        await self.connect()
+
+    async def connect(self):
+        loop = asyncio.get_running_loop()
+        try:
+            self.listener = await sync_to_async(
+                create_listener,
+                thread_sensitive=False,
+            )()
+        except Exception:
+            logger.exception('Не удалось подключиться для LISTEN')
+            self.reconnect_later()
+            return
+        loop.add_reader(self.listener.fileno(), self.read)
+
+    def reconnect_later(self):
+        asyncio.get_running_loop().call_later(
+            settings.EVENTS['RECONNECT_DELAY'],
+            lambda: asyncio.ensure_future(self.connect()),
+        )
+
+    def read(self):
+        try:
+            self.listener.poll()
+        except Exception:
+            logger.exception('Потеряно соединение для LISTEN')
+            asyncio.get_running_loop().remove_reader(self.listener.fileno())
+            self.listener.close()
+            self.listener = None
+            for streams in list(self.streams_by_user.values()):
+                for stream in list(streams):
+                    stream.close(RESET)
+            self.reconnect_later()
+            return
+        while self.listener.notifies:
+            notify = self.listener.notifies.pop(0)
+            self.dispatch(json.loads(notify.payload))
+
+    def dispatch(self, event):
+        if event['type'] == RECIPE:
+            for stream in self.streams_by_author.get(
+                event['author']['id'],
+                (),
+            ):
+                stream.push(event)
+            return
+        for stream in self.streams_by_user.get(event['user'], ()):
+            if event['type'] == SUBSCRIBED:
+                stream.authors.add(event['author'])
+                self.streams_by_author[event['author']].add(stream)
+            else:
+                stream.authors.discard(event['author'])
+                self.discard(self.streams_by_author, event['author'], stream)
+
+    @staticmethod
+    def discard(index, key, stream):
+        streams = index.get(key)
+        if streams is None:
+            return
+        streams.discard(stream)
+        if not streams:
+            del index[key]
+
+    def add(self, stream):
+        self.streams_by_user[stream.user_id].add(stream)
+        for author_id in stream.authors:
+            self.streams_by_author[author_id].add(stream)
+
+    def remove(self, stream):
+        self.discard(self.streams_by_user, stream.user_id, stream)
+        for author_id in stream.authors:
+            self.discard(self.streams_by_author, author_id, stream)
+
+
+broker = EventBroker()
+
+
+def create_ticket(user_id):
+    """Подписанный билет на подключение к потоку событий.
+
+    EventSource в браузере не умеет передавать заголовки, а токен в
+    адресе попал бы в логи прокси. Билет годится только для потока
+    событий и только EVENTS['TICKET_MAX_AGE'] секунд.
+    """
+    return signing.dumps(user_id, salt=TICKET_SALT)
+
+
+def get_ticket_user_id(ticket):
+    try:
+        return signing.loads(
+            ticket,
+            salt=TICKET_SALT,
+            max_age=settings.EVENTS['TICKET_MAX_AGE'],
+        )
+    except signing.BadSignature:
+        return None
+
+
+def get_credentials(scope):
+    """Токен из заголовка Authorization и билет из параметра ticket."""
+    key = None
+    for name, value in scope['headers']:
+        if name == b'authorization':
+            keyword, _, token = value.decode('latin-1').partition(' ')
+            if keyword == 'Token':
+                key = token.strip()
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    return key, query.get('ticket', [None])[0]
+
+
+def get_stream_subscriptions(key, ticket):
+    """Возвращает id пользователя и авторов, на которых он подписан."""
+    close_old_connections()
+    if key:
+        users = Token.objects.filter(key=key, user__is_active=True)
+        field = 'user_id'
+    else:
+        users = User.objects.filter(
+            id=get_ticket_user_id(ticket),
+            is_active=True,
+        )
+        field = 'id'
+    user_id = users.values_list(field, flat=True).first()
+    if user_id is None:
+        return None, None
+    return user_id, set(
+        Subscriber.objects.filter(user_id=user_id).values_list(
+            'author_id',
+            flat=True,
+        )
+    )
+
+
+async def send_error(send, status, detail):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps({'detail': detail}, ensure_ascii=False).encode(),
+    })
+
+
+async def wait_for_disconnect(receive, stream):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    stream.close()
+
+
+async def events_application(scope, receive, send):
+    """ASGI-приложение для потока событий о новых рецептах подписок.
+
+    Подключение — это корутина, ограниченная очередь и множество id
+    авторов, поэтому тысячи простаивающих клиентов почти не занимают
+    памяти. Пока событий нет, раз в EVENTS['HEARTBEAT'] секунд уходит
+    комментарий, чтобы прокси не закрывали соединение.
+
+    Браузер подключается по билету из POST /api/users/events_ticket/ в
+    параметре ticket, другие клиенты — с токеном в заголовке
+    Authorization. Билет короткоживущий, поэтому после ошибки или reset
+    браузеру нужен новый.
+    """
+    if scope['method'] != 'GET':
+        await send_error(send, 405, 'Метод не разрешён.')
+        return
+    key, ticket = get_credentials(scope)
+    user_id, authors = None, None
+    if key or ticket:
+        user_id, authors = await sync_to_async(
+            get_stream_subscriptions,
+            thread_sensitive=False,
+        )(key, ticket)
+    if user_id is None:
+        await send_error(send, 401, 'Учетные данные не были предоставлены.')
+        return
+    await broker.start()
+    stream = Stream(user_id, authors, settings.EVENTS['BUFFER_SIZE'])
+    broker.add(stream)
+    watcher = asyncio.ensure_future(wait_for_disconnect(receive, stream))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': f'retry: {settings.EVENTS["RETRY"]}\n\n'.encode(),
+            'more_body': True,
+        })
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    stream.queue.get(),
+                    settings.EVENTS['HEARTBEAT'],
+                )
+            except asyncio.TimeoutError:
+                body = b': ping\n\n'
+            else:
+                if event == CLOSED:
+                    break
+                if event == RESET:
+                    await send({
+                        'type': 'http.response.body',
+                        'body': f'event: {RESET}\ndata: {{}}\n\n'.encode(),
+                    })
+                    return
+                body = format_event(event)
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': True,
+            })
+    except OSError:
+        pass
+    finally:
+        broker.remove(stream)
+        watcher.cancel()
@@ -0,0 +1,183 @@
+from operator import attrgetter
+
+from rest_framework.settings import api_settings
+
+from api.viewer import ViewerContext
+
+TAG_FIELDS = (
+    'id',
+    'name',
+    'color',
+    'slug',
+)
+AUTHOR_FIELDS = (
+    'email',
+    'id',
+    'username',
+    'first_name',
+    'last_name',
+)
+
+
+def compile_getter(fields):
+    """Возвращает функцию, собирающую словарь из атрибутов объекта."""
+    getter = attrgetter(*fields)
+    return lambda obj: dict(zip(fields, getter(obj)))
+
+
+get_tag = compile_getter(TAG_FIELDS)
+get_author = compile_getter(AUTHOR_FIELDS)
+get_recipe_fields = attrgetter('name', 'text', 'cooking_time')
+
+
+def get_ingredient(ingredient_recipe):
+    ingredient = ingredient_recipe.ingredient
+    return {
+        'id': ingredient_recipe.id,
+        'name': ingredient.name,
+        'measurement_unit': ingredient.measurement_unit,
+        'amount': ingredient_recipe.amount,
+    }
+
+
+def get_image_url(image):
+    if not image:
+        return None
+    if not api_settings.UPLOADED_FILES_USE_URL:
+        return image.name
+    try:
+        return image.url
+    except AttributeError:
+        return None
+
+
+def get_document_author(recipe):
+    author = get_author(recipe.author)
+    author['is_subscribed'] = False
+    return author
+
+
+DOCUMENT_BUILDERS = {
+    'id': attrgetter('id'),
+    'tags': lambda recipe: [get_tag(tag) for tag in recipe.tags.all()],
+    'author': get_document_author,
+    'ingredients': lambda recipe: [
+        get_ingredient(ingredient_recipe)
+        for ingredient_recipe in recipe.ingredient_recipes.all()
+    ],
+    'is_favorited': lambda recipe: False,
+    'is_in_shopping_cart': lambda recipe: False,
+    'name': attrgetter('name'),
+    'image': lambda recipe: get_image_url(recipe.image),
+    'text': attrgetter('text'),
+    'cooking_time': attrgetter('cooking_time'),
+}
+RECIPE_DOCUMENT_FIELDS = tuple(DOCUMENT_BUILDERS)
+RECIPE_VIEWS = {
+    'card': (
+        'id',
+        'tags',
+        'author',
+        'is_favorited',
+        'is_in_shopping_cart',
+        'name',
+        'image',
+        'cooking_time',
+    ),
+}
+
+
+def build_recipe_document(recipe, fields=None):
+    """Собирает не зависящую от пользователя часть рецепта.
+
+    Рецепт должен приходить с подгруженными связями выводимых полей,
+    ссылка на картинку остаётся относительной. Без fields документ
+    полный и собирается без обхода DOCUMENT_BUILDERS.
+    """
+    if fields is not None:
+        return {field: DOCUMENT_BUILDERS[field](recipe) for field in fields}
+    name, text, cooking_time = get_recipe_fields(recipe)
+    return {
+        'id': recipe.id,
+        'tags': [get_tag(tag) for tag in recipe.tags.all()],
+        'author': get_document_author(recipe),
+        'ingredients': [
+            get_ingredient(ingredient_recipe)
+            for ingredient_recipe in recipe.ingredient_recipes.all()
+        ],
+        'is_favorited': False,
+        'is_in_shopping_cart': False,
+        'name': name,
+        'image': get_image_url(recipe.image),
+        'text': text,
+        'cooking_time': cooking_time,
+    }
+
+
+def copy_document(document):
+    document = {**document}
+    if 'author' in document:
+        document['author'] = {**document['author']}
+    return document
+
+
+class RecipeFastSerializer:
+    """Быстрый сериализатор рецептов для чтения.
+
+    Принимает документы из build_recipe_document и повторяет вывод
+    RecipeReadSerializer: дополняет их абсолютной ссылкой на картинку
+    и флагами текущего пользователя. Документы могут содержать часть
+    полей, тогда заполняются только имеющиеся. Исходные документы не
+    изменяются.
+    """
+    def __init__(self, instance, many=False, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def data(self):
+        documents = list(self.instance) if self.many else [self.instance]
+        documents = [copy_document(document) for document in documents]
+        request = self.context.get('request')
+        if request is not None:
+            for document in documents:
+                if document.get('image') is not None:
+                    document['image'] = request.build_absolute_uri(
+                        document['image']
+                    )
+        self.apply_viewer_flags(documents)
+        return documents if self.many else documents[0]
+
+    def apply_viewer_flags(self, documents):
+        """Проставляет флаги избранного, корзины и подписки."""
+        request = self.context.get('request')
+        if request is None or request.user.is_anonymous or not documents:
+            return
+        favorited = 'is_favorited' in documents[0]
+        in_shopping_cart = 'is_in_shopping_cart' in documents[0]
+        subscribed = 'author' in documents[0]
+        if not (favorited or in_shopping_cart or subscribed):
+            return
+        viewer = ViewerContext.for_request(request)
+        viewer.prime(
+            recipe_ids=[document['id'] for document in documents],
+            author_ids={
+                document['author']['id']
+                for document in documents
+                if subscribed
+            },
+        )
+        for document in documents:
+            if favorited:
+                document['is_favorited'] = viewer.is_favorited(
+                    document['id']
+                )
+            if in_shopping_cart:
+                document['is_in_shopping_cart'] = viewer.is_in_shopping_cart(
+                    document['id']
+                )
+            if subscribed:
+                document['author']['is_subscribed'] = viewer.is_subscribed(
+                    document['author']['id']
+                )
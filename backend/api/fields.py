@@ -1,9 +1,14 @@
 import base64
+import binascii
+import mimetypes
 
 import webcolors
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
 from rest_framework import serializers
 
+from foodgram import constants
+
 
 class Hex2NameColor(serializers.Field):
     """Сериализатор для обработки шестнадцатеричного представления цвета."""
@@ -18,11 +23,97 @@ class Hex2NameColor(serializers.Field):
         return data
 
 
+def validate_image_file(file):
+    """Проверяет размер файла и картинки, не распаковывая её целиком.
+
+    Pillow при открытии читает только заголовок, поэтому размеры
+    известны до декомпрессии пикселей. Сам Pillow импортируется только
+    при первой загрузке картинки, чтобы не замедлять старт воркера.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    if file.size > settings.MAX_IMAGE_UPLOAD_SIZE:
+        raise serializers.ValidationError(
+            'Картинка не должна быть больше '
+            f'{settings.MAX_IMAGE_UPLOAD_SIZE} байт!'
+        )
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+    except (UnidentifiedImageError, OSError):
+        raise serializers.ValidationError('Файл не является картинкой!')
+    finally:
+        file.seek(0)
+    if (
+        max(width, height) > constants.MAX_IMAGE_SIDE
+        or width * height > constants.MAX_IMAGE_PIXELS
+    ):
+        raise serializers.ValidationError(
+            'Картинка не должна быть больше '
+            f'{constants.MAX_IMAGE_SIDE} пикселей по стороне!'
+        )
+    return file
+
+
 class Base64ImageField(serializers.ImageField):
-    """Сериализатор для обработки изображений в формате base64."""
+    """Сериализатор для обработки изображений в формате base64.
+
+    Размер проверяется до декодирования, а декодирование идёт частями
+    во временный файл, поэтому картинка не копируется в памяти целиком.
+    """
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = self.decode(data)
         return super().to_internal_value(data)
+
+    def decode(self, data):
+        """Декодирует data URI во временный файл.
+
+        Строка не копируется целиком: части base64 берутся срезами после
+        заголовка. Пробелы и переводы строк из частей убираются, а
+        остаток, не кратный четырём символам, переносится в следующую
+        часть, чтобы не сбить выравнивание base64.
+        """
+        header_end = data.find(';base64,')
+        if header_end == -1:
+            raise serializers.ValidationError(
+                'Картинка должна быть в формате base64!'
+            )
+        start = header_end + len(';base64,')
+        if (len(data) - start) * 3 // 4 > settings.MAX_IMAGE_UPLOAD_SIZE:
+            raise serializers.ValidationError(
+                'Картинка не должна быть больше '
+                f'{settings.MAX_IMAGE_UPLOAD_SIZE} байт!'
+            )
+        content_type = data[:header_end].partition(':')[2]
+        ext = content_type.split('/')[-1]
+        file = TemporaryUploadedFile(
+            'temp.' + ext,
+            content_type or mimetypes.guess_type('temp.' + ext)[0],
+            0,
+            None,
+        )
+        chunk_size = constants.BASE64_DECODE_CHUNK_SIZE
+        rest = ''
+        try:
+            for offset in range(start, len(data), chunk_size):
+                chunk = rest + ''.join(
+                    data[offset:offset + chunk_size].split()
+                )
+                end = len(chunk) - len(chunk) % 4
+                file.write(base64.b64decode(chunk[:end], validate=True))
+                rest = chunk[end:]
+            if rest:
+                raise ValueError('Неполная группа base64')
+        except (binascii.Error, ValueError):
+            file.close()
+            raise serializers.ValidationError(
+                'Картинка должна быть в формате base64!'
+            )
+        file.size = file.tell()
+        file.seek(0)
+        try:
+            return validate_image_file(file)
+        except serializers.ValidationError:
+            file.close()
+            raise
@@ -0,0 +1,66 @@
+from functools import lru_cache
+
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+VIEW_PARAM = 'view'
+
+
+def split_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def check_names(names, available):
+    unknown = names - set(available)
+    if unknown:
+        raise ValidationError({
+            'errors': f'Неизвестные поля: {", ".join(sorted(unknown))}!'
+        })
+
+
+def get_requested_fields(request, available, views=None):
+    """Возвращает поля ответа по параметрам view, fields и omit.
+
+    view выбирает готовый набор полей, fields задаёт набор явно, omit
+    убирает поля из выбранного набора. id выводится всегда. Поля идут в
+    порядке available; если нужны все поля, возвращается None.
+    """
+    params = request.query_params
+    fields = available
+    view = params.get(VIEW_PARAM)
+    if view is not None:
+        if view not in (views or {}):
+            raise ValidationError({
+                'errors': f'Неизвестное представление {view}!'
+            })
+        fields = views[view]
+    if FIELDS_PARAM in params:
+        requested = split_names(params[FIELDS_PARAM])
+        check_names(requested, available)
+        fields = [field for field in available if field in requested]
+    if OMIT_PARAM in params:
+        omitted = split_names(params[OMIT_PARAM])
+        check_names(omitted, available)
+        fields = [field for field in fields if field not in omitted]
+    fields = tuple(
+        field for field in available if field in fields or field == 'id'
+    )
+    if fields == tuple(available):
+        return None
+    return fields
+
+
+@lru_cache(maxsize=None)
+def get_sparse_serializer_class(serializer_class, fields):
+    """Подкласс сериализатора, выводящий только fields.
+
+    Проекция queryset строится по полям сериализатора, поэтому для
+    подкласса не загружаются колонки и связи отброшенных полей.
+    """
+    if fields is None:
+        return serializer_class
+    meta = type('Meta', (serializer_class.Meta,), {'fields': fields})
+    return type(serializer_class.__name__, (serializer_class,), {
+        'Meta': meta,
+    })
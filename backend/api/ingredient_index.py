@@ -0,0 +1,203 @@
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import DatabaseError
+
+from api.versions import bump_versions, get_versions
+from recipes.changes import get_changes, get_last_cursor, get_synced_txid
+from recipes.models import IngredientRecipe, Recipe
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAMESPACE = 'ingredient_index'
+
+
+def invalidate_ingredient_index():
+    """Помечает индекс устаревшим во всех процессах."""
+    bump_versions(INDEX_NAMESPACE)
+
+
+def load_recipes(recipes=None):
+    """Читает ингредиенты и теги рецептов: всех или только recipes."""
+    ingredients = IngredientRecipe.objects.all()
+    tags = Recipe.tags.through.objects.all()
+    if recipes is not None:
+        ingredients = ingredients.filter(recipe_id__in=recipes)
+        tags = tags.filter(recipe_id__in=recipes)
+    recipe_ingredients = defaultdict(list)
+    for ingredient_id, recipe_id in ingredients.order_by(
+        'recipe_id',
+        'ingredient_id',
+    ).values_list('ingredient_id', 'recipe_id').iterator():
+        recipe_ingredients[recipe_id].append(ingredient_id)
+    recipe_tags = defaultdict(list)
+    for slug, recipe_id in tags.values_list(
+        'tag__slug',
+        'recipe_id',
+    ).iterator():
+        recipe_tags[recipe_id].append(slug)
+    return recipe_ingredients, recipe_tags
+
+
+def new_posting(recipe_ids=()):
+    return array('Q', recipe_ids)
+
+
+def get_own(index, key, owned, factory):
+    """Копия значения index[key] для правки: её ещё не видят читатели."""
+    if key not in owned:
+        index[key] = factory(index.get(key, ()))
+        owned.add(key)
+    return index[key]
+
+
+class IngredientIndex:
+    """Инвертированный индекс ингредиент -> рецепты в памяти процесса.
+
+    Для каждого ингредиента хранится отсортированный массив id рецептов
+    из 8-байтовых целых: id из BigAutoField не помещаются в 4 байта.
+    Индекс загружается целиком при первом обращении и при смене версии
+    в кеше, а изменения рецептов применяются по журналу изменений.
+    Журнал и версия проверяются не чаще раза в
+    INGREDIENT_INDEX_POLL_INTERVAL секунд.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = None
+        self.version = None
+        self.cursor = None
+        self.checked_at = 0
+
+    def load(self):
+        """Строит индекс целиком. Рецепты читаются по возрастанию id,
+        поэтому списки рецептов ингредиентов получаются отсортированными."""
+        recipe_ingredients, recipe_tags = load_recipes()
+        postings = defaultdict(new_posting)
+        for recipe_id, ingredient_ids in recipe_ingredients.items():
+            for ingredient_id in ingredient_ids:
+                postings[ingredient_id].append(recipe_id)
+        tags = defaultdict(set)
+        for recipe_id, slugs in recipe_tags.items():
+            for slug in slugs:
+                tags[slug].add(recipe_id)
+        return (
+            dict(postings),
+            {
+                recipe_id: tuple(ingredient_ids)
+                for recipe_id, ingredient_ids in recipe_ingredients.items()
+            },
+            dict(tags),
+            {
+                recipe_id: tuple(slugs)
+                for recipe_id, slugs in recipe_tags.items()
+            },
+        )
+
+    def patch(self, recipe_ids):
+        """Возвращает индекс с обновлёнными рецептами recipe_ids.
+
+        Меняются копии затронутых списков, а сам индекс подменяется
+        целиком, поэтому поиск в других потоках идёт без блокировки.
+        """
+        postings, recipe_ingredients, tags, recipe_tags = self.data
+        postings, recipe_ingredients = dict(postings), dict(recipe_ingredients)
+        tags, recipe_tags = dict(tags), dict(recipe_tags)
+        new_ingredients, new_tags = load_recipes(recipe_ids)
+        owned_postings, owned_tags = set(), set()
+        for recipe_id in recipe_ids:
+            old = set(recipe_ingredients.pop(recipe_id, ()))
+            new = set(new_ingredients.get(recipe_id, ()))
+            for ingredient_id in old - new:
+                posting = get_own(
+                    postings, ingredient_id, owned_postings, new_posting,
+                )
+                position = bisect_left(posting, recipe_id)
+                if position < len(posting) and posting[position] == recipe_id:
+                    del posting[position]
+            for ingredient_id in new - old:
+                insort(get_own(
+                    postings, ingredient_id, owned_postings, new_posting,
+                ), recipe_id)
+            if new:
+                recipe_ingredients[recipe_id] = tuple(sorted(new))
+            old = set(recipe_tags.pop(recipe_id, ()))
+            new = set(new_tags.get(recipe_id, ()))
+            for slug in old - new:
+                get_own(tags, slug, owned_tags, set).discard(recipe_id)
+            for slug in new - old:
+                get_own(tags, slug, owned_tags, set).add(recipe_id)
+            if new:
+                recipe_tags[recipe_id] = tuple(new)
+        return postings, recipe_ingredients, tags, recipe_tags
+
+    def refresh(self):
+        """Перезагружает индекс при смене версии, иначе применяет
+        изменения рецептов из журнала после курсора."""
+        version = get_versions([INDEX_NAMESPACE])[INDEX_NAMESPACE]
+        until = get_synced_txid()
+        if self.data is None or version != self.version:
+            self.cursor = get_last_cursor(until)
+            self.data = self.load()
+            self.version = version
+            return
+        entries = get_changes(AnonymousUser(), self.cursor, None, until)
+        if entries:
+            self.data = self.patch({entry[3] for entry in entries})
+            self.cursor = entries[-1][:2]
+
+    def get_data(self):
+        now = time.monotonic()
+        if (
+            self.data is not None
+            and now - self.checked_at < settings.INGREDIENT_INDEX_POLL_INTERVAL
+        ):
+            return self.data
+        with self.lock:
+            self.refresh()
+            self.checked_at = now
+        return self.data
+
+    def warm(self):
+        """Строит индекс заранее, до первого запроса к нему."""
+        try:
+            self.get_data()
+        except DatabaseError:
+            logger.exception('Не удалось построить индекс ингредиентов')
+
+    def search(self, ingredient_ids, tags=None, limit=None):
+        """Ищет рецепты, в которых есть хотя бы один из ингредиентов.
+
+        Возвращает тройки (id рецепта, найдено ингредиентов, не хватает
+        ингредиентов) по убыванию найденных и возрастанию недостающих.
+        Совпадения считает Counter.update, который обходит массивы в C.
+        """
+        postings, recipe_ingredients, tag_index, _ = self.get_data()
+        covered = Counter()
+        for ingredient_id in set(ingredient_ids):
+            covered.update(postings.get(ingredient_id, ()))
+        if tags:
+            allowed = set().union(*(tag_index.get(tag, ()) for tag in tags))
+            covered = {
+                recipe_id: count
+                for recipe_id, count in covered.items()
+                if recipe_id in allowed
+            }
+        results = [
+            (
+                recipe_id,
+                count,
+                len(recipe_ingredients.get(recipe_id, ())) - count,
+            )
+            for recipe_id, count in covered.items()
+        ]
+        results.sort(key=lambda result: (-result[1], result[2], -result[0]))
+        return results[:limit]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,323 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import quote
+
+import requests
+
+from api.middleware import SQL_COUNT_HEADER
+
+LOAD_TEST_EMAIL = 'loadtest{number}@example.com'
+LOAD_TEST_PASSWORD = 'LoadTestPas$word'
+VARIABLE_RE = re.compile(r'{{(\w+)}}')
+SKIPPED_FOLDERS = ('bad_requests', 'register_and_get_tokens', 'reset_password')
+POOL_PAGES = 5
+POOL_PAGE_SIZE = 100
+
+
+class Step:
+    """Один запрос сценария из Postman-коллекции."""
+    def __init__(self, method, url, body, authenticated):
+        self.method = method
+        self.url = url
+        self.body = body
+        self.authenticated = authenticated
+        self.endpoint = f'{method} {VARIABLE_RE.sub(get_placeholder, url)}'
+
+
+class Scenario:
+    """Последовательность запросов, выполняемая как одно действие."""
+    def __init__(self, steps, weight=1):
+        self.steps = steps
+        self.weight = weight
+        self.creates = len(steps) > 1 and steps[0].url != steps[1].url
+
+    @property
+    def name(self):
+        return ' + '.join(step.endpoint for step in self.steps)
+
+
+def get_placeholder(match):
+    name = match.group(1)
+    if not name.endswith(('Id', 'Slug')):
+        return f'{{{name}}}'
+    for kind in ('Recipe', 'User', 'Tag', 'Indredient', 'Ingredient'):
+        if kind.lower() in name.lower():
+            suffix = 'slug' if name.endswith('Slug') else 'id'
+            return f'{{{kind.lower().replace("indr", "ingr")}_{suffix}}}'
+    return f'{{{name}}}'
+
+
+def get_auth(item, inherited):
+    auth = item.get('auth') or item.get('request', {}).get('auth')
+    if auth is None:
+        return inherited
+    return auth['type'] == 'apikey'
+
+
+def iter_requests(items, authenticated=False, skipped=False):
+    for item in items:
+        item_skipped = skipped or any(
+            folder in item['name'] for folder in SKIPPED_FOLDERS
+        )
+        item_authenticated = get_auth(item, authenticated)
+        if 'item' in item:
+            yield from iter_requests(
+                item['item'],
+                item_authenticated,
+                item_skipped,
+            )
+        elif not item_skipped:
+            request = item['request']
+            url = request['url']
+            yield Step(
+                request['method'],
+                (url['raw'] if isinstance(url, dict) else url).replace(
+                    '{{baseUrl}}',
+                    '',
+                ),
+                request.get('body', {}).get('raw'),
+                item_authenticated,
+            )
+
+
+def load_scenarios(path, writes=False):
+    """Строит взвешенный набор сценариев по Postman-коллекции.
+
+    Вес сценария — сколько раз его запрос встречается в коллекции.
+    GET-запросы выполняются по одному. С writes POST добавляется в паре
+    с DELETE того же адреса (избранное, корзина, подписки) или адреса
+    созданного объекта (рецепты), чтобы данные не накапливались.
+    """
+    with open(path) as file:
+        collection = json.load(file)
+    variables = {
+        variable['key']: variable['value']
+        for variable in collection.get('variable', ())
+    }
+    steps = list(iter_requests(collection['item']))
+    deletes = {step.url: step for step in steps if step.method == 'DELETE'}
+    scenarios = {}
+    for step in steps:
+        if step.method == 'GET':
+            scenario = Scenario([step])
+        elif step.method == 'POST' and writes:
+            delete = deletes.get(step.url) or next(
+                (
+                    delete for url, delete in deletes.items()
+                    if url.startswith(step.url)
+                    and VARIABLE_RE.fullmatch(url[len(step.url):-1])
+                ),
+                None,
+            )
+            if delete is None:
+                continue
+            scenario = Scenario([step, delete])
+        else:
+            continue
+        if scenario.name in scenarios:
+            scenarios[scenario.name].weight += 1
+        else:
+            scenarios[scenario.name] = scenario
+    return list(scenarios.values()), variables
+
+
+def percentile(values, percent):
+    """Процентиль по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = max(0, int(round(percent / 100 * len(values) + 0.5)) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+class LoadTestRunner:
+    """Выполняет сценарии в несколько потоков против запущенного сервера."""
+    def __init__(self, base_url, scenarios, variables, users, seed=None):
+        self.base_url = base_url.rstrip('/')
+        self.scenarios = scenarios
+        self.weights = [scenario.weight for scenario in scenarios]
+        self.variables = variables
+        self.users = users
+        self.random = random.Random(seed)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.queries = defaultdict(list)
+        self.sessions = []
+        self.pools = {}
+
+    @property
+    def session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def log_in(self):
+        """Получает токены пользователей из generate_dataset."""
+        for number in range(self.users):
+            response = self.session.post(
+                f'{self.base_url}/api/auth/token/login/',
+                json={
+                    'email': LOAD_TEST_EMAIL.format(number=number),
+                    'password': LOAD_TEST_PASSWORD,
+                },
+            )
+            if response.status_code != 200:
+                continue
+            headers = {
+                'Authorization': f'Token {response.json()["auth_token"]}',
+            }
+            user = self.session.get(
+                f'{self.base_url}/api/users/me/',
+                headers=headers,
+            ).json()
+            self.sessions.append((user['id'], headers))
+        return len(self.sessions)
+
+    def load_pools(self):
+        """Собирает id объектов, подставляемые в адреса сценариев."""
+        def fetch(url):
+            results = []
+            for page in range(1, POOL_PAGES + 1):
+                data = self.session.get(
+                    f'{self.base_url}{url}',
+                    params={'page': page, 'limit': POOL_PAGE_SIZE},
+                ).json()
+                if isinstance(data, list):
+                    return data
+                results.extend(data['results'])
+                if not data.get('next'):
+                    break
+            return results
+
+        tags = fetch('/api/tags/')
+        ingredients = fetch('/api/ingredients/')
+        self.pools = {
+            'recipe_id': [recipe['id'] for recipe in fetch('/api/recipes/')],
+            'user_id': [user['id'] for user in fetch('/api/users/')],
+            'tag_id': [tag['id'] for tag in tags],
+            'tag_slug': [tag['slug'] for tag in tags],
+            'ingredient_id': [
+                ingredient['id'] for ingredient in ingredients
+            ],
+            'ingredientNameFirstLatter': [
+                quote(ingredient['name'][:1]) for ingredient in ingredients
+            ],
+        }
+        return {name: len(pool) for name, pool in self.pools.items()}
+
+    def resolve(self, text, values, user_id):
+        def replace(match):
+            name = match.group(1)
+            if name not in values:
+                kind = get_placeholder(match)[1:-1]
+                pool = self.pools.get(kind)
+                if pool is None:
+                    values[name] = self.variables.get(name, '')
+                else:
+                    choices = [
+                        value for value in pool
+                        if kind != 'user_id' or value != user_id
+                    ]
+                    values[name] = str(self.random.choice(choices or pool))
+            return values[name]
+
+        return VARIABLE_RE.sub(replace, text)
+
+    def run_scenario(self, scenario):
+        user_id, headers = self.random.choice(self.sessions)
+        values = {}
+        created_id = None
+        for number, step in enumerate(scenario.steps):
+            url = step.url
+            if scenario.creates and number:
+                if created_id is None:
+                    break
+                url = VARIABLE_RE.sub(str(created_id), url)
+            url = self.resolve(url, values, user_id)
+            body = step.body and self.resolve(step.body, values, user_id)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    step.method,
+                    f'{self.base_url}{url}',
+                    data=body and body.encode(),
+                    headers={
+                        'Content-Type': 'application/json',
+                        **(headers if step.authenticated else {}),
+                    },
+                )
+                status = response.status_code
+            except requests.RequestException:
+                response = None
+                status = 'error'
+            latency = time.perf_counter() - start
+            with self.lock:
+                self.latencies[step.endpoint].append(latency)
+                self.statuses[step.endpoint][status] += 1
+                if response is not None and SQL_COUNT_HEADER in (
+                    response.headers
+                ):
+                    self.queries[step.endpoint].append(
+                        int(response.headers[SQL_COUNT_HEADER])
+                    )
+            if (
+                response is not None and step.method == 'POST'
+                and response.status_code == 201
+            ):
+                created_id = response.json().get('id')
+
+    def work(self, deadline):
+        while time.monotonic() < deadline:
+            (scenario,) = self.random.choices(self.scenarios, self.weights)
+            self.run_scenario(scenario)
+
+    def run(self, duration, concurrency):
+        """Гоняет сценарии duration секунд и возвращает отчёт."""
+        start = time.monotonic()
+        threads = [
+            threading.Thread(target=self.work, args=(start + duration,))
+            for _ in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.get_report(time.monotonic() - start)
+
+    def get_report(self, elapsed):
+        endpoints = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            queries = self.queries.get(endpoint)
+            endpoints[endpoint] = {
+                'requests': len(latencies),
+                'rps': round(len(latencies) / elapsed, 2),
+                'p50': round(percentile(latencies, 50) * 1000, 2),
+                'p90': round(percentile(latencies, 90) * 1000, 2),
+                'p99': round(percentile(latencies, 99) * 1000, 2),
+                'max': round(max(latencies) * 1000, 2),
+                'sql': (
+                    round(sum(queries) / len(queries), 2) if queries else None
+                ),
+                'statuses': {
+                    str(status): count
+                    for status, count in self.statuses[endpoint].items()
+                },
+            }
+        latencies = [
+            latency for values in self.latencies.values()
+            for latency in values
+        ]
+        return {
+            'elapsed': round(elapsed, 2),
+            'requests': len(latencies),
+            'rps': round(len(latencies) / elapsed, 2),
+            'p50': round(percentile(latencies, 50) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+            'endpoints': endpoints,
+        }
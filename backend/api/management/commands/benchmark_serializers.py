@@ -0,0 +1,131 @@
+import timeit
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api.documents import get_document_queryset
+from api.fast_serializers import (RECIPE_DOCUMENT_FIELDS, RECIPE_VIEWS,
+                                  RecipeFastSerializer, build_recipe_document)
+from api.renderers import FastJSONRenderer
+from api.serializers import RecipeReadSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет вывод быстрого сериализатора рецептов с '
+        'RecipeReadSerializer и замеряет время сериализации, а также '
+        'размер ответа и время его сборки из базы для каждого набора '
+        'полей (view).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--user',
+            help='email пользователя, от имени которого идут запросы',
+        )
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/api/recipes/')
+        request.user = AnonymousUser()
+        if options['user']:
+            try:
+                request.user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError('Пользователь не найден')
+        recipes = list(get_document_queryset()[:options['limit']])
+        if not recipes:
+            raise CommandError('В базе нет рецептов')
+        context = {'request': request}
+
+        def render_default():
+            return JSONRenderer().render(
+                RecipeReadSerializer(recipes, many=True, context=context).data
+            )
+
+        def render_fast():
+            return FastJSONRenderer().render(
+                RecipeFastSerializer(
+                    [build_recipe_document(recipe) for recipe in recipes],
+                    many=True,
+                    context=context,
+                ).data
+            )
+
+        if render_default() != render_fast():
+            raise CommandError(
+                'Вывод быстрого сериализатора отличается от '
+                'RecipeReadSerializer'
+            )
+        default_time = min(timeit.repeat(
+            render_default, number=1, repeat=options['repeat'],
+        ))
+        fast_time = min(timeit.repeat(
+            render_fast, number=1, repeat=options['repeat'],
+        ))
+        self.stdout.write(
+            f'Рецептов: {len(recipes)}\n'
+            f'RecipeReadSerializer: {default_time * 1000:.2f} мс\n'
+            f'RecipeFastSerializer: {fast_time * 1000:.2f} мс'
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Вывод совпадает, ускорение в '
+                f'{default_time / fast_time:.1f} раза'
+            )
+        )
+        self.benchmark_views(recipes, context, options)
+
+    def benchmark_views(self, recipes, context, options):
+        """Замеряет полный ответ и готовые наборы полей.
+
+        Время включает запрос к базе с нужными набору связями, сборку
+        документов и рендеринг, то есть путь рецепта мимо кеша.
+        """
+        full = RecipeFastSerializer(
+            [build_recipe_document(recipe) for recipe in recipes],
+            many=True,
+            context=context,
+        ).data
+        ids = [recipe.id for recipe in recipes]
+        for view, fields in {'full': None, **RECIPE_VIEWS}.items():
+            render = partial(self.render_view, ids, fields, context)
+            expected = FastJSONRenderer().render([
+                {
+                    field: document[field]
+                    for field in fields or RECIPE_DOCUMENT_FIELDS
+                }
+                for document in full
+            ])
+            if render() != expected:
+                raise CommandError(
+                    f'Вывод набора полей {view} отличается от полного '
+                    'вывода'
+                )
+            view_time = min(timeit.repeat(
+                render, number=1, repeat=options['repeat'],
+            ))
+            self.stdout.write(
+                f'view={view}: {len(expected) / 1024:.1f} КБ, '
+                f'{view_time * 1000:.2f} мс'
+            )
+
+    def render_view(self, ids, fields, context):
+        recipes = get_document_queryset(fields).in_bulk(ids)
+        return FastJSONRenderer().render(
+            RecipeFastSerializer(
+                [
+                    build_recipe_document(recipes[recipe_id], fields)
+                    for recipe_id in ids
+                ],
+                many=True,
+                context=context,
+            ).data
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from foodgram.cache import (HIT_LOCAL, HIT_SHARED, MISS, get_metrics,
+                            reset_metrics)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит попадания в локальный и общий уровни кеша и промахи по '
+        'пространствам имён, суммарно по всем процессам. Процессы '
+        'сбрасывают счётчики раз в CACHE_METRICS_INTERVAL секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='обнулить счётчики после вывода',
+        )
+
+    def handle(self, *args, **options):
+        metrics = get_metrics()
+        if not metrics:
+            self.stdout.write('Счётчиков пока нет')
+        for namespace, counts in metrics.items():
+            total = sum(counts.values())
+            if not total:
+                continue
+            hits = counts[HIT_LOCAL] + counts[HIT_SHARED]
+            self.stdout.write(
+                f'{namespace}: запросов {total}, '
+                f'в памяти {counts[HIT_LOCAL]}, '
+                f'в общем кеше {counts[HIT_SHARED]}, '
+                f'промахов {counts[MISS]}, '
+                f'попаданий {hits / total:.0%}'
+            )
+        if options['reset']:
+            reset_metrics()
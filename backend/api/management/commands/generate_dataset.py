@@ -0,0 +1,206 @@
+import io
+import random
+from collections import Counter
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from api.documents import INGREDIENTS_NAMESPACE, TAGS_NAMESPACE
+from api.ingredient_index import invalidate_ingredient_index
+from api.load_testing import LOAD_TEST_EMAIL, LOAD_TEST_PASSWORD
+from api.versions import bump_versions
+from foodgram import constants
+from recipes.feed import sync_author
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, StoredImage, Tag)
+from recipes.similarity import index_recipes
+from recipes.storage import image_storage
+from users.models import Subscriber
+
+User = get_user_model()
+
+MIN_TAGS = 3
+MIN_INGREDIENTS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу пользователями, рецептами, избранным, списками '
+        'покупок и подписками для нагрузочного тестирования.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--shopping-carts', type=int, default=5)
+        parser.add_argument('--subscriptions', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        start_time = datetime.now()
+        generator = random.Random(options['seed'])
+        with transaction.atomic():
+            tags = self.create_tags()
+            ingredients = self.create_ingredients()
+            users = self.create_users(options['users'])
+            recipe_ids = self.create_recipes(
+                generator,
+                options['recipes'],
+                users,
+                tags,
+                ingredients,
+            )
+            self.create_relations(generator, users, recipe_ids, options)
+        for start in range(0, len(recipe_ids), 500):
+            index_recipes(recipe_ids[start:start + 500])
+        invalidate_ingredient_index()
+        bump_versions(TAGS_NAMESPACE, INGREDIENTS_NAMESPACE)
+        duration = datetime.now() - start_time
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Создано {len(users)} пользователей и {len(recipe_ids)} '
+                f'рецептов за {duration.total_seconds():.1f} секунд. '
+                f'Пароль пользователей: {LOAD_TEST_PASSWORD}'
+            )
+        )
+
+    def create_tags(self):
+        for number in range(Tag.objects.count(), MIN_TAGS):
+            Tag.objects.create(
+                name=f'Тег {number}',
+                color=f'#{number * 0x3f3f3f % 0xffffff:06x}',
+                slug=f'loadtest-{number}',
+            )
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def create_ingredients(self):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+            for number in range(Ingredient.objects.count(), MIN_INGREDIENTS)
+        )
+        return list(Ingredient.objects.values_list('id', flat=True))
+
+    def create_users(self, count):
+        password = make_password(LOAD_TEST_PASSWORD)
+        first = User.objects.filter(
+            email__startswith=LOAD_TEST_EMAIL.split('{')[0],
+        ).count()
+        users = User.objects.bulk_create(
+            User(
+                email=LOAD_TEST_EMAIL.format(number=number),
+                username=f'loadtest{number}',
+                first_name='Нагрузочный',
+                last_name=f'Тест {number}',
+                password=password,
+            )
+            for number in range(first, first + count)
+        )
+        return [user.id for user in users] or list(
+            User.objects.values_list('id', flat=True)
+        )
+
+    def create_image(self, references):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), 'orange').save(buffer, 'PNG')
+        name = image_storage.save(
+            'recipes_images/loadtest.png',
+            ContentFile(buffer.getvalue()),
+        )
+        StoredImage.objects.get_or_create(name=name)
+        StoredImage.objects.filter(name=name).update(
+            references=F('references') + references,
+        )
+        return name
+
+    def create_recipes(self, generator, count, users, tags, ingredients):
+        image = self.create_image(count)
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author_id=generator.choice(users),
+                name=f'Рецепт {number}',
+                text='Смешать все ингредиенты и подавать.',
+                cooking_time=generator.randint(
+                    constants.MIN_VALIDATION_VALUE,
+                    120,
+                ),
+                image=image,
+            )
+            for number in range(count)
+        )
+        recipe_ids = [recipe.id for recipe in recipes]
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in generator.sample(tags, generator.randint(1, 3))
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=generator.randint(constants.MIN_VALIDATION_VALUE, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in generator.sample(
+                ingredients,
+                generator.randint(2, 8),
+            )
+        )
+        return recipe_ids
+
+    def create_relations(self, generator, users, recipe_ids, options):
+        scores = Counter()
+        for model, option, weight in (
+            (Favorite, 'favorites', constants.FAVORITE_SCORE_WEIGHT),
+            (
+                ShoppingCart,
+                'shopping_carts',
+                constants.SHOPPING_CART_SCORE_WEIGHT,
+            ),
+        ):
+            relations = [
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in users
+                for recipe_id in generator.sample(
+                    recipe_ids,
+                    min(options[option], len(recipe_ids)),
+                )
+            ]
+            model.objects.bulk_create(relations, ignore_conflicts=True)
+            for relation in relations:
+                scores[relation.recipe_id] += weight
+        Recipe.objects.bulk_update(
+            [
+                Recipe(id=recipe_id, popularity=score, trending_score=score)
+                for recipe_id, score in scores.items()
+            ],
+            ('popularity', 'trending_score'),
+            batch_size=500,
+        )
+        subscriptions = []
+        for user_id in users:
+            authors = generator.sample(
+                users,
+                min(options['subscriptions'] + 1, len(users)),
+            )
+            subscriptions.extend(
+                (user_id, author_id)
+                for author_id in authors[:options['subscriptions'] + 1]
+                if author_id != user_id
+            )
+        Subscriber.objects.bulk_create(
+            [
+                Subscriber(user_id=user_id, author_id=author_id)
+                for user_id, author_id in subscriptions
+            ],
+            ignore_conflicts=True,
+        )
+        for user_id, author_id in subscriptions:
+            sync_author(user_id, author_id)
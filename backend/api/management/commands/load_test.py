@@ -0,0 +1,142 @@
+import json
+import subprocess
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.load_testing import LoadTestRunner, load_scenarios
+
+COLLECTION_PATH = (
+    settings.BASE_DIR.parent / 'postman-collection'
+    / 'diploma.postman_collection.json'
+)
+COMPARED_METRICS = ('rps', 'p50', 'p99', 'sql')
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except OSError:
+        return ''
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенный сервер сценариями из Postman-коллекции и '
+        'выводит пропускную способность, перцентили задержки и число '
+        'SQL-запросов по каждому эндпоинту. Данные готовит '
+        'generate_dataset, число запросов сервер отдаёт при '
+        'SQL_COUNT_HEADER. Троттлинг и сброс нагрузки на сервере '
+        'стоит ослабить, иначе в отчёте будут 429 и 503.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--collection', default=str(COLLECTION_PATH))
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=10,
+            help='сколько пользователей generate_dataset использовать',
+        )
+        parser.add_argument(
+            '--writes',
+            action='store_true',
+            help='добавить пары POST/DELETE: избранное, корзину, подписки '
+                 'и рецепты',
+        )
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--save', help='сохранить отчёт в JSON-файл')
+        parser.add_argument(
+            '--compare',
+            help='сравнить с отчётом, сохранённым через --save',
+        )
+
+    def handle(self, *args, **options):
+        scenarios, variables = load_scenarios(
+            options['collection'],
+            writes=options['writes'],
+        )
+        runner = LoadTestRunner(
+            options['url'],
+            scenarios,
+            variables,
+            options['users'],
+            seed=options['seed'],
+        )
+        if not runner.log_in():
+            raise CommandError(
+                'Не удалось войти ни одним пользователем, сначала '
+                'выполните generate_dataset'
+            )
+        pools = runner.load_pools()
+        if not all(pools.values()):
+            raise CommandError(f'На сервере не хватает данных: {pools}')
+        self.stdout.write(
+            f'{len(scenarios)} сценариев, {len(runner.sessions)} '
+            f'пользователей, {options["concurrency"]} потоков, '
+            f'{options["duration"]:.0f} секунд'
+        )
+        report = runner.run(options['duration'], options['concurrency'])
+        report.update(
+            commit=get_commit(),
+            created_at=datetime.now().isoformat(timespec='seconds'),
+            concurrency=options['concurrency'],
+            writes=options['writes'],
+        )
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+        self.print_report(report, baseline)
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Отчёт сохранён в {options["save"]}')
+
+    def format_change(self, value, previous):
+        if value is None or not previous:
+            return ''
+        return f' ({(value - previous) / previous * 100:+.0f}%)'
+
+    def print_report(self, report, baseline):
+        if baseline is not None:
+            self.stdout.write(
+                f'Сравнение с {baseline.get("commit") or "отчётом"} от '
+                f'{baseline.get("created_at")}'
+            )
+        baseline_endpoints = (baseline or {}).get('endpoints', {})
+        for endpoint, metrics in report['endpoints'].items():
+            previous = baseline_endpoints.get(endpoint, {})
+            self.stdout.write(endpoint)
+            self.stdout.write(
+                '  ' + ', '.join(
+                    f'{metric} {metrics[metric]}'
+                    + self.format_change(
+                        metrics[metric],
+                        previous.get(metric),
+                    )
+                    for metric in COMPARED_METRICS
+                ) + f', p90 {metrics["p90"]}, max {metrics["max"]}, '
+                f'запросов {metrics["requests"]}, '
+                f'статусы {metrics["statuses"]}'
+            )
+        change = self.format_change(
+            report['rps'],
+            (baseline or {}).get('rps'),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Всего {report["requests"]} запросов за '
+                f'{report["elapsed"]} секунд: {report["rps"]} rps{change}, '
+                f'p50 {report["p50"]} мс, p99 {report["p99"]} мс'
+            )
+        )
@@ -0,0 +1,126 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+STARTUP_SCRIPT = '''
+import json, os, resource, sys, time
+from wsgiref.util import setup_testing_defaults
+start = time.perf_counter()
+from foodgram.wsgi import application
+setup_time = time.perf_counter() - start
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_time = time.perf_counter() - start
+path, _, query = sys.argv[1].partition('?')
+environ = {
+    'PATH_INFO': path,
+    'QUERY_STRING': query,
+    'HTTP_HOST': sys.argv[2],
+    'SERVER_NAME': sys.argv[2],
+}
+setup_testing_defaults(environ)
+statuses = []
+response = application(
+    environ,
+    lambda status, headers, exc_info=None: statuses.append(status),
+)
+for chunk in response:
+    pass
+response.close()
+print(json.dumps({
+    'setup': setup_time,
+    'urls': urls_time,
+    'first_request': time.perf_counter() - start,
+    'status': int(statuses[0].split()[0]),
+    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+'''
+
+
+def get_host():
+    """Первый хост из ALLOWED_HOSTS, на который Django ответит."""
+    for host in settings.ALLOWED_HOSTS:
+        host = host.strip().lstrip('.')
+        if host and host != '*':
+            return host
+    return 'localhost'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет холодный старт процесса: время импорта модулей, '
+        'время до первого ответа через WSGI-приложение и занятую память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/api/')
+        parser.add_argument(
+            '--host',
+            help='заголовок Host запроса, по умолчанию из ALLOWED_HOSTS',
+        )
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='завершиться с ошибкой, если превышен STARTUP_BUDGET',
+        )
+
+    def parse_import_times(self, stderr):
+        modules = []
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            self_time, cumulative, module = line[
+                len('import time:'):
+            ].split('|')
+            modules.append((
+                int(cumulative) / 1000,
+                int(self_time) / 1000,
+                module.strip(),
+            ))
+        return sorted(modules, reverse=True)
+
+    def handle(self, *args, **options):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT,
+             options['url'], options['host'] or get_host()],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode:
+            raise CommandError(process.stderr[-2000:])
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        modules = self.parse_import_times(process.stderr)
+
+        self.stdout.write('Модуль: суммарно мс / собственное мс')
+        for cumulative, self_time, module in modules[:options['top']]:
+            self.stdout.write(
+                f'{cumulative:10.1f} {self_time:10.1f}  {module}'
+            )
+        self.stdout.write(
+            f'Импортировано модулей: {len(modules)}\n'
+            f'django.setup(): {result["setup"]:.3f} с\n'
+            f'Загрузка urls: {result["urls"]:.3f} с\n'
+            f'Первый ответ {options["url"]} ({result["status"]}): '
+            f'{result["first_request"]:.3f} с\n'
+            f'Память процесса: {result["rss"]:.1f} МБ'
+        )
+        if not options['check']:
+            return
+        budget = settings.STARTUP_BUDGET
+        errors = []
+        if not 200 <= result['status'] < 300:
+            errors.append(f'первый ответ с кодом {result["status"]}')
+        if result['first_request'] > budget['SECONDS']:
+            errors.append(
+                f'время до первого ответа больше {budget["SECONDS"]} с'
+            )
+        if result['rss'] > budget['RSS_MB']:
+            errors.append(f'память процесса больше {budget["RSS_MB"]} МБ')
+        if errors:
+            raise CommandError('Превышен бюджет старта: ' + ', '.join(errors))
+        self.stdout.write(self.style.SUCCESS('Бюджет старта соблюдён'))
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from api.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит самые медленные SQL-запросы, сгруппированные по '
+        'нормализованному отпечатку. План строится через EXPLAIN '
+        '(ANALYZE, BUFFERS) на сохранённых значениях параметров; если в '
+        'запросе были строки, значения не сохраняются и план общий, без '
+        'реальных числа строк и времени.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='за сколько последних дней учитывать запросы',
+        )
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help=(
+                'выводить последний сохранённый план выполнения; первая '
+                'строка плана говорит, построен ли он на значениях '
+                'параметров'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        queries = SlowQuery.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=options['days'])
+        )
+        offenders = queries.values('fingerprint').annotate(
+            count=Count('id'),
+            total=Sum('duration'),
+            average=Avg('duration'),
+            longest=Max('duration'),
+        ).order_by('-total')[:options['top']]
+        if not offenders:
+            self.stdout.write('Медленных запросов нет')
+            return
+        for offender in offenders:
+            fingerprint = offender['fingerprint']
+            group = queries.filter(fingerprint=fingerprint)
+            latest = group.order_by('-created_at').first()
+            views = group.exclude(view='').order_by('view').values_list(
+                'view',
+                flat=True,
+            ).distinct()
+            self.stdout.write(
+                f'{fingerprint[:12]}  {offender["count"]} раз, '
+                f'всего {offender["total"]:.1f} мс, '
+                f'в среднем {offender["average"]:.1f} мс, '
+                f'максимум {offender["longest"]:.1f} мс'
+            )
+            self.stdout.write(f'  {latest.normalized_sql}')
+            if views:
+                self.stdout.write(f'  Представления: {", ".join(views)}')
+            if latest.params:
+                self.stdout.write(f'  Параметры: {latest.params}')
+            if options['plans']:
+                plan = group.exclude(plan='').order_by('-created_at').first()
+                if plan is not None:
+                    self.stdout.write(plan.plan)
+            self.stdout.write('')
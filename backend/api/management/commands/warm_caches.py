@@ -0,0 +1,103 @@
+import time
+from collections import Counter
+from http import HTTPStatus
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.warming import CacheWarmer, get_warm_urls
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кеши и соединения запущенного сервера после деплоя: '
+        'справочники, индекс подбора по ингредиентам, первые страницы '
+        'рецептов, популярные сочетания тегов и самые популярные '
+        'рецепты. Запросы только читающие, поэтому команду можно '
+        'запускать как проверку готовности: она завершается с ошибкой, '
+        'только если сервер так и не ответил за отведённое время.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument(
+            '--host',
+            help='заголовок Host, если адрес не входит в ALLOWED_HOSTS',
+        )
+        parser.add_argument(
+            '--budget',
+            type=float,
+            default=60,
+            help='сколько секунд отвести на прогрев',
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--pages', type=int, default=3)
+        parser.add_argument(
+            '--tags',
+            type=int,
+            default=5,
+            help='из скольких популярных тегов составлять сочетания',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=100,
+            help='сколько самых популярных рецептов запросить',
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=1,
+            help='повторить обход, чтобы прогреть больше воркеров',
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        warmer = CacheWarmer(
+            options['url'],
+            host=options['host'],
+            concurrency=options['concurrency'],
+            budget=options['budget'],
+        )
+        if not warmer.wait_until_ready():
+            raise CommandError(
+                f'Сервер {options["url"]} не ответил за '
+                f'{options["budget"]:.0f} с'
+            )
+        urls = get_warm_urls(
+            options['pages'],
+            options['top'],
+            options['tags'],
+        )
+        results = warmer.run(urls * options['rounds'])
+        statuses = Counter(status for _, status in results)
+        skipped = statuses.pop(None, 0)
+        if options['verbosity'] > 1:
+            for url, status in results:
+                if status is not None:
+                    self.stdout.write(f'{status} {url}')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Запросов: {len(results) - skipped} за '
+                f'{time.monotonic() - start:.1f} с, '
+                + ', '.join(
+                    f'{status}: {count}'
+                    for status, count in sorted(
+                        statuses.items(), key=lambda item: str(item[0])
+                    )
+                )
+            )
+        )
+        throttled = statuses.get(HTTPStatus.TOO_MANY_REQUESTS, 0)
+        if throttled:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Не прогрето из-за троттлинга: {throttled} запросов; '
+                    'увеличьте --budget или THROTTLE_BUCKET_CAPACITY'
+                )
+            )
+        if skipped:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Не хватило времени на {skipped} запросов'
+                )
+            )
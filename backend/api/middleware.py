@@ -0,0 +1,123 @@
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import CachedTokenAuthentication
+from api.models import RequestProfile
+from api.profiling import QueryCollector, SamplingProfiler
+from api.slow_queries import SlowQueryLogger
+from api.throttling import record_latency
+
+SQL_COUNT_HEADER = 'X-SQL-Count'
+
+
+class LatencyMiddleware:
+    """Учитывает время ответа в сглаженной задержке хоста, по которой
+    LoadSheddingThrottle решает, отклонять ли запросы."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.monotonic()
+        try:
+            return self.get_response(request)
+        finally:
+            record_latency(time.monotonic() - start)
+
+
+class ProfilingMiddleware:
+    """Профилирует запрос и сохраняет результат в RequestProfile.
+
+    Запрос профилируется по заголовку X-Profile или параметру _profile,
+    если их передал сотрудник, а также случайно раз в SAMPLE_RATE
+    запросов. В остальных случаях стоимость — одна проверка словаря.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def get_staff_user(self, request):
+        user = request.user
+        if not user.is_authenticated:
+            try:
+                credentials = CachedTokenAuthentication().authenticate(
+                    request
+                )
+            except AuthenticationFailed:
+                return None
+            if credentials is None:
+                return None
+            user = credentials[0]
+        return user if user.is_staff else None
+
+    def should_profile(self, request):
+        if 'HTTP_X_PROFILE' in request.META or '_profile' in request.GET:
+            return self.get_staff_user(request) is not None
+        rate = settings.PROFILER['SAMPLE_RATE']
+        return bool(rate) and random.randrange(rate) == 0
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        profiler = SamplingProfiler(settings.PROFILER['INTERVAL'])
+        queries = QueryCollector()
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            with connection.execute_wrapper(queries):
+                response = self.get_response(request)
+        finally:
+            profiler.stop()
+        duration = (time.perf_counter() - start) * 1000
+        user = request.user
+        RequestProfile.objects.create(
+            user=user if user.is_authenticated else None,
+            method=request.method,
+            path=request.get_full_path(),
+            status=response.status_code,
+            duration=duration,
+            samples=profiler.samples,
+            stacks=profiler.get_folded_stacks(),
+            fields=profiler.get_fields(duration),
+            queries=queries.get_queries(),
+        )
+        return response
+
+
+class SlowQueryMiddleware:
+    """Записывает SQL-запросы дольше SLOW_QUERY_LOG['THRESHOLD'] мс
+    вместе с представлением и параметрами запроса."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SLOW_QUERY_LOG['THRESHOLD']:
+            return self.get_response(request)
+        logger = SlowQueryLogger(request)
+        try:
+            with connection.execute_wrapper(logger):
+                return self.get_response(request)
+        finally:
+            logger.save()
+
+
+class QueryCountMiddleware:
+    """Добавляет в ответ заголовок с количеством SQL-запросов.
+
+    Нужен нагрузочному тесту, включается настройкой SQL_COUNT_HEADER.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SQL_COUNT_HEADER:
+            return self.get_response(request)
+        queries = QueryCollector()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        response[SQL_COUNT_HEADER] = sum(
+            count for count, _ in queries.queries.values()
+        )
+        return response
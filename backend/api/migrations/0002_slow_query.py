@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата')),
+                ('fingerprint', models.CharField(db_index=True, max_length=40, verbose_name='Отпечаток')),
+                ('normalized_sql', models.TextField(verbose_name='Нормализованный запрос')),
+                ('sql', models.TextField(verbose_name='Запрос')),
+                ('duration', models.FloatField(verbose_name='Длительность, мс')),
+                ('view', models.CharField(blank=True, max_length=255, verbose_name='Представление')),
+                ('params', models.JSONField(verbose_name='Параметры запроса')),
+                ('plan', models.TextField(blank=True, verbose_name='План выполнения')),
+            ],
+            options={
+                'verbose_name': 'объект "Медленный запрос"',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
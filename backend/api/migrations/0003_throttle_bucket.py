@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-19 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_slow_query'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleBucket',
+            fields=[
+                ('ident', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Клиент')),
+                ('tokens', models.FloatField(verbose_name='Токены')),
+                ('updated_at', models.FloatField(db_index=True, verbose_name='Время обновления, unix')),
+            ],
+            options={
+                'verbose_name': 'объект "Бакет троттлинга"',
+                'verbose_name_plural': 'Бакеты троттлинга',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-19 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_throttle_bucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(max_length=255, verbose_name='Пространство имён')),
+                ('kind', models.CharField(max_length=10, verbose_name='Вид')),
+                ('count', models.PositiveBigIntegerField(default=0, verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'объект "Счётчик кеша"',
+                'verbose_name_plural': 'Счётчики кеша',
+                'ordering': ['namespace', 'kind'],
+                'constraints': [models.UniqueConstraint(fields=('namespace', 'kind'), name='unique_cache_counter')],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.1.6 on 2026-10-19 09:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_cache_counter'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='ThrottleBucket',
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-19 09:19
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_delete_throttle_bucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slowquery',
+            name='sql_params',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Значения параметров SQL'),
+        ),
+    ]
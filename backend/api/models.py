@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """Модель для профиля отдельного запроса к API."""
+    created_at = models.DateTimeField(
+        verbose_name='Дата',
+        auto_now_add=True,
+        db_index=True,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        verbose_name='Пользователь',
+        related_name='request_profiles',
+        null=True,
+        blank=True,
+    )
+    method = models.CharField(
+        verbose_name='Метод',
+        max_length=10,
+    )
+    path = models.TextField(
+        verbose_name='Адрес',
+    )
+    status = models.PositiveSmallIntegerField(
+        verbose_name='Код ответа',
+    )
+    duration = models.FloatField(
+        verbose_name='Длительность, мс',
+    )
+    samples = models.PositiveIntegerField(
+        verbose_name='Количество сэмплов',
+    )
+    stacks = models.TextField(
+        verbose_name='Стеки в свёрнутом формате',
+    )
+    fields = models.JSONField(
+        verbose_name='Время по полям сериализаторов',
+    )
+    queries = models.JSONField(
+        verbose_name='SQL-запросы',
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'объект "Профиль запроса"'
+        verbose_name_plural = 'Профили запросов'
+
+    def __str__(self) -> str:
+        return f'{self.method} {self.path} за {self.duration:.0f} мс'
+
+
+class SlowQuery(models.Model):
+    """Модель для медленного SQL-запроса."""
+    created_at = models.DateTimeField(
+        verbose_name='Дата',
+        auto_now_add=True,
+        db_index=True,
+    )
+    fingerprint = models.CharField(
+        verbose_name='Отпечаток',
+        max_length=40,
+        db_index=True,
+    )
+    normalized_sql = models.TextField(
+        verbose_name='Нормализованный запрос',
+    )
+    sql = models.TextField(
+        verbose_name='Запрос',
+    )
+    duration = models.FloatField(
+        verbose_name='Длительность, мс',
+    )
+    view = models.CharField(
+        verbose_name='Представление',
+        max_length=255,
+        blank=True,
+    )
+    params = models.JSONField(
+        verbose_name='Параметры запроса',
+    )
+    sql_params = models.JSONField(
+        verbose_name='Значения параметров SQL',
+        encoder=DjangoJSONEncoder,
+        null=True,
+        blank=True,
+    )
+    plan = models.TextField(
+        verbose_name='План выполнения',
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'объект "Медленный запрос"'
+        verbose_name_plural = 'Медленные запросы'
+
+    def __str__(self) -> str:
+        return f'{self.fingerprint[:8]} за {self.duration:.0f} мс'
+
+
+class CacheCounter(models.Model):
+    """Модель для суммарного по процессам счётчика обращений к кешу."""
+    namespace = models.CharField(
+        verbose_name='Пространство имён',
+        max_length=255,
+    )
+    kind = models.CharField(
+        verbose_name='Вид',
+        max_length=10,
+    )
+    count = models.PositiveBigIntegerField(
+        verbose_name='Количество',
+        default=0,
+    )
+
+    class Meta:
+        ordering = ['namespace', 'kind']
+        verbose_name = 'объект "Счётчик кеша"'
+        verbose_name_plural = 'Счётчики кеша'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['namespace', 'kind'],
+                name='unique_cache_counter',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.namespace}/{self.kind}: {self.count}'
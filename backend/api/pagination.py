@@ -1,7 +1,154 @@
+import json
+import math
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def row_before(model, field, score, pk):
+    """Условие (field, id) < (score, pk) сравнением строк.
+
+    В отличие от OR из двух условий, такое сравнение база выполняет как
+    один диапазон по индексу (field, id).
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    column = quote(model._meta.get_field(field).column)
+    return RawSQL(
+        f'({table}.{column}, {table}.{quote("id")}) < (%s, %s)',
+        (score, pk),
+        output_field=BooleanField(),
+    )
 
 
 class CustomPagination(PageNumberPagination):
     """Пагинация для пользователей и рецептов."""
     page_size_query_param = 'limit'
     page_size = 6
+
+
+class KeysetPagination:
+    """Пагинация ленты по id последнего рецепта на странице."""
+    page_size = 6
+    max_page_size = 100
+    limit_query_param = 'limit'
+    cursor_query_param = 'before'
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(limit, 1), self.max_page_size)
+
+    def get_cursor(self, request):
+        try:
+            return int(request.query_params[self.cursor_query_param])
+        except (KeyError, ValueError):
+            return None
+
+    def get_next_link(self, request, next_cursor):
+        if next_cursor is None:
+            return None
+        return replace_query_param(
+            request.build_absolute_uri(),
+            self.cursor_query_param,
+            next_cursor,
+        )
+
+    def get_paginated_response(self, request, data, next_cursor):
+        return Response({
+            'next': self.get_next_link(request, next_cursor),
+            'results': data,
+        })
+
+
+class ScoreKeysetPagination(KeysetPagination):
+    """Пагинация рецептов по убыванию рейтинга и id.
+
+    Курсор хранит рейтинг и id последнего рецепта на странице, поэтому
+    страница читается одним проходом по индексу (рейтинг, id) без
+    COUNT и OFFSET. Ответ повторяет поля PageNumberPagination, но count
+    и previous в нём всегда null. С неверным курсором отдаётся первая
+    страница.
+    """
+    cursor_query_param = 'cursor'
+
+    def get_cursor(self, request):
+        try:
+            score, pk = json.loads(urlsafe_b64decode(
+                request.query_params[self.cursor_query_param].encode()
+            ))
+        except (KeyError, ValueError, TypeError):
+            return None
+        if (
+            type(score) not in (int, float)
+            or not math.isfinite(score)
+            or type(pk) is not int
+        ):
+            return None
+        return score, pk
+
+    def encode_cursor(self, score, pk):
+        return urlsafe_b64encode(json.dumps([score, pk]).encode()).decode()
+
+    def paginate_queryset(self, queryset, request, field):
+        """Возвращает страницу и курсор следующей страницы."""
+        limit = self.get_limit(request)
+        cursor = self.get_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(
+                row_before(queryset.model, field, *cursor)
+            )
+        page = list(queryset.order_by(f'-{field}', '-id')[:limit])
+        next_cursor = None
+        if len(page) == limit:
+            next_cursor = self.encode_cursor(
+                getattr(page[-1], field),
+                page[-1].id,
+            )
+        return page, next_cursor
+
+    def get_paginated_response(self, request, data, next_cursor):
+        return Response({
+            'count': None,
+            'next': self.get_next_link(request, next_cursor),
+            'previous': None,
+            'results': data,
+        })
+
+
+class ChangeLogPagination(ScoreKeysetPagination):
+    """Пагинация журнала изменений.
+
+    Курсор хранит txid и id последней прочитанной записи и время, по
+    которое клиент синхронизирован: по нему определяется, не удалены ли
+    уже записи, которые клиент ещё не видел.
+    """
+    page_size = 100
+    max_page_size = 500
+
+    def get_cursor(self, request):
+        try:
+            txid, entry_id, synced_at = json.loads(urlsafe_b64decode(
+                request.query_params[self.cursor_query_param].encode()
+            ))
+            return int(txid), int(entry_id), float(synced_at)
+        except (KeyError, ValueError, TypeError):
+            return None
+
+    def encode_cursor(self, *values):
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def get_paginated_response(self, request, data, next_cursor, has_more):
+        return Response({
+            'next': self.get_next_link(request, next_cursor),
+            'cursor': next_cursor,
+            'has_more': has_more,
+            **data,
+        })
@@ -0,0 +1,155 @@
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from html import escape
+
+from rest_framework.fields import Field
+
+FLAME_WIDTH = 1200
+FLAME_ROW_HEIGHT = 16
+
+
+def get_frame_name(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})'
+
+
+def get_serializer_field(frame):
+    """Имя поля сериализатора, если кадр относится к полю DRF."""
+    while frame is not None:
+        field = frame.f_locals.get('self')
+        if isinstance(field, Field) and field.field_name:
+            parent = field.parent.__class__.__name__
+            if hasattr(field.parent, 'child'):
+                parent = field.parent.child.__class__.__name__
+            return f'{parent}.{field.field_name}'
+        frame = frame.f_back
+    return None
+
+
+class SamplingProfiler:
+    """Сэмплирующий профилировщик одного потока.
+
+    Отдельный поток раз в interval секунд снимает стек целевого потока,
+    поэтому накладные расходы не зависят от количества вызовов функций.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self.fields = Counter()
+        self.samples = 0
+        self.thread_id = threading.get_ident()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            field = get_serializer_field(frame)
+            if field is not None:
+                self.fields[field] += 1
+            stack = []
+            while frame is not None:
+                stack.append(get_frame_name(frame))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def get_folded_stacks(self):
+        """Стеки в формате flamegraph.pl и speedscope."""
+        return '\n'.join(
+            f'{stack} {count}' for stack, count in self.stacks.most_common()
+        )
+
+    def get_fields(self, duration):
+        """Оценка времени в каждом поле сериализатора по доле сэмплов."""
+        if not self.samples:
+            return {}
+        return {
+            field: round(duration * count / self.samples, 2)
+            for field, count in self.fields.most_common()
+        }
+
+
+class QueryCollector:
+    """Обёртка для connection.execute_wrapper, собирающая время запросов."""
+    def __init__(self):
+        self.queries = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            query = self.queries[sql]
+            query[0] += 1
+            query[1] += time.perf_counter() - start
+
+    def get_queries(self):
+        """Запросы по убыванию суммарного времени."""
+        return [
+            {'sql': sql, 'count': count, 'time': round(total * 1000, 2)}
+            for sql, (count, total) in sorted(
+                self.queries.items(),
+                key=lambda item: item[1][1],
+                reverse=True,
+            )
+        ]
+
+
+def render_flame_graph(folded_stacks):
+    """Рисует flame graph в SVG по стекам в свёрнутом формате."""
+    root = {'children': {}, 'count': 0}
+    for line in folded_stacks.splitlines():
+        stack, _, count = line.rpartition(' ')
+        count = int(count)
+        root['count'] += count
+        node = root
+        for name in stack.split(';'):
+            node = node['children'].setdefault(
+                name, {'children': {}, 'count': 0},
+            )
+            node['count'] += count
+    if not root['count']:
+        return ''
+    rects = []
+    depth = 0
+
+    def draw(node, x, level):
+        nonlocal depth
+        depth = max(depth, level)
+        for name, child in node['children'].items():
+            width = child['count'] / root['count'] * FLAME_WIDTH
+            rects.append((x, level, width, name, child['count']))
+            draw(child, x, level + 1)
+            x += width
+
+    draw(root, 0, 0)
+    height = (depth + 1) * FLAME_ROW_HEIGHT
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{FLAME_WIDTH}" '
+        f'height="{height}" font-family="monospace" font-size="11">'
+    ]
+    for x, level, width, name, count in rects:
+        y = height - (level + 1) * FLAME_ROW_HEIGHT
+        hue = 10 + hash(name) % 40
+        label = escape(name[:int(width / 7)]) if width > 21 else ''
+        parts.append(
+            f'<g><title>{escape(name)} ({count})</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" '
+            f'height="{FLAME_ROW_HEIGHT - 1}" '
+            f'fill="hsl({hue}, 90%, 60%)"/>'
+            f'<text x="{x + 2:.1f}" y="{y + 12}">{label}</text></g>'
+        )
+    parts.append('</svg>')
+    return ''.join(parts)
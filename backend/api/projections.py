@@ -0,0 +1,124 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+class Projection:
+    """Поля модели и связи, которые читает сериализатор."""
+    def __init__(self):
+        self.only = set()
+        self.select_related = set()
+        self.prefetches = []
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetches:
+            queryset = queryset.prefetch_related(*[
+                Prefetch(
+                    lookup,
+                    queryset=projection.apply(model._default_manager.all()),
+                )
+                for lookup, model, projection in self.prefetches
+            ])
+        return queryset.only(*self.only)
+
+
+def get_model_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def collect_fields(serializer, model, projection, prefix=''):
+    """Собирает поля сериализатора в projection.
+
+    Возвращает False, если сериализатору нужен весь объект или атрибут,
+    который не является полем модели: по такому источнику нельзя понять,
+    какие колонки он читает.
+    """
+    projection.only.add(prefix + model._meta.pk.name)
+    for field in serializer.fields.values():
+        if field.write_only or isinstance(
+            field,
+            serializers.SerializerMethodField,
+        ):
+            continue
+        if field.source == '*':
+            return False
+        current_model = model
+        path = prefix
+        bits = field.source.split('.')
+        for index, bit in enumerate(bits):
+            model_field = get_model_field(current_model, bit)
+            if model_field is None:
+                return False
+            last = index == len(bits) - 1
+            if not model_field.is_relation:
+                projection.only.add(path + bit)
+                break
+            if model_field.many_to_many or model_field.one_to_many:
+                if last and isinstance(field, serializers.ListSerializer):
+                    child = Projection()
+                    if model_field.one_to_many:
+                        child.only.add(model_field.field.attname)
+                    if not collect_fields(
+                        field.child,
+                        model_field.related_model,
+                        child,
+                    ):
+                        return False
+                    projection.prefetches.append(
+                        (path + bit, model_field.related_model, child)
+                    )
+                break
+            if not model_field.concrete:
+                return False
+            projection.only.add(path + bit)
+            if last and not isinstance(field, serializers.BaseSerializer):
+                break
+            projection.select_related.add(path + bit)
+            current_model = model_field.related_model
+            path = f'{path}{bit}__'
+            if last:
+                if not collect_fields(field, current_model, projection, path):
+                    return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def get_projection(model, serializer_class):
+    """Проекция сериализатора или None, если её нельзя построить.
+
+    Колонки FK модели читаются всегда: менеджер связи (author.recipes)
+    проставляет объектам владельца по значению FK, и без колонки каждый
+    объект догружал бы её отдельным запросом.
+    """
+    projection = Projection()
+    if not collect_fields(serializer_class(), model, projection):
+        return None
+    projection.only.update(
+        field.attname
+        for field in model._meta.concrete_fields
+        if field.many_to_one
+    )
+    return projection
+
+
+def project(queryset, serializer_class):
+    """Ограничивает queryset полями, которые выводит сериализатор.
+
+    Поля и связи берутся из объявленных полей сериализатора: колонки
+    идут в only(), вложенные сериализаторы по FK — в select_related(),
+    списки — в prefetch_related() с такой же проекцией. Поля, которые
+    читают SerializerMethodField, не известны заранее: если метод
+    обратится к отложенному полю, Django догрузит его отдельным
+    запросом, поэтому ответ останется верным.
+    """
+    projection = get_projection(queryset.model, serializer_class)
+    if projection is None:
+        return queryset
+    return projection.apply(queryset)
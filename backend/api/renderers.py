@@ -0,0 +1,44 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson с выводом, идентичным JSONRenderer.
+
+    Даты и датаклассы передаются в JSONEncoder из DRF, а всё, что orjson
+    сериализовать не умеет, рендерится стандартным способом.
+    """
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None or data is None or indent is not None
+            or self.ensure_ascii or not self.compact
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context,
+            )
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder.default,
+                option=(
+                    orjson.OPT_PASSTHROUGH_DATETIME
+                    | orjson.OPT_PASSTHROUGH_DATACLASS
+                ),
+            )
+        except TypeError:
+            return super().render(
+                data, accepted_media_type, renderer_context,
+            )
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
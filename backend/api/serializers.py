@@ -1,9 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
-from api.fields import Base64ImageField, Hex2NameColor
+from api.fields import Base64ImageField, Hex2NameColor, validate_image_file
+from api.projections import project
+from api.viewer import ViewerContext
 from foodgram import constants
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                             ShoppingCart, Tag)
@@ -12,6 +15,18 @@ from users.models import Subscriber
 User = get_user_model()
 
 
+class ViewerListSerializer(serializers.ListSerializer):
+    """Список, заранее загружающий связи пользователя для всей страницы."""
+    def to_representation(self, data):
+        instances = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get('request')
+        if request is not None:
+            ViewerContext.for_request(request).prime(
+                **self.child.get_viewer_ids(instances)
+            )
+        return super().to_representation(instances)
+
+
 class UserCreateSerializer(UserCreateSerializer):
     """Сериализатор для создания пользования."""
     class Meta:
@@ -47,12 +62,15 @@ class UserSerializer(UserSerializer):
             'last_name',
             'is_subscribed',
         )
+        list_serializer_class = ViewerListSerializer
+
+    def get_viewer_ids(self, instances):
+        return {'author_ids': [instance.id for instance in instances]}
 
     def get_is_subscribed(self, object):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return user.user_subscribers.filter(author=object).exists()
+        return ViewerContext.for_request(
+            self.context.get('request')
+        ).is_subscribed(object.id)
 
 
 class SubscribeShowSerializer(UserSerializer):
@@ -85,7 +103,7 @@ class SubscribeShowSerializer(UserSerializer):
     def get_recipes(self, object):
         request = self.context.get('request')
         limit = request.GET.get('recipes_limit')
-        recipes = object.recipes.all()
+        recipes = project(object.recipes.all(), RecipeShortSerializer)
         if limit:
             recipes = recipes[:int(limit)]
         serializer = RecipeShortSerializer(
@@ -98,6 +116,12 @@ class SubscribeShowSerializer(UserSerializer):
 
 class SubscribeSerializer(serializers.ModelSerializer):
     """Сериализатор для подписки."""
+    user = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.only('id'),
+    )
+    author = serializers.PrimaryKeyRelatedField(
+        queryset=project(User.objects.all(), SubscribeShowSerializer),
+    )
 
     class Meta:
         model = Subscriber
@@ -216,18 +240,23 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'text',
             'cooking_time',
         )
+        list_serializer_class = ViewerListSerializer
+
+    def get_viewer_ids(self, instances):
+        return {
+            'recipe_ids': [instance.id for instance in instances],
+            'author_ids': {instance.author_id for instance in instances},
+        }
 
     def get_is_favorited(self, object):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return user.favorites.filter(recipe=object).exists()
+        return ViewerContext.for_request(
+            self.context.get('request')
+        ).is_favorited(object.id)
 
     def get_is_in_shopping_cart(self, object):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return user.shopping_carts.filter(recipe=object).exists()
+        return ViewerContext.for_request(
+            self.context.get('request')
+        ).is_in_shopping_cart(object.id)
 
 
 class RecipePostSerializer(serializers.ModelSerializer):
@@ -310,6 +339,7 @@ class RecipePostSerializer(serializers.ModelSerializer):
         ingredient_list.sort(key=lambda x: x.ingredient.name)
         IngredientRecipe.objects.bulk_create(ingredient_list)
 
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get('request')
         tags = validated_data.pop('tags')
@@ -319,6 +349,7 @@ class RecipePostSerializer(serializers.ModelSerializer):
         self.create_ingredients(ingredients, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
@@ -339,6 +370,27 @@ class RecipePostSerializer(serializers.ModelSerializer):
         ).data
 
 
+class RecipeImageSerializer(serializers.ModelSerializer):
+    """Сериализатор для загрузки картинки рецепта через multipart."""
+    image = serializers.ImageField(
+        validators=[validate_image_file],
+    )
+
+    class Meta:
+        model = Recipe
+        fields = (
+            'image',
+        )
+
+    def to_representation(self, instance):
+        return RecipeReadSerializer(
+            instance,
+            context={
+                'request': self.context.get('request')
+            },
+        ).data
+
+
 class RecipeShortSerializer(serializers.ModelSerializer):
     """Сериализатор для кратких рецептов."""
     image = Base64ImageField()
@@ -355,6 +407,12 @@ class RecipeShortSerializer(serializers.ModelSerializer):
 
 class FavoriteAndShoppingCartSerializer(serializers.ModelSerializer):
     """Общий сериализатор для избранного и списка покупок."""
+    user = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.only('id'),
+    )
+    recipe = serializers.PrimaryKeyRelatedField(
+        queryset=project(Recipe.objects.all(), RecipeShortSerializer),
+    )
 
     class Meta:
         fields = (
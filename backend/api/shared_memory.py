@@ -0,0 +1,64 @@
+import fcntl
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+class SharedMemory:
+    """Участок памяти, общий для всех процессов на одном хосте.
+
+    Память отображается из файла в SHARED_MEMORY_DIR (по умолчанию в
+    tmpfs /dev/shm), поэтому воркеры gunicorn видят одни и те же байты
+    без обращений к базе. Изменения защищаются блокировкой fcntl на
+    нужный диапазон байтов, а внутри процесса ещё и обычной блокировкой:
+    блокировки fcntl не различают потоки одного процесса.
+    """
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+        self.pid = None
+
+    @property
+    def path(self):
+        return os.path.join(
+            settings.SHARED_MEMORY_DIR,
+            f'foodgram_{self.name}',
+        )
+
+    def open(self):
+        """Отображает файл один раз на процесс, создавая его при
+        необходимости. Файл другого размера обнуляется."""
+        pid = os.getpid()
+        if self.pid == pid:
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size != self.size:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, self.size)
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN)
+        self.fd = fd
+        self.memory = mmap.mmap(fd, self.size)
+        self.lock = threading.Lock()
+        self.pid = pid
+
+    @contextmanager
+    def locked(self, start=0, length=None):
+        """Блокирует length байтов с позиции start и отдаёт память."""
+        self.open()
+        length = self.size - start if length is None else length
+        with self.lock:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, length, start)
+            try:
+                yield self.memory
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, length, start)
+
+    def clear(self):
+        with self.locked() as memory:
+            memory[:] = bytes(self.size)
@@ -0,0 +1,391 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_tokens
+from api.documents import (INGREDIENTS_NAMESPACE, TAGS_NAMESPACE,
+                           invalidate_all_recipe_documents,
+                           invalidate_recipe_documents)
+from api.events import publish_recipe, publish_subscription
+from api.ingredient_index import invalidate_ingredient_index
+from api.versions import bump_versions
+from api.viewer import invalidate_viewer
+from foodgram import constants
+from jobs.queue import enqueue
+from recipes import changes, feed, similarity
+from recipes.changes import log_changes, mark_touched, touch_recipes_once
+from recipes.images import acquire_image, release_image
+from recipes.models import (ChangeLogEntry, Favorite, Ingredient,
+                            IngredientRecipe, Recipe, ShoppingCart, Tag)
+from recipes.scores import change_score, get_decay_factor
+from recipes.signals import recipes_touched
+from users.models import CREDENTIAL_FIELDS, Subscriber
+from users.signals import credentials_changed
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Сбрасывает кеш токена при выходе пользователя из системы."""
+    invalidate_tokens(instance.key)
+
+
+def invalidate_user_tokens(*user_ids):
+    invalidate_tokens(*Token.objects.filter(
+        user_id__in=user_ids,
+    ).values_list('key', flat=True))
+
+
+@receiver(pre_save, sender=User)
+def remember_user_credentials(sender, instance, update_fields, **kwargs):
+    """Запоминает, меняет ли сохранение пароль или активность.
+
+    Сохранения других полей, например last_login при входе, кеш
+    токенов не трогают и лишнего запроса не делают.
+    """
+    fields = CREDENTIAL_FIELDS - instance.get_deferred_fields()
+    if update_fields is not None:
+        fields &= set(update_fields)
+    instance._credentials_changed = False
+    if instance.pk is None or not fields:
+        return
+    fields = sorted(fields)
+    previous = User.objects.filter(pk=instance.pk).values_list(
+        *fields,
+    ).first()
+    instance._credentials_changed = previous != tuple(
+        getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_changed_user_tokens(sender, instance, created, **kwargs):
+    """Сбрасывает кеш токенов при смене пароля или деактивации."""
+    if not created and getattr(instance, '_credentials_changed', False):
+        invalidate_user_tokens(instance.pk)
+
+
+@receiver(credentials_changed, sender=User)
+def invalidate_updated_user_tokens(sender, user_ids, **kwargs):
+    """То же для массового QuerySet.update()."""
+    invalidate_user_tokens(*user_ids)
+
+
+def invalidate_on_commit(*recipe_ids):
+    transaction.on_commit(
+        lambda: invalidate_recipe_documents(*recipe_ids)
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    """Сбрасывает документ удалённого рецепта."""
+    invalidate_on_commit(instance.pk)
+
+
+@receiver(recipes_touched, sender=Recipe)
+def invalidate_touched_recipes(sender, recipe_ids, **kwargs):
+    """Сбрасывает документы рецептов, отмеченных изменёнными: при
+    сохранении, правке тегов и ингредиентов и QuerySet.update()."""
+    invalidate_on_commit(*recipe_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_catalog(sender, **kwargs):
+    """Сбрасывает документы всех рецептов при правке тегов и ингредиентов."""
+    transaction.on_commit(invalidate_all_recipe_documents)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    """Сбрасывает закешированный список тегов."""
+    transaction.on_commit(lambda: bump_versions(TAGS_NAMESPACE))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    """Сбрасывает закешированный список ингредиентов."""
+    transaction.on_commit(lambda: bump_versions(INGREDIENTS_NAMESPACE))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, instance, created, update_fields,
+                              **kwargs):
+    """Сбрасывает документы рецептов автора при изменении его профиля."""
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    recipe_ids = list(
+        instance.recipes.values_list('id', flat=True)
+    )
+    if recipe_ids:
+        invalidate_on_commit(*recipe_ids)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscriber)
+@receiver(post_delete, sender=Subscriber)
+def invalidate_viewer_relations(sender, instance, **kwargs):
+    """Сбрасывает закешированные избранное, покупки и подписки."""
+    transaction.on_commit(lambda: invalidate_viewer(instance.user_id))
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    """Рассылает новый рецепт по лентам подписчиков автора."""
+    if created:
+        enqueue(
+            feed.fan_out_recipe, instance.pk,
+            dedup_key=f'fan_out_recipe:{instance.pk}',
+        )
+
+
+def sync_author_feed(subscription):
+    """Ставит задачу, сверяющую ленту подписчика с подпиской.
+
+    У подписки и отписки общий ключ: задача сама перечитывает Subscriber.
+    """
+    enqueue(
+        feed.sync_author, subscription.user_id, subscription.author_id,
+        dedup_key=(
+            f'feed_author:{subscription.user_id}:{subscription.author_id}'
+        ),
+    )
+
+
+@receiver(post_save, sender=Subscriber)
+def add_author_to_feed(sender, instance, created, **kwargs):
+    """Добавляет рецепты автора в ленту нового подписчика."""
+    if created:
+        sync_author_feed(instance)
+
+
+@receiver(post_delete, sender=Subscriber)
+def remove_author_from_feed(sender, instance, **kwargs):
+    """Убирает рецепты автора из ленты отписавшегося пользователя."""
+    sync_author_feed(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def publish_new_recipe(sender, instance, created, **kwargs):
+    """Отправляет событие о новом рецепте в поток подписчиков автора."""
+    if created:
+        transaction.on_commit(lambda: publish_recipe(instance))
+
+
+@receiver(post_save, sender=Subscriber)
+def publish_subscribe(sender, instance, created, **kwargs):
+    """Подключает автора к открытым потокам событий подписчика."""
+    if created:
+        transaction.on_commit(lambda: publish_subscription(
+            instance.user_id, instance.author_id, True,
+        ))
+
+
+@receiver(post_delete, sender=Subscriber)
+def publish_unsubscribe(sender, instance, **kwargs):
+    """Отключает автора от открытых потоков событий подписчика."""
+    transaction.on_commit(lambda: publish_subscription(
+        instance.user_id, instance.author_id, False,
+    ))
+
+
+@receiver(post_save, sender=Recipe)
+def index_similar_recipe(sender, instance, **kwargs):
+    """Обновляет индекс похожих рецептов после сохранения рецепта."""
+    similarity.enqueue_index_recipe(instance.pk)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_ingredient_index_on_change(sender, **kwargs):
+    """Помечает индекс ингредиентов устаревшим при изменении тегов.
+
+    Изменения рецептов индекс применяет сам по журналу изменений, а
+    слаг тега хранится во всех его рецептах сразу.
+    """
+    transaction.on_commit(invalidate_ingredient_index)
+
+
+SCORE_WEIGHTS = {
+    Favorite: constants.FAVORITE_SCORE_WEIGHT,
+    ShoppingCart: constants.SHOPPING_CART_SCORE_WEIGHT,
+}
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def increase_recipe_score(sender, instance, created, **kwargs):
+    """Поднимает рейтинг рецепта при добавлении в избранное или покупки."""
+    if created:
+        change_score(instance.recipe_id, SCORE_WEIGHTS[sender])
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def decrease_recipe_score(sender, instance, **kwargs):
+    """Снижает рейтинг рецепта при удалении из избранного или покупок.
+
+    Из рейтинга в трендах вычитается вклад с учётом затухания за время,
+    прошедшее с добавления.
+    """
+    weight = SCORE_WEIGHTS[sender]
+    change_score(
+        instance.recipe_id,
+        -weight,
+        -weight * get_decay_factor(
+            (timezone.now() - instance.created_at).total_seconds()
+        ),
+    )
+
+
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def touch_recipe_ingredient(sender, instance, **kwargs):
+    """Обновляет дату изменения рецепта при правке его ингредиентов."""
+    touch_recipes_once([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_recipe_relations(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Обновляет дату изменения рецептов при правке тегов и ингредиентов."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        touch_recipes_once([instance.pk])
+    elif pk_set:
+        touch_recipes_once(Recipe.objects.filter(
+            pk__in=pk_set,
+        ).values_list('id', flat=True))
+    else:
+        touch_recipes_once(instance.recipes.values_list('id', flat=True))
+
+
+CATALOG_RELATIONS = {
+    Tag: 'tags',
+    Ingredient: 'ingredients',
+}
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def touch_catalog_recipes(sender, instance, created, **kwargs):
+    """Ставит в очередь обновление рецептов с изменённым тегом или
+    ингредиентом: их может быть слишком много для одного запроса."""
+    if not created:
+        relation = CATALOG_RELATIONS[sender]
+        enqueue(
+            changes.touch_related_recipes, relation, instance.pk,
+            dedup_key=f'touch_related_recipes:{relation}:{instance.pk}',
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+def touch_deleted_tag_recipes(sender, instance, **kwargs):
+    """Ставит в очередь обновление рецептов удалённого тега. Рецепты
+    удалённого ингредиента обновит touch_recipe_ingredient."""
+    enqueue(
+        changes.touch_recipes,
+        list(instance.recipes.values_list('id', flat=True)),
+    )
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_recipe_image(sender, instance, **kwargs):
+    """Запоминает текущую картинку рецепта перед сохранением."""
+    instance._previous_image = None
+    if instance.pk:
+        instance._previous_image = Recipe.objects.filter(
+            pk=instance.pk,
+        ).values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=Recipe)
+def count_recipe_image(sender, instance, **kwargs):
+    """Обновляет счётчики ссылок на картинки после сохранения рецепта."""
+    previous = getattr(instance, '_previous_image', None)
+    if instance.image.name != previous:
+        acquire_image(instance.image.name)
+        release_image(previous)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_image(sender, instance, **kwargs):
+    """Освобождает картинку удалённого рецепта."""
+    release_image(instance.image.name)
+
+
+@receiver(post_save, sender=Recipe)
+def touch_saved_recipe(sender, instance, **kwargs):
+    """Отмечает созданный или изменённый рецепт в журнале изменений."""
+    touch_recipes_once([instance.pk])
+
+
+@receiver(pre_delete, sender=Recipe)
+def skip_deleted_recipe_touches(sender, instance, **kwargs):
+    """Не даёт каскадному удалению ингредиентов отметить изменённым
+    рецепт, который удаляется в той же транзакции."""
+    mark_touched([instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def log_deleted_recipe(sender, instance, **kwargs):
+    """Оставляет в журнале изменений запись об удалённом рецепте."""
+    log_changes(ChangeLogEntry.DELETED, [instance.pk])
+
+
+@receiver(post_save, sender=User)
+def log_author_recipes(sender, instance, created, update_fields, **kwargs):
+    """Отмечает рецепты автора изменёнными при правке его профиля."""
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    log_changes(
+        ChangeLogEntry.UPDATED,
+        instance.recipes.values_list('id', flat=True),
+    )
+
+
+RELATION_ACTIONS = {
+    Favorite: (ChangeLogEntry.FAVORITED, ChangeLogEntry.UNFAVORITED),
+    ShoppingCart: (
+        ChangeLogEntry.ADDED_TO_CART,
+        ChangeLogEntry.REMOVED_FROM_CART,
+    ),
+}
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def log_added_relation(sender, instance, created, **kwargs):
+    """Отмечает добавление в избранное или покупки в журнале изменений."""
+    if created:
+        log_changes(
+            RELATION_ACTIONS[sender][0],
+            [instance.recipe_id],
+            instance.user_id,
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def log_removed_relation(sender, instance, **kwargs):
+    """Отмечает удаление из избранного или покупок в журнале изменений."""
+    log_changes(
+        RELATION_ACTIONS[sender][1],
+        [instance.recipe_id],
+        instance.user_id,
+    )
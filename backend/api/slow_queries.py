@@ -0,0 +1,197 @@
+import hashlib
+import math
+import random
+import re
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+from api.models import SlowQuery
+from jobs.queue import enqueue, task
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_RE = re.compile(r'%s|\?')
+IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACE_RE = re.compile(r'\s+')
+FORMAT_RE = re.compile(r'%([%s])')
+# Значения, которые сохраняются для EXPLAIN ANALYZE. Строки и байты
+# не сохраняются: в них бывают токены и пароли.
+SAFE_PARAM_TYPES = (bool, int, float, Decimal, date, type(None))
+ANALYZED_PLAN = '-- EXPLAIN (ANALYZE, BUFFERS) на сохранённых значениях'
+GENERIC_PLAN = (
+    '-- Общий план без значений параметров: реальные число строк, '
+    'время и чтения буферов в нём не видны'
+)
+
+
+def normalize_sql(sql):
+    """Заменяет значения в запросе на ?, списки IN — на (...)."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = PLACEHOLDER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('(...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def get_fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def number_placeholders(sql):
+    """Заменяет %s на $1, $2... для PREPARE и возвращает их число."""
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        if match.group(1) == '%':
+            return '%'
+        count += 1
+        return f'${count}'
+
+    return FORMAT_RE.sub(replace, sql), count
+
+
+def get_sql_params(params):
+    """Значения параметров для EXPLAIN ANALYZE или None, если среди них
+    есть небезопасные для хранения."""
+    if params is None:
+        return []
+    if isinstance(params, dict) or not all(
+        isinstance(value, SAFE_PARAM_TYPES)
+        and not (isinstance(value, float) and not math.isfinite(value))
+        for value in params
+    ):
+        return None
+    return list(params)
+
+
+def explain_analyzed(cursor, sql, params):
+    cursor.execute(
+        'SET LOCAL statement_timeout = '
+        f'{int(settings.SLOW_QUERY_LOG["EXPLAIN_TIMEOUT"])}'
+    )
+    cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+    return [ANALYZED_PLAN, *(row[0] for row in cursor.fetchall())]
+
+
+def explain_generic(cursor, sql):
+    if connection.vendor != 'postgresql':
+        cursor.execute(
+            f'{connection.ops.explain_query_prefix()} {sql}',
+            [None] * sql.count('%s'),
+        )
+        return [GENERIC_PLAN, *(
+            ' '.join(str(value) for value in row)
+            for row in cursor.fetchall()
+        )]
+    sql, count = number_placeholders(sql)
+    cursor.execute('SET LOCAL plan_cache_mode = force_generic_plan')
+    cursor.execute(f'PREPARE slow_query AS {sql}')
+    try:
+        cursor.execute(
+            'EXPLAIN EXECUTE slow_query'
+            + (f'({", ".join(["NULL"] * count)})' if count else '')
+        )
+        return [GENERIC_PLAN, *(row[0] for row in cursor.fetchall())]
+    finally:
+        cursor.execute('DEALLOCATE slow_query')
+
+
+def explain(sql, params=None):
+    """Возвращает план выполнения запроса.
+
+    Если значения параметров сохранены, в Postgres запрос выполняется
+    через EXPLAIN (ANALYZE, BUFFERS) с таймаутом
+    SLOW_QUERY_LOG['EXPLAIN_TIMEOUT'] мс, и план показывает реальные
+    число строк и чтения буферов. Иначе, как и при ошибке, запрос
+    готовится через PREPARE и объясняется общий план, не зависящий от
+    значений: по нему не видно, как запрос ведёт себя на конкретных
+    данных. Первая строка плана говорит, какой из двух он. Транзакция
+    всегда откатывается.
+    """
+    analyze = params is not None and connection.vendor == 'postgresql'
+    for analyzed in (True, False) if analyze else (False,):
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                if analyzed:
+                    plan = explain_analyzed(cursor, sql, params)
+                else:
+                    plan = explain_generic(cursor, sql)
+                transaction.set_rollback(True)
+        except DatabaseError:
+            continue
+        return '\n'.join(plan)
+    return ''
+
+
+@task(max_attempts=1)
+def explain_slow_query(slow_query_id):
+    """Записывает план выполнения медленного запроса."""
+    row = SlowQuery.objects.filter(id=slow_query_id).values_list(
+        'sql',
+        'sql_params',
+    ).first()
+    if row is not None:
+        SlowQuery.objects.filter(id=slow_query_id).update(plan=explain(*row))
+
+
+class SlowQueryLogger:
+    """Обёртка для connection.execute_wrapper, запоминающая медленные
+    запросы в рамках одного HTTP-запроса."""
+    def __init__(self, request):
+        self.request = request
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            if duration >= settings.SLOW_QUERY_LOG['THRESHOLD']:
+                self.queries.append((sql, params, many, duration))
+
+    def get_view_name(self):
+        match = self.request.resolver_match
+        return match._func_path if match else ''
+
+    def save(self):
+        """Сохраняет медленные запросы и ставит в очередь построение
+        планов для части из них.
+
+        Запрос сохраняется с плейсхолдерами: значения параметров могут
+        содержать токены и пароли. Для запросов, у которых будет
+        строиться план, сохраняются значения, если среди них только
+        числа, даты и NULL.
+        """
+        if not self.queries:
+            return
+        rate = settings.SLOW_QUERY_LOG['EXPLAIN_SAMPLE_RATE']
+        view = self.get_view_name()
+        params = dict(self.request.GET.lists())
+        slow_queries = []
+        explained = []
+        for sql, sql_params, many, duration in self.queries:
+            normalized_sql = normalize_sql(sql)
+            slow_query = SlowQuery(
+                fingerprint=get_fingerprint(normalized_sql),
+                normalized_sql=normalized_sql,
+                sql=sql,
+                duration=duration,
+                view=view,
+                params=params,
+            )
+            slow_queries.append(slow_query)
+            if (
+                not many and rate and random.randrange(rate) == 0
+                and sql.lstrip()[:6].upper() == 'SELECT'
+            ):
+                slow_query.sql_params = get_sql_params(sql_params)
+                explained.append(slow_query)
+        SlowQuery.objects.bulk_create(slow_queries)
+        for slow_query in explained:
+            enqueue(explain_slow_query, slow_query.id)
@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+
+User = get_user_model()
+
+
+def create_image(color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (4, 4), color).save(buffer, 'PNG')
+    return SimpleUploadedFile('image.png', buffer.getvalue(), 'image/png')
+
+
+class APITestCase(TestCase):
+    """Базовый класс тестов API с каталогом, пользователями и рецептами.
+
+    Картинки пишутся во временный MEDIA_ROOT, а кеш очищается перед
+    каждым тестом: после отката транзакции id объектов повторяются.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = [
+            Tag.objects.create(name=f'Тег {i}', color='#ff0000', slug=f't{i}')
+            for i in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {i}',
+                measurement_unit='г',
+            )
+            for i in range(4)
+        ]
+        cls.author = cls.create_user('author')
+        cls.reader = cls.create_user('reader')
+        cls.recipes = [
+            cls.create_recipe(cls.author, f'Рецепт {i}', [i % 3], [i % 4, 3])
+            for i in range(4)
+        ]
+        # Данные класса считаются закоммиченными: иначе их отметки
+        # TouchedRecipes скрывали бы изменения рецептов во всех тестах.
+        connection.run_on_commit = []
+
+    @classmethod
+    def create_user(cls, username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=username,
+            last_name=username,
+            password='Sup3rPass!word',
+        )
+
+    @classmethod
+    def create_recipe(cls, author, name, tags, ingredients):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=name,
+            text='Описание',
+            cooking_time=10,
+            image=create_image(),
+        )
+        recipe.tags.set([cls.tags[index] for index in tags])
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe,
+                ingredient=cls.ingredients[index],
+                amount=index + 1,
+            )
+            for index in ingredients
+        )
+        return recipe
+
+    def setUp(self):
+        cache.clear()
+        self.anonymous = APIClient()
+
+    def get_client(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
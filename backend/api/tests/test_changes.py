@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.db import transaction
+
+from api.tests.base import APITestCase
+from recipes.changes import touch_recipes_once
+from recipes.models import ChangeLogEntry
+
+
+class ChangeLogTests(APITestCase):
+    def get_actions(self, recipe):
+        return list(ChangeLogEntry.objects.filter(
+            recipe_id=recipe.id,
+        ).order_by('id').values_list('action', flat=True))
+
+    def test_update_is_logged_once(self):
+        recipe = self.recipes[0]
+        ChangeLogEntry.objects.all().delete()
+        with mock.patch(
+            'api.signals.invalidate_recipe_documents',
+        ) as invalidate, self.captureOnCommitCallbacks(execute=True):
+            response = self.get_client(self.author).patch(
+                f'/api/recipes/{recipe.id}/',
+                {
+                    'tags': [self.tags[1].id, self.tags[2].id],
+                    'ingredients': [
+                        {'id': self.ingredients[1].id, 'amount': 7},
+                        {'id': self.ingredients[2].id, 'amount': 8},
+                    ],
+                    'name': 'Новое название',
+                    'text': 'Новое описание',
+                    'cooking_time': 5,
+                },
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.get_actions(recipe), [ChangeLogEntry.UPDATED])
+        self.assertEqual(invalidate.call_args_list, [mock.call(recipe.id)])
+
+    def test_delete_is_not_logged_as_update(self):
+        recipe = self.recipes[0]
+        ChangeLogEntry.objects.all().delete()
+        response = self.get_client(self.author).delete(
+            f'/api/recipes/{recipe.id}/',
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_actions(recipe), [ChangeLogEntry.DELETED])
+
+    def test_rolled_back_touch_is_repeated(self):
+        recipe = self.recipes[0]
+        ChangeLogEntry.objects.all().delete()
+        with transaction.atomic():
+            with transaction.atomic():
+                touch_recipes_once([recipe.id])
+                transaction.set_rollback(True)
+            touch_recipes_once([recipe.id])
+            touch_recipes_once([recipe.id])
+        self.assertEqual(self.get_actions(recipe), [ChangeLogEntry.UPDATED])
@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api.documents import get_document_queryset
+from api.fast_serializers import RecipeFastSerializer, build_recipe_document
+from api.renderers import FastJSONRenderer
+from api.serializers import RecipeReadSerializer
+from api.tests.base import APITestCase
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscriber
+
+
+class RecipeFastSerializerTests(APITestCase):
+    """Быстрый сериализатор совпадает с RecipeReadSerializer до байта."""
+    def render(self, user):
+        request = RequestFactory().get('/api/recipes/')
+        request.user = user
+        recipes = list(get_document_queryset())
+        default = JSONRenderer().render(
+            RecipeReadSerializer(
+                recipes,
+                many=True,
+                context={'request': request},
+            ).data
+        )
+        request = RequestFactory().get('/api/recipes/')
+        request.user = user
+        fast = FastJSONRenderer().render(
+            RecipeFastSerializer(
+                [build_recipe_document(recipe) for recipe in recipes],
+                many=True,
+                context={'request': request},
+            ).data
+        )
+        return default, fast
+
+    def test_anonymous(self):
+        default, fast = self.render(AnonymousUser())
+        self.assertEqual(fast, default)
+
+    def test_viewer_flags(self):
+        Favorite.objects.create(user=self.reader, recipe=self.recipes[0])
+        ShoppingCart.objects.create(user=self.reader, recipe=self.recipes[1])
+        Subscriber.objects.create(user=self.reader, author=self.author)
+        default, fast = self.render(self.reader)
+        self.assertIn(b'"is_favorited":true', fast)
+        self.assertEqual(fast, default)
+
+    def test_detail_matches_read_serializer(self):
+        recipe = self.recipes[0]
+        Favorite.objects.create(user=self.reader, recipe=recipe)
+        response = self.get_client(self.reader).get(
+            f'/api/recipes/{recipe.id}/'
+        )
+        self.assertEqual(response.status_code, 200)
+        request = RequestFactory().get(f'/api/recipes/{recipe.id}/')
+        request.user = self.reader
+        expected = JSONRenderer().render(
+            RecipeReadSerializer(
+                get_document_queryset().get(id=recipe.id),
+                context={'request': request},
+            ).data
+        )
+        self.assertEqual(response.content, expected)
+
+    def test_detail_of_deleted_recipe(self):
+        recipe = self.recipes[0]
+        with mock.patch('api.views.get_recipe_documents', return_value=[]):
+            response = self.anonymous.get(f'/api/recipes/{recipe.id}/')
+        self.assertEqual(response.status_code, 404)
+        response = self.anonymous.get('/api/recipes/abc/')
+        self.assertEqual(response.status_code, 404)
+
+
+class RecipeWriteTests(APITestCase):
+    def test_update_uses_write_serializer(self):
+        recipe = self.recipes[0]
+        response = self.get_client(self.author).patch(
+            f'/api/recipes/{recipe.id}/',
+            {
+                'tags': [self.tags[2].id],
+                'ingredients': [{'id': self.ingredients[1].id, 'amount': 7}],
+                'name': 'Новое название',
+                'text': 'Новое описание',
+                'cooking_time': 5,
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        recipe = Recipe.objects.get(id=recipe.id)
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(
+            list(recipe.ingredient_recipes.values_list('amount', flat=True)),
+            [7],
+        )
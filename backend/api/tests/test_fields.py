@@ -0,0 +1,47 @@
+import base64
+from unittest import mock
+
+from rest_framework import serializers
+
+from api.fields import Base64ImageField
+from api.tests.base import APITestCase, create_image
+
+
+class Base64ImageFieldTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = create_image().read()
+        self.encoded = base64.b64encode(self.content).decode()
+
+    def decode(self, payload):
+        return Base64ImageField().decode(f'data:image/png;base64,{payload}')
+
+    @mock.patch('foodgram.constants.BASE64_DECODE_CHUNK_SIZE', 10)
+    def test_whitespace_does_not_break_chunks(self):
+        payload = '\n'.join(
+            self.encoded[start:start + 7]
+            for start in range(0, len(self.encoded), 7)
+        )
+        file = self.decode(f' {payload}\r\n')
+        self.assertEqual(file.read(), self.content)
+        file.close()
+
+    def test_invalid_base64(self):
+        for payload in (self.encoded[:-1], self.encoded + '!', ''):
+            with self.subTest(payload=payload[-3:]):
+                with self.assertRaises(serializers.ValidationError):
+                    self.decode(payload)
+        with self.assertRaises(serializers.ValidationError):
+            Base64ImageField().decode('data:image/png,' + self.encoded)
+
+    def test_invalid_image_closes_file(self):
+        files = []
+
+        def validate(file):
+            files.append(file)
+            raise serializers.ValidationError('Файл не является картинкой!')
+
+        with mock.patch('api.fields.validate_image_file', validate):
+            with self.assertRaises(serializers.ValidationError):
+                self.decode(self.encoded)
+        self.assertTrue(files[0].closed)
@@ -0,0 +1,44 @@
+from api.tests.base import APITestCase
+
+
+class SparseFieldsTests(APITestCase):
+    def test_fields(self):
+        response = self.anonymous.get(
+            '/api/recipes/',
+            {'fields': 'name,cooking_time'},
+        )
+        self.assertEqual(response.status_code, 200)
+        for recipe in response.json()['results']:
+            self.assertEqual(list(recipe), ['id', 'name', 'cooking_time'])
+
+    def test_omit_and_view(self):
+        recipe = self.recipes[0]
+        response = self.anonymous.get(
+            f'/api/recipes/{recipe.id}/',
+            {'view': 'card', 'omit': 'tags'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()), [
+            'id',
+            'author',
+            'is_favorited',
+            'is_in_shopping_cart',
+            'name',
+            'image',
+            'cooking_time',
+        ])
+
+    def test_unknown_field(self):
+        response = self.anonymous.get('/api/recipes/', {'fields': 'secret'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_users(self):
+        response = self.anonymous.get(
+            f'/api/users/{self.author.id}/',
+            {'fields': 'username'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'id': self.author.id,
+            'username': self.author.username,
+        })
@@ -0,0 +1,53 @@
+from django.test import override_settings
+
+from api.ingredient_index import IngredientIndex
+from api.tests.base import APITestCase
+from recipes.models import IngredientRecipe, Recipe
+
+
+@override_settings(INGREDIENT_INDEX_POLL_INTERVAL=0)
+class IngredientIndexTests(APITestCase):
+    def test_search_orders_by_matched_and_missing(self):
+        index = IngredientIndex()
+        self.assertEqual(
+            index.search([self.ingredients[0].id, self.ingredients[1].id]),
+            [(self.recipes[1].id, 1, 1), (self.recipes[0].id, 1, 1)],
+        )
+        self.assertEqual(
+            index.search(
+                [self.ingredients[1].id, self.ingredients[3].id],
+                tags=['t1'],
+            ),
+            [(self.recipes[1].id, 2, 0)],
+        )
+        self.assertEqual(
+            index.search([self.ingredients[0].id], tags=['t2']),
+            [],
+        )
+
+    def test_changes_are_patched(self):
+        index = IngredientIndex()
+        index.search([self.ingredients[2].id])
+        recipe = Recipe.objects.create(
+            id=2 ** 32 + 1,
+            author=self.author,
+            name='Большой id',
+            text='Описание',
+            cooking_time=1,
+            image=self.recipes[0].image.name,
+        )
+        IngredientRecipe.objects.create(
+            recipe=recipe,
+            ingredient=self.ingredients[2],
+            amount=1,
+        )
+        recipe.save()
+        self.assertIn(
+            (recipe.id, 1, 0),
+            index.search([self.ingredients[2].id]),
+        )
+        recipe.delete()
+        self.assertNotIn(
+            recipe.id,
+            [result[0] for result in index.search([self.ingredients[2].id])],
+        )
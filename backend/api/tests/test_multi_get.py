@@ -0,0 +1,39 @@
+from api.tests.base import APITestCase
+from foodgram import constants
+
+
+class RecipeMultiGetTests(APITestCase):
+    def test_returns_recipes_in_requested_order(self):
+        ids = [self.recipes[2].id, self.recipes[0].id, self.recipes[2].id]
+        response = self.anonymous.get(
+            '/api/recipes/',
+            {'ids': ','.join(map(str, ids + [10 ** 6]))},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()],
+            [self.recipes[2].id, self.recipes[0].id],
+        )
+
+    def test_rejects_bad_ids(self):
+        response = self.anonymous.get('/api/recipes/', {'ids': '1,a'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_too_many_ids(self):
+        response = self.anonymous.get('/api/recipes/', {
+            'ids': ','.join(
+                map(str, range(1, constants.MAX_MULTI_GET_IDS + 2))
+            ),
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_users(self):
+        response = self.anonymous.get(
+            '/api/users/',
+            {'ids': f'{self.reader.id},{self.author.id}'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [user['id'] for user in response.json()],
+            [self.reader.id, self.author.id],
+        )
@@ -0,0 +1,55 @@
+import json
+from base64 import urlsafe_b64encode
+
+from api.tests.base import APITestCase
+from recipes.models import Recipe
+
+
+def encode(value):
+    return urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+class ScoreKeysetPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for score, recipe in enumerate(self.recipes):
+            Recipe.objects.filter(id=recipe.id).update(popularity=score)
+
+    def get_page(self, **params):
+        response = self.anonymous.get(
+            '/api/recipes/',
+            {'ordering': 'popular', 'limit': 2, **params},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_follow_cursor(self):
+        page = self.get_page()
+        self.assertEqual(list(page), ['count', 'next', 'previous', 'results'])
+        self.assertIsNone(page['count'])
+        self.assertIsNone(page['previous'])
+        self.assertEqual(
+            [recipe['id'] for recipe in page['results']],
+            [self.recipes[3].id, self.recipes[2].id],
+        )
+        page = self.anonymous.get(page['next']).json()
+        self.assertEqual(
+            [recipe['id'] for recipe in page['results']],
+            [self.recipes[1].id, self.recipes[0].id],
+        )
+
+    def test_invalid_cursor_returns_first_page(self):
+        first = self.get_page()['results']
+        for cursor in (
+            'bad',
+            encode([1, 2, 3]),
+            encode(['1', self.recipes[0].id]),
+            encode([1, str(self.recipes[0].id)]),
+            encode([1, 1.5]),
+            encode([True, self.recipes[0].id]),
+            encode({'score': 1}),
+            encode([float('nan'), self.recipes[0].id]),
+        ):
+            with self.subTest(cursor=cursor):
+                page = self.get_page(cursor=cursor)
+                self.assertEqual(page['results'], first)
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.projections import get_projection, project
+from api.serializers import (IngredientSerializer, RecipeReadSerializer,
+                             RecipeShortSerializer, SubscribeShowSerializer,
+                             TagSerializer, UserSerializer)
+from api.tests.base import APITestCase
+from recipes.models import Ingredient, Recipe, Tag
+
+User = get_user_model()
+
+PROJECTED_SERIALIZERS = (
+    (Recipe, RecipeReadSerializer),
+    (Recipe, RecipeShortSerializer),
+    (User, UserSerializer),
+    (User, SubscribeShowSerializer),
+    (Tag, TagSerializer),
+    (Ingredient, IngredientSerializer),
+)
+
+
+class ProjectionTests(APITestCase):
+    """Сериализатор не читает колонок, которых нет в его проекции.
+
+    Отложенное поле Django догружает через refresh_from_db(), поэтому
+    тест падает, если в сериализатор добавили поле, а проекция его не
+    выбирает.
+    """
+    def get_context(self):
+        request = Request(APIRequestFactory().get('/'))
+        request.user = self.reader
+        return {'request': request}
+
+    def serialize(self, queryset, serializer_class):
+        with mock.patch(
+            'django.db.models.Model.refresh_from_db',
+            side_effect=AssertionError('Поле не попало в проекцию'),
+        ):
+            return serializer_class(
+                queryset,
+                many=True,
+                context=self.get_context(),
+            ).data
+
+    def test_serializers_read_only_projected_fields(self):
+        for model, serializer_class in PROJECTED_SERIALIZERS:
+            with self.subTest(serializer=serializer_class.__name__):
+                self.assertIsNotNone(get_projection(model, serializer_class))
+                self.assertEqual(
+                    self.serialize(
+                        project(model.objects.all(), serializer_class),
+                        serializer_class,
+                    ),
+                    self.serialize(model.objects.all(), serializer_class),
+                )
+
+    def test_related_manager_keeps_foreign_key(self):
+        with self.assertNumQueries(1):
+            self.serialize(
+                project(self.author.recipes.all(), RecipeShortSerializer),
+                RecipeShortSerializer,
+            )
@@ -0,0 +1,22 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+
+from api.slow_queries import GENERIC_PLAN, explain, get_sql_params
+
+
+class SqlParamsTests(SimpleTestCase):
+    def test_only_safe_values_are_kept(self):
+        values = (1, 2.5, Decimal('1.5'), None, True, date(2020, 1, 1))
+        self.assertEqual(get_sql_params(values), list(values))
+        self.assertEqual(get_sql_params(None), [])
+        for params in (('token',), (b'x',), (1, float('nan')), {'a': 1}):
+            with self.subTest(params=params):
+                self.assertIsNone(get_sql_params(params))
+
+
+class ExplainTests(TestCase):
+    def test_plan_states_its_kind(self):
+        plan = explain('SELECT id FROM recipes_recipe WHERE id = %s', [1])
+        self.assertEqual(plan.splitlines()[0], GENERIC_PLAN)
@@ -0,0 +1,86 @@
+import time
+
+from django.test import override_settings
+
+from api.tests.base import APITestCase
+from api.throttling import buckets, load, record_latency, take_tokens
+
+
+@override_settings(THROTTLE_BUCKET_CAPACITY=9, THROTTLE_BUCKET_RATE=0.001)
+class CostWeightedThrottleTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        buckets.clear()
+        load.clear()
+
+    def get_cook(self, client):
+        return client.get(
+            '/api/recipes/cook/',
+            {'ingredients': self.ingredients[0].id},
+        )
+
+    def test_request_cost_is_taken_from_bucket(self):
+        for _ in range(3):
+            self.assertEqual(self.get_cook(self.anonymous).status_code, 200)
+        response = self.get_cook(self.anonymous)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_buckets_are_per_client(self):
+        for _ in range(9):
+            self.anonymous.get('/api/tags/')
+        self.assertEqual(self.anonymous.get('/api/tags/').status_code, 429)
+        reader = self.get_client(self.reader)
+        self.assertEqual(reader.get('/api/tags/').status_code, 200)
+        other = self.client_class(HTTP_X_FORWARDED_FOR='10.0.0.2')
+        self.assertEqual(other.get('/api/tags/').status_code, 200)
+
+    @override_settings(THROTTLE_BUCKET_RATE=10 ** 6)
+    def test_bucket_refills(self):
+        for _ in range(20):
+            self.assertEqual(self.anonymous.get('/api/tags/').status_code, 200)
+
+    def test_full_table_evicts_buckets(self):
+        for number in range(buckets.size // 24 * 2):
+            self.assertTrue(take_tokens(f'ip:{number}', 1, 9, 0.001)[0])
+
+
+@override_settings(LOAD_SHEDDING={
+    'MAX_QUEUE_TIME': 1,
+    'MAX_LATENCY': 2,
+    'LATENCY_SMOOTHING': 1,
+    'RETRY_AFTER': 5,
+})
+class LoadSheddingThrottleTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        buckets.clear()
+        load.clear()
+
+    def get(self, url, queue_time=0):
+        return self.anonymous.get(
+            url,
+            HTTP_X_REQUEST_START=f't={time.time() - queue_time:.3f}',
+        )
+
+    def test_expensive_requests_are_shed_first(self):
+        cook = f'/api/recipes/cook/?ingredients={self.ingredients[0].id}'
+        self.assertEqual(self.get(cook, 0.3).status_code, 200)
+        response = self.get(cook, 0.7)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '4')
+        self.assertEqual(self.get('/api/tags/', 0.7).status_code, 200)
+        self.assertEqual(self.get('/api/tags/', 1.5).status_code, 503)
+
+    def test_latency(self):
+        record_latency(3)
+        self.assertEqual(self.anonymous.get('/api/tags/').status_code, 503)
+        self.assertEqual(self.anonymous.get('/api/tags/').status_code, 200)
+
+    def test_shed_request_keeps_tokens(self):
+        with override_settings(
+            THROTTLE_BUCKET_CAPACITY=1,
+            THROTTLE_BUCKET_RATE=0.001,
+        ):
+            self.assertEqual(self.get('/api/tags/', 2).status_code, 503)
+            self.assertEqual(self.get('/api/tags/').status_code, 200)
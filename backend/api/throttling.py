@@ -0,0 +1,170 @@
+import hashlib
+import math
+import struct
+import time
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+from api.shared_memory import SharedMemory
+
+BUCKET = struct.Struct('<Qdd')
+BUCKET_PROBES = 16
+LOAD = struct.Struct('<d')
+REQUEST_START_HEADER = 'HTTP_X_REQUEST_START'
+
+buckets = SharedMemory(
+    'throttle',
+    BUCKET.size * max(settings.THROTTLE_BUCKET_SLOTS, BUCKET_PROBES),
+)
+load = SharedMemory('load', LOAD.size)
+
+
+def get_bucket_key(ident):
+    """Ненулевой 64-битный ключ бакета: ноль означает пустой слот."""
+    return int.from_bytes(
+        hashlib.blake2b(ident.encode(), digest_size=8).digest(),
+        'big',
+    ) or 1
+
+
+def take_tokens(ident, cost, capacity, rate):
+    """Списывает cost токенов из бакета в разделяемой памяти.
+
+    Бакет ищется среди BUCKET_PROBES слотов подряд от позиции по хешу
+    клиента. Полностью пополнившийся бакет ничем не отличается от
+    нового, поэтому его слот занимается под другого клиента, а если
+    свободных нет, вытесняется бакет, который дольше всех не менялся.
+    Пополнение и списание идут под блокировкой этих слотов. Возвращает
+    пару: хватило ли токенов и сколько их осталось.
+    """
+    key = get_bucket_key(ident)
+    slots = buckets.size // BUCKET.size
+    start = key % (slots - BUCKET_PROBES + 1) * BUCKET.size
+    end = start + BUCKET.size * BUCKET_PROBES
+    now = time.time()
+    with buckets.locked(start, end - start) as memory:
+        found, free, oldest = None, None, None
+        tokens = capacity
+        for offset in range(start, end, BUCKET.size):
+            slot_key, slot_tokens, updated_at = BUCKET.unpack_from(
+                memory, offset,
+            )
+            slot_tokens = min(
+                capacity,
+                slot_tokens + (now - updated_at) * rate,
+            )
+            if slot_key == key:
+                found, tokens = offset, slot_tokens
+                break
+            if free is None and slot_tokens >= capacity:
+                free = offset
+            if oldest is None or updated_at < oldest[1]:
+                oldest = offset, updated_at
+        if found is None:
+            found = free if free is not None else oldest[0]
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        BUCKET.pack_into(memory, found, key, tokens, now)
+    return allowed, tokens
+
+
+def get_latency():
+    """Сглаженное время ответа воркеров хоста, в секундах."""
+    with load.locked() as memory:
+        return LOAD.unpack_from(memory)[0]
+
+
+def record_latency(duration):
+    with load.locked() as memory:
+        latency, = LOAD.unpack_from(memory)
+        LOAD.pack_into(memory, 0, latency + (duration - latency) * (
+            settings.LOAD_SHEDDING['LATENCY_SMOOTHING']
+        ))
+
+
+def get_queue_time(request):
+    """Сколько запрос ждал свободного воркера после прихода в nginx.
+
+    nginx передаёт время приёма запроса в X-Request-Start в виде
+    t=<секунды>; без заголовка очередь считается пустой.
+    """
+    value = request.META.get(REQUEST_START_HEADER, '')
+    try:
+        started_at = float(value[2:] if value.startswith('t=') else value)
+    except ValueError:
+        return 0
+    return max(0, time.time() - started_at)
+
+
+def get_cost(request, view):
+    """Стоимость запроса в токенах по действию вьюсета: из
+    throttle_costs или метода get_throttle_cost."""
+    if hasattr(view, 'get_throttle_cost'):
+        return view.get_throttle_cost(request)
+    costs = getattr(view, 'throttle_costs', {})
+    return costs.get(getattr(view, 'action', None), 1)
+
+
+class Overloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервер перегружен, повторите запрос позже.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+class LoadSheddingThrottle(BaseThrottle):
+    """Отклоняет запросы с 503 и Retry-After, когда сервер не успевает.
+
+    Нагрузка — наибольшее из отношений времени ожидания в очереди к
+    LOAD_SHEDDING['MAX_QUEUE_TIME'] и сглаженного времени ответа к
+    LOAD_SHEDDING['MAX_LATENCY']. Запрос стоимостью cost отклоняется,
+    когда нагрузка достигает 1 / √cost: первыми отбрасываются дорогие
+    запросы, дешёвые чтения — только при полной перегрузке. Класс должен
+    стоять первым в DEFAULT_THROTTLE_CLASSES, чтобы отклонённый запрос
+    не тратил токены клиента.
+    """
+    def allow_request(self, request, view):
+        options = settings.LOAD_SHEDDING
+        pressure = max(
+            get_queue_time(request) / options['MAX_QUEUE_TIME'],
+            get_latency() / options['MAX_LATENCY'],
+        )
+        if pressure * math.sqrt(max(get_cost(request, view), 1)) < 1:
+            return True
+        raise Overloaded(math.ceil(options['RETRY_AFTER'] * pressure))
+
+
+class CostWeightedThrottle(BaseThrottle):
+    """Троттлинг по токен-бакету с учётом стоимости запроса.
+
+    У каждого пользователя (или IP для анонимов) есть бакет на
+    THROTTLE_BUCKET_CAPACITY токенов, который пополняется со скоростью
+    THROTTLE_BUCKET_RATE токенов в секунду. Запрос списывает столько
+    токенов, сколько стоит действие вьюсета. Бакеты лежат в разделяемой
+    памяти, поэтому лимит общий для воркеров хоста и не стоит запроса к
+    базе; при нескольких хостах у каждого свои бакеты.
+    """
+    def get_ident(self, request):
+        if request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{super().get_ident(request)}'
+
+    def allow_request(self, request, view):
+        rate = settings.THROTTLE_BUCKET_RATE
+        capacity = settings.THROTTLE_BUCKET_CAPACITY
+        cost = min(get_cost(request, view), capacity)
+        allowed, tokens = take_tokens(
+            self.get_ident(request), cost, capacity, rate,
+        )
+        self.wait_time = max(0, cost - tokens) / rate
+        return allowed
+
+    def wait(self):
+        return self.wait_time
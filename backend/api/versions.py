@@ -0,0 +1,58 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from foodgram.cache import publish_invalidation
+
+VERSION_KEY = 'version:{namespace}'
+
+
+def new_version():
+    return uuid4().hex
+
+
+def get_version_keys(namespaces):
+    return {
+        namespace: VERSION_KEY.format(namespace=namespace)
+        for namespace in namespaces
+    }
+
+
+def get_versions(namespaces):
+    """Возвращает версии пространств имён, заводя новые для отсутствующих.
+
+    Потерянная версия не обнуляется, а заменяется новой, поэтому
+    вытесненный из кеша ключ не воскрешает устаревшие данные.
+    """
+    keys = get_version_keys(namespaces)
+    versions = cache.get_many(keys.values())
+    missing = {
+        key: new_version() for key in keys.values() if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return {namespace: versions[key] for namespace, key in keys.items()}
+
+
+def bump_versions(*namespaces):
+    """Назначает пространствам имён новые версии, делая старые данные
+    недоступными во всех процессах."""
+    keys = list(get_version_keys(namespaces).values())
+    cache.set_many({key: new_version() for key in keys}, None)
+    publish_invalidation(keys)
+
+
+def get_or_build(namespace, build, timeout=None):
+    """Возвращает данные пространства имён из кеша или собирает их.
+
+    Данные лежат под ключом с текущей версией, поэтому bump_versions
+    сбрасывает их без удаления.
+    """
+    version = get_versions([namespace])[namespace]
+    key = f'{namespace}:{version}'
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout)
+    return data
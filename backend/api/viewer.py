@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from api.versions import bump_versions, get_versions
+
+VIEWER_KEY = 'viewer:{user_id}:{relation}:{version}'
+VIEWER_NAMESPACE = 'user:{user_id}'
+PARTIAL = 'partial'
+
+
+def invalidate_viewer(*user_ids):
+    """Сбрасывает закешированные связи пользователей."""
+    bump_versions(*[
+        VIEWER_NAMESPACE.format(user_id=user_id) for user_id in user_ids
+    ])
+
+
+class ViewerContext:
+    """Избранное, список покупок и подписки пользователя за один запрос.
+
+    Множества загружаются целиком один раз на запрос и, если включено,
+    кешируются между запросами. Слишком большие множества не грузятся:
+    вместо этого проверяются только id, переданные в prime().
+    """
+    RELATIONS = {
+        'favorites': ('favorites', 'recipe_id'),
+        'shopping_carts': ('shopping_carts', 'recipe_id'),
+        'subscriptions': ('user_subscribers', 'author_id'),
+    }
+
+    def __init__(self, user):
+        self.user = user
+        self.complete = {}
+        self.checked = {}
+        self.found = {}
+        self.version = None
+
+    @classmethod
+    def for_request(cls, request):
+        """Возвращает контекст, общий для всех сериализаторов запроса."""
+        context = getattr(request, '_viewer_context', None)
+        if context is None or context.user != request.user:
+            context = cls(request.user)
+            request._viewer_context = context
+        return context
+
+    def prime(self, recipe_ids=(), author_ids=()):
+        """Загружает связи для объектов страницы одним запросом на связь."""
+        if self.user.is_anonymous:
+            return
+        self.load('favorites', recipe_ids)
+        self.load('shopping_carts', recipe_ids)
+        self.load('subscriptions', author_ids)
+
+    def is_favorited(self, recipe_id):
+        return self.contains('favorites', recipe_id)
+
+    def is_in_shopping_cart(self, recipe_id):
+        return self.contains('shopping_carts', recipe_id)
+
+    def is_subscribed(self, author_id):
+        return self.contains('subscriptions', author_id)
+
+    def contains(self, relation, object_id):
+        if self.user.is_anonymous:
+            return False
+        self.load(relation, (object_id,))
+        if relation in self.complete:
+            return object_id in self.complete[relation]
+        return object_id in self.found[relation]
+
+    def get_cache_key(self, relation):
+        if self.version is None:
+            namespace = VIEWER_NAMESPACE.format(user_id=self.user.pk)
+            self.version = get_versions([namespace])[namespace]
+        return VIEWER_KEY.format(
+            user_id=self.user.pk,
+            relation=relation,
+            version=self.version,
+        )
+
+    def load(self, relation, object_ids):
+        if relation in self.complete:
+            return
+        related_name, field = self.RELATIONS[relation]
+        queryset = getattr(self.user, related_name).values_list(
+            field,
+            flat=True,
+        )
+        if relation not in self.checked:
+            self.load_all(relation, queryset)
+            if relation in self.complete:
+                return
+        object_ids = set(object_ids) - self.checked[relation]
+        if object_ids:
+            self.found[relation].update(
+                queryset.filter(**{f'{field}__in': object_ids})
+            )
+            self.checked[relation].update(object_ids)
+
+    def load_all(self, relation, queryset):
+        timeout = settings.VIEWER_CONTEXT_CACHE_TIMEOUT
+        cache_key = self.get_cache_key(relation) if timeout else None
+        values = cache.get(cache_key) if cache_key else None
+        if values is None:
+            limit = settings.VIEWER_CONTEXT_MAX_SET_SIZE
+            values = list(queryset[:limit + 1])
+            values = PARTIAL if len(values) > limit else frozenset(values)
+            if cache_key:
+                cache.set(cache_key, values, timeout)
+        if values == PARTIAL:
+            self.checked[relation] = set()
+            self.found[relation] = set()
+        else:
+            self.complete[relation] = values
@@ -1,37 +1,165 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db.models import Sum
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import (SAFE_METHODS, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 
+from api.conditional import (conditional_response, get_recipe_validators,
+                             get_user_validators)
+from api.documents import (INGREDIENTS_NAMESPACE, TAGS_NAMESPACE,
+                           get_recipe_documents)
+from api.events import create_ticket
+from api.fast_serializers import (RECIPE_DOCUMENT_FIELDS, RECIPE_VIEWS,
+                                  RecipeFastSerializer)
+from api.fieldsets import get_requested_fields, get_sparse_serializer_class
 from api.filters import IngredientFilter, RecipeFilter
-from api.pagination import CustomPagination
+from api.ingredient_index import ingredient_index
+from api.pagination import (ChangeLogPagination, CustomPagination,
+                            KeysetPagination, ScoreKeysetPagination)
 from api.permissions import IsAuthorOrReadOnly
+from api.projections import project
 from api.serializers import (FavoriteSerializer, IngredientSerializer,
-                             RecipePostSerializer, RecipeReadSerializer,
-                             ShoppingCartSerializer, SubscribeSerializer,
-                             SubscribeShowSerializer, TagSerializer,
-                             UserSerializer)
+                             RecipeImageSerializer, RecipePostSerializer,
+                             RecipeReadSerializer, ShoppingCartSerializer,
+                             SubscribeSerializer, SubscribeShowSerializer,
+                             TagSerializer, UserSerializer)
+from api.versions import get_or_build
+from foodgram import constants
+from recipes.changes import (get_changes, get_first_cursor, get_synced_txid,
+                             summarize_changes)
+from recipes.feed import get_feed_recipe_ids
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                             ShoppingCart, Tag)
+from recipes.similarity import get_similar_recipe_ids
 from users.models import Subscriber
 
 User = get_user_model()
 
 
-class UserViewSet(UserViewSet):
+class ProjectionMixin:
+    """При чтении загружает только поля, которые выводит сериализатор.
+
+    Запись получает полные объекты: при сохранении объекта с
+    отложенными полями Django не обновил бы поля с auto_now.
+    """
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        return project(queryset, self.get_serializer_class())
+
+
+class MultiGetMixin:
+    """Отдаёт объекты из ?ids=1,2,3 одним списком в порядке ids.
+
+    Несуществующие id пропускаются, повторы отбрасываются, остальные
+    параметры списка при этом не учитываются.
+    """
+    def list(self, request, *args, **kwargs):
+        if 'ids' in request.query_params:
+            return self.multi_get(request)
+        return super().list(request, *args, **kwargs)
+
+    def multi_get(self, request):
+        try:
+            ids = list(dict.fromkeys(
+                int(object_id)
+                for object_id in request.query_params['ids'].split(',')
+                if object_id
+            ))
+        except ValueError:
+            return Response(
+                {'errors': 'Идентификаторы должны быть указаны числами!'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(ids) > constants.MAX_MULTI_GET_IDS:
+            return Response(
+                {'errors': 'За один запрос можно получить не больше '
+                           f'{constants.MAX_MULTI_GET_IDS} объектов!'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(self.get_multi_get_data(ids))
+
+    def get_multi_get_data(self, ids):
+        objects = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [objects[object_id] for object_id in ids if object_id in objects],
+            many=True,
+        )
+        return serializer.data
+
+
+class SparseFieldsMixin:
+    """При чтении выводит только поля из параметров fields, omit и view.
+
+    Сериализатор заменяется подклассом с этими полями, поэтому
+    ProjectionMixin не загружает колонки и связи отброшенных полей.
+    """
+    field_views = None
+
+    def get_serializer_class(self):
+        serializer_class = super().get_serializer_class()
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return serializer_class
+        return get_sparse_serializer_class(
+            serializer_class,
+            get_requested_fields(
+                self.request,
+                serializer_class.Meta.fields,
+                self.field_views,
+            ),
+        )
+
+
+class UserViewSet(SparseFieldsMixin, MultiGetMixin, ProjectionMixin,
+                  UserViewSet):
     """Вьюсет для пользователей."""
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,)
     pagination_class = CustomPagination
 
+    def get_throttle_cost(self, request):
+        if self.action != 'subscriptions':
+            return 1
+        try:
+            recipes_limit = int(request.query_params['recipes_limit'])
+        except (KeyError, ValueError):
+            recipes_limit = constants.SUBSCRIPTIONS_RECIPES_LIMIT_COST_STEP
+        return 2 + (
+            recipes_limit // constants.SUBSCRIPTIONS_RECIPES_LIMIT_COST_STEP
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.kwargs.get(self.lookup_field, request.user.pk)
+        return conditional_response(
+            request,
+            get_user_validators(request, pk),
+            lambda: super(UserViewSet, self).retrieve(
+                request, *args, **kwargs
+            ),
+        )
+
+    def get_instance(self):
+        """Загружает текущего пользователя одним запросом.
+
+        Из кеша токенов приходит пользователь только с id, и без этого
+        каждое поле профиля догружалось бы отдельным запросом.
+        """
+        return self.get_queryset().get(pk=self.request.user.pk)
+
     def get_permissions(self):
         if self.action == 'me':
             self.permission_classes = [IsAuthenticated]
@@ -43,9 +171,19 @@ class UserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         user = request.user
-        queryset = User.objects.filter(author_subscribers__user=user)
+        serializer_class = get_sparse_serializer_class(
+            SubscribeShowSerializer,
+            get_requested_fields(
+                request,
+                SubscribeShowSerializer.Meta.fields,
+            ),
+        )
+        queryset = project(
+            User.objects.filter(author_subscribers__user=user),
+            serializer_class,
+        )
         pages = self.paginate_queryset(queryset)
-        serializer = SubscribeShowSerializer(
+        serializer = serializer_class(
             pages,
             many=True,
             context={'request': request},
@@ -59,7 +197,7 @@ class UserViewSet(UserViewSet):
     )
     def subscribe(self, request, **kwargs):
         author = get_object_or_404(
-            User,
+            User.objects.only('id'),
             id=self.kwargs.get('id'),
         )
         data = {
@@ -77,7 +215,7 @@ class UserViewSet(UserViewSet):
     @subscribe.mapping.delete
     def delete_subscribe(self, request, **kwargs):
         author = get_object_or_404(
-            User,
+            User.objects.only('id'),
             id=self.kwargs.get('id'),
         )
         try:
@@ -93,22 +231,51 @@ class UserViewSet(UserViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    @action(
+        detail=False,
+        methods=['POST'],
+        permission_classes=[IsAuthenticated],
+    )
+    def events_ticket(self, request):
+        return Response({'ticket': create_ticket(request.user.id)})
+
+
+class SnapshotListMixin:
+    """Отдаёт список без фильтров из кеша по версии пространства имён,
+    которую сбрасывают сигналы при изменении объектов."""
+    snapshot_namespace = None
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        return Response(
+            get_or_build(self.snapshot_namespace, self.get_snapshot)
+        )
+
+    def get_snapshot(self):
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return list(serializer.data)
+
+
+class TagViewSet(SnapshotListMixin, ProjectionMixin,
+                 viewsets.ReadOnlyModelViewSet):
     """Вьюсет для тегов."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    snapshot_namespace = TAGS_NAMESPACE
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(SnapshotListMixin, ProjectionMixin,
+                        viewsets.ReadOnlyModelViewSet):
     """Вьюсет для ингредиентов."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend, IngredientFilter)
     search_fields = ('^name',)
+    snapshot_namespace = INGREDIENTS_NAMESPACE
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(MultiGetMixin, viewsets.ModelViewSet):
     """Вьюсет для рецептов."""
     queryset = Recipe.objects.all()
     serializer_class = RecipeReadSerializer
@@ -116,15 +283,248 @@ class RecipeViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAuthorOrReadOnly, )
     filter_backends = (DjangoFilterBackend, )
     filterset_class = RecipeFilter
+    ORDERINGS = {
+        'popular': 'popularity',
+        'trending': 'trending_score',
+    }
+    throttle_costs = {
+        'create': 10,
+        'update': 10,
+        'image': 10,
+        'partial_update': 10,
+        'download_shopping_cart': 20,
+        'cook': 3,
+        'similar': 3,
+        'changes': 3,
+    }
+
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return Recipe.objects.only('id', 'author_id')
+        return Recipe.objects.all()
 
     def get_serializer_class(self):
-        if self.action in SAFE_METHODS:
+        if self.request is not None and self.request.method in SAFE_METHODS:
             return RecipeReadSerializer
         return RecipePostSerializer
 
+    def list(self, request, *args, **kwargs):
+        if 'ids' in request.query_params:
+            return self.multi_get(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = self.ORDERINGS.get(request.query_params.get('ordering'))
+        if ordering is not None:
+            paginator = ScoreKeysetPagination()
+            page, next_cursor = paginator.paginate_queryset(
+                queryset.only('id', 'author_id', ordering),
+                request,
+                ordering,
+            )
+        else:
+            page = self.paginate_queryset(queryset)
+        serializer = RecipeFastSerializer(
+            get_recipe_documents(
+                [recipe.id for recipe in page],
+                self.get_document_fields(),
+            ),
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        if ordering is not None:
+            return paginator.get_paginated_response(
+                request, serializer.data, next_cursor,
+            )
+        return self.get_paginated_response(serializer.data)
+
+    def get_document_fields(self):
+        return get_requested_fields(
+            self.request, RECIPE_DOCUMENT_FIELDS, RECIPE_VIEWS,
+        )
+
+    def get_multi_get_data(self, ids):
+        serializer = RecipeFastSerializer(
+            get_recipe_documents(ids, self.get_document_fields()),
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return serializer.data
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = get_recipe_validators(request, self.kwargs['pk'])
+
+        def get_response():
+            documents = get_recipe_documents(
+                [int(self.kwargs['pk'])],
+                self.get_document_fields(),
+            )
+            if not documents:
+                # Рецепт удалили после проверки ETag.
+                raise Http404
+            serializer = RecipeFastSerializer(
+                documents[0],
+                context=self.get_serializer_context(),
+            )
+            return Response(serializer.data)
+
+        return conditional_response(request, validators, get_response)
+
+    @action(
+        detail=False,
+        permission_classes=[IsAuthenticated],
+    )
+    def feed(self, request):
+        paginator = KeysetPagination()
+        limit = paginator.get_limit(request)
+        ids = get_feed_recipe_ids(
+            request.user,
+            before=paginator.get_cursor(request),
+            limit=limit,
+        )
+        serializer = RecipeFastSerializer(
+            get_recipe_documents(ids, self.get_document_fields()),
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return paginator.get_paginated_response(
+            request,
+            serializer.data,
+            ids[-1] if len(ids) == limit else None,
+        )
+
+    @action(
+        detail=False,
+    )
+    def changes(self, request):
+        paginator = ChangeLogPagination()
+        limit = paginator.get_limit(request)
+        cursor = paginator.get_cursor(request)
+        if cursor is not None:
+            after, synced_at = cursor[:2], cursor[2]
+            expired = timezone.now() - timedelta(
+                days=settings.CHANGE_LOG_RETENTION_DAYS,
+            )
+            if synced_at < expired.timestamp():
+                return Response(
+                    {'errors': 'Курсор устарел, нужна полная синхронизация!'},
+                    status=status.HTTP_410_GONE,
+                )
+        elif 'since' in request.query_params:
+            try:
+                since = parse_datetime(request.query_params['since'])
+            except ValueError:
+                since = None
+            if since is None:
+                return Response(
+                    {'errors': 'Параметр since должен быть датой ISO 8601!'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            after = get_first_cursor(since)
+        else:
+            after = (0, 0)
+        synced_at = timezone.now()
+        until = get_synced_txid()
+        entries = get_changes(request.user, after, limit + 1, until)
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        summary = summarize_changes(entries)
+        if entries:
+            after = entries[-1][:2]
+        if has_more:
+            synced_at = entries[-1][2]
+        serializer = RecipeFastSerializer(
+            get_recipe_documents(summary.pop('updated')),
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return paginator.get_paginated_response(
+            request,
+            {'recipes': serializer.data, **summary},
+            paginator.encode_cursor(*after, synced_at.timestamp()),
+            has_more,
+        )
+
+    @action(
+        detail=True,
+    )
+    def similar(self, request, pk):
+        recipe = get_object_or_404(Recipe.objects.only('id'), id=pk)
+        limit = KeysetPagination().get_limit(request)
+        ids = get_similar_recipe_ids(
+            recipe.id,
+            min(limit, constants.MAX_SIMILAR_RECIPES),
+        )
+        serializer = RecipeFastSerializer(
+            get_recipe_documents(ids, self.get_document_fields()),
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+    )
+    def cook(self, request):
+        try:
+            ingredient_ids = [
+                int(ingredient_id)
+                for value in request.query_params.getlist('ingredients')
+                for ingredient_id in value.split(',')
+                if ingredient_id
+            ]
+        except ValueError:
+            return Response(
+                {'errors': 'Ингредиенты должны быть указаны числами!'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not ingredient_ids:
+            return Response(
+                {'errors': 'Ингредиенты должны быть указаны!'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        results = ingredient_index.search(
+            ingredient_ids,
+            tags=request.query_params.getlist('tags'),
+            limit=KeysetPagination().get_limit(request),
+        )
+        serializer = RecipeFastSerializer(
+            get_recipe_documents(
+                [recipe_id for recipe_id, *_ in results],
+                self.get_document_fields(),
+            ),
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        counts = {
+            recipe_id: (covered, missing)
+            for recipe_id, covered, missing in results
+        }
+        data = serializer.data
+        for document in data:
+            covered, missing = counts[document['id']]
+            document['matched_ingredients'] = covered
+            document['missing_ingredients'] = missing
+        return Response(data)
+
+    @action(
+        detail=True,
+        methods=['PUT'],
+        parser_classes=[MultiPartParser],
+    )
+    def image(self, request, pk):
+        serializer = RecipeImageSerializer(
+            self.get_object(),
+            data=request.data,
+            context={'request': request},
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
     def add_to(self, request, pk, serializer_class):
         try:
-            recipe = Recipe.objects.get(
+            recipe = Recipe.objects.only('id').get(
                 id=pk,
             )
         except Recipe.DoesNotExist:
@@ -146,7 +546,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     def remove_from(self, request, pk, model):
         recipe = get_object_or_404(
-            Recipe,
+            Recipe.objects.only('id'),
             id=pk,
         )
         try:
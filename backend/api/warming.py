@@ -0,0 +1,136 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from itertools import combinations
+from urllib.parse import urlencode
+
+import requests
+from django.db.models import Count
+
+from api.pagination import CustomPagination
+from recipes.models import Ingredient, Recipe, Tag
+
+REQUEST_TIMEOUT = 10
+RETRY_BACKOFF = 0.5
+RETRY_MAX_BACKOFF = 10
+
+
+def get_recipe_list_url(**params):
+    query = urlencode(params, doseq=True)
+    return f'/api/recipes/?{query}' if query else '/api/recipes/'
+
+
+def get_warm_urls(pages, top, tag_limit):
+    """Адреса для прогрева в порядке важности.
+
+    Сначала справочники тегов и ингредиентов и индекс подбора по
+    ингредиентам, затем первые страницы списка рецептов и популярные
+    сочетания тегов, в конце детальные страницы самых часто
+    добавляемых в избранное рецептов. Если бюджета времени не хватит,
+    отбрасывается хвост списка.
+    """
+    urls = ['/api/tags/', '/api/ingredients/']
+    ingredient_id = Ingredient.objects.values_list('id', flat=True).first()
+    if ingredient_id is not None:
+        urls.append(f'/api/recipes/cook/?ingredients={ingredient_id}')
+    pages = min(
+        pages,
+        math.ceil(Recipe.objects.count() / CustomPagination.page_size),
+    )
+    for page in range(1, pages + 1):
+        urls.append(get_recipe_list_url(page=page))
+    for ordering in ('popular', 'trending'):
+        urls.append(get_recipe_list_url(ordering=ordering))
+    slugs = list(
+        Tag.objects.annotate(
+            recipe_count=Count('recipes'),
+        ).order_by('-recipe_count', 'id').values_list('slug', flat=True)
+    )
+    tag_combinations = [slugs] if slugs else []
+    for size in (1, 2):
+        tag_combinations.extend(combinations(slugs[:tag_limit], size))
+    for tags in dict.fromkeys(map(tuple, tag_combinations)):
+        urls.append(get_recipe_list_url(page=1, tags=tags))
+    recipe_ids = Recipe.objects.annotate(
+        favorite_count=Count('favorites'),
+    ).order_by('-favorite_count', '-id').values_list('id', flat=True)[:top]
+    urls.extend(f'/api/recipes/{recipe_id}/' for recipe_id in recipe_ids)
+    return urls
+
+
+class CacheWarmer:
+    """Параллельно запрашивает адреса у запущенного сервера.
+
+    Запросы только читающие и анонимные; после дедлайна новые запросы
+    не отправляются, а таймаут каждого ограничен оставшимся временем.
+    """
+    def __init__(self, base_url, host=None, concurrency=8, budget=60):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {'Host': host} if host else {}
+        self.concurrency = concurrency
+        self.deadline = time.monotonic() + budget
+        self.local = threading.local()
+
+    @property
+    def session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def get_timeout(self):
+        return min(REQUEST_TIMEOUT, self.deadline - time.monotonic())
+
+    def get_retry_delay(self, response, attempt):
+        """Пауза перед повтором после 429: из Retry-After, а без него
+        экспоненциальная."""
+        try:
+            return float(response.headers['Retry-After'])
+        except (KeyError, ValueError):
+            return min(RETRY_BACKOFF * 2 ** attempt, RETRY_MAX_BACKOFF)
+
+    def fetch(self, url):
+        """Возвращает код ответа, 'error' при ошибке сети или None,
+        если время вышло.
+
+        Анонимные запросы прогрева расходуют один бакет троттлинга, и
+        ответ 429 ничего не прогревает, поэтому запрос повторяется после
+        паузы, пока хватает бюджета времени. Если не хватает, остаётся
+        429.
+        """
+        attempt = 0
+        while True:
+            timeout = self.get_timeout()
+            if timeout <= 0:
+                return None
+            try:
+                response = self.session.get(
+                    f'{self.base_url}{url}',
+                    headers=self.headers,
+                    timeout=timeout,
+                )
+            except requests.RequestException:
+                return 'error'
+            if response.status_code != HTTPStatus.TOO_MANY_REQUESTS:
+                return response.status_code
+            delay = self.get_retry_delay(response, attempt)
+            if delay >= self.get_timeout():
+                return response.status_code
+            time.sleep(delay)
+            attempt += 1
+
+    def wait_until_ready(self, url='/api/tags/', interval=1):
+        """Ждёт, пока сервер начнёт отвечать, но не дольше бюджета."""
+        while True:
+            status = self.fetch(url)
+            if status is None:
+                return False
+            if status != 'error' and status < 500:
+                return True
+            time.sleep(min(interval, max(self.get_timeout(), 0)))
+
+    def run(self, urls):
+        """Возвращает пары (адрес, результат fetch)."""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(zip(urls, executor.map(self.fetch, urls)))
@@ -4,4 +4,20 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from api.events import events_application  # noqa: E402
+
+EVENTS_PATH = '/api/events/'
+
+
+async def application(scope, receive, send):
+    """Отдаёт поток событий мимо Django, остальные запросы — в Django.
+
+    Долгие SSE-подключения не проходят через middleware и не держат
+    поток из пула sync_to_async, пока ждут событий.
+    """
+    if scope['type'] == 'http' and scope['path'] == EVENTS_PATH:
+        await events_application(scope, receive, send)
+        return
+    await django_application(scope, receive, send)
@@ -0,0 +1,336 @@
+import json
+import logging
+import os
+import select
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import close_old_connections, connection, connections
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'cache_invalidation'
+MAX_PAYLOAD_SIZE = 7000
+RECONNECT_DELAY = 5
+HIT_LOCAL = 'local'
+HIT_SHARED = 'shared'
+MISS = 'miss'
+METRICS_KINDS = (HIT_LOCAL, HIT_SHARED, MISS)
+
+
+def get_namespace(key):
+    return key.split(':', 1)[0]
+
+
+def iter_payloads(keys):
+    """Делит ключи на части, помещающиеся в одно уведомление Postgres."""
+    chunk = []
+    size = 2
+    for key in keys:
+        if chunk and size + len(key) + 4 > MAX_PAYLOAD_SIZE:
+            yield json.dumps(chunk)
+            chunk = []
+            size = 2
+        chunk.append(key)
+        size += len(key) + 4
+    if chunk:
+        yield json.dumps(chunk)
+
+
+def publish_invalidation(keys):
+    """Просит все процессы выбросить ключи из локального уровня кеша.
+
+    Уведомление уходит через NOTIFY и доставляется после коммита
+    текущей транзакции. Без Postgres процессы не делят кеш между
+    собой, и публиковать нечего.
+    """
+    if connection.vendor != 'postgresql' or not keys:
+        return
+    with connection.cursor() as cursor:
+        for payload in iter_payloads(keys):
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+
+
+class InvalidationListener(threading.Thread):
+    """Поток, слушающий уведомления об инвалидации через LISTEN.
+
+    Пока соединение потеряно, уведомления могли пропасть, поэтому после
+    переподключения локальный уровень очищается целиком.
+    """
+    def __init__(self, local):
+        super().__init__(name='cache-invalidation', daemon=True)
+        self.local = local
+
+    def run(self):
+        while True:
+            try:
+                self.listen()
+            except Exception:
+                logger.exception('Потеряно соединение для LISTEN')
+            self.local.clear()
+            time.sleep(RECONNECT_DELAY)
+
+    def listen(self):
+        wrapper = connections['default']
+        listener = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            listener.autocommit = True
+            with listener.cursor() as cursor:
+                cursor.execute(f'LISTEN {CHANNEL}')
+            self.local.clear()
+            while True:
+                if select.select([listener], [], [], 60) == ([], [], []):
+                    continue
+                listener.poll()
+                while listener.notifies:
+                    notify = listener.notifies.pop(0)
+                    self.local.delete_many(json.loads(notify.payload))
+        finally:
+            listener.close()
+
+
+INCREMENT_COUNTERS_SQL = '''
+    INSERT INTO {table} (namespace, kind, count) VALUES {values}
+    ON CONFLICT (namespace, kind) DO UPDATE SET
+        count = {table}.count + excluded.count
+'''
+
+
+def increment_counters(counts):
+    """Прибавляет счётчики процесса к общим одним UPSERT.
+
+    Прибавление идёт в базе под блокировкой строки, поэтому
+    параллельные сбросы разных процессов не теряют друг друга.
+    """
+    from api.models import CacheCounter
+
+    table = connection.ops.quote_name(CacheCounter._meta.db_table)
+    params = []
+    for (namespace, kind), count in counts.items():
+        params.extend((namespace, kind, count))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            INCREMENT_COUNTERS_SQL.format(
+                table=table,
+                values=', '.join(['(%s, %s, %s)'] * len(counts)),
+            ),
+            params,
+        )
+
+
+class MetricsFlusher(threading.Thread):
+    """Поток, сбрасывающий счётчики процесса раз в interval секунд."""
+    def __init__(self, metrics):
+        super().__init__(name='cache-metrics', daemon=True)
+        self.metrics = metrics
+
+    def run(self):
+        while True:
+            time.sleep(self.metrics.interval)
+            try:
+                self.metrics.flush()
+            except Exception:
+                logger.exception('Не удалось сбросить счётчики кеша')
+            finally:
+                close_old_connections()
+
+
+class CacheMetrics:
+    """Счётчики попаданий и промахов процесса по пространствам имён.
+
+    Запросы только увеличивают счётчики в памяти. Отдельный поток раз в
+    interval секунд прибавляет их к общим счётчикам в базе, откуда их
+    суммарно по всем процессам читает команда cache_stats.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def record(self, keys, kind):
+        with self.lock:
+            for key in keys:
+                self.counts[get_namespace(key), kind] += 1
+
+    def start(self):
+        """Запускает сброс в новом процессе. Счётчики, унаследованные от
+        мастер-процесса, сбросит он сам."""
+        with self.lock:
+            self.counts = Counter()
+        if self.interval:
+            MetricsFlusher(self).start()
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        if not counts:
+            return
+        try:
+            increment_counters(counts)
+        except Exception:
+            with self.lock:
+                self.counts.update(counts)
+            raise
+
+
+def get_metrics():
+    """Суммарные счётчики всех процессов: пространство имён -> вид -> n."""
+    from api.models import CacheCounter
+
+    metrics = {}
+    for namespace, kind, count in CacheCounter.objects.values_list(
+        'namespace',
+        'kind',
+        'count',
+    ):
+        metrics.setdefault(
+            namespace,
+            dict.fromkeys(METRICS_KINDS, 0),
+        )[kind] = count
+    return metrics
+
+
+def reset_metrics():
+    from api.models import CacheCounter
+
+    CacheCounter.objects.all().delete()
+
+
+class TwoTierCache(BaseCache):
+    """Двухуровневый кеш: LRU в памяти процесса перед общим бэкендом.
+
+    Чтение идёт сначала из локального уровня, затем из общего кеша,
+    найденное там значение копируется в локальный уровень. Запись идёт
+    в оба уровня. Локально значения живут не дольше LOCAL_TIMEOUT, а
+    удалённые ключи выбрасываются из локальных уровней всех процессов
+    через LISTEN/NOTIFY, поэтому изменяемые ключи стоит удалять или
+    версионировать, а не перезаписывать.
+
+    OPTIONS: SHARED — алиас общего кеша в CACHES, LOCAL_MAX_ENTRIES,
+    LOCAL_TIMEOUT и METRICS_INTERVAL.
+    """
+    listeners = {}
+    listeners_lock = threading.Lock()
+    process_metrics = {}
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__({**params, 'OPTIONS': {}})
+        self.location = location
+        self.shared_alias = options['SHARED']
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        self.local = LocMemCache(
+            f'two-tier:{location}',
+            {
+                'TIMEOUT': self.local_timeout,
+                'OPTIONS': {
+                    'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000),
+                },
+            },
+        )
+        self.metrics = self.process_metrics.setdefault(
+            location,
+            CacheMetrics(options.get('METRICS_INTERVAL', 10)),
+        )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def start_listener(self):
+        """Запускает потоки LISTEN и сброса счётчиков один раз на процесс.
+
+        Потоки заводятся при первом обращении к кешу, а не при импорте,
+        чтобы они оказались в воркере, а не в мастер-процессе gunicorn.
+        """
+        pid = os.getpid()
+        if self.listeners.get(self.location) == pid:
+            return
+        with self.listeners_lock:
+            if self.listeners.get(self.location) == pid:
+                return
+            self.listeners[self.location] = pid
+            self.metrics.start()
+            if connections['default'].vendor == 'postgresql':
+                InvalidationListener(self.local).start()
+
+    def get_local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        self.start_listener()
+        keys = list(keys)
+        values = self.local.get_many(keys, version=version)
+        self.metrics.record(values, HIT_LOCAL)
+        missing = [key for key in keys if key not in values]
+        if missing:
+            found = self.shared.get_many(missing, version=version)
+            if found:
+                self.local.set_many(found, version=version)
+                self.metrics.record(found, HIT_SHARED)
+                values.update(found)
+            self.metrics.record(
+                [key for key in missing if key not in found],
+                MISS,
+            )
+        return values
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version=version) is not self
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.shared.add(key, value, timeout, version=version):
+            return False
+        self.local.set(
+            key, value, self.get_local_timeout(timeout), version=version,
+        )
+        return True
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        self.local.set_many(
+            data, self.get_local_timeout(timeout), version=version,
+        )
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.delete_local([key], version)
+        return self.shared.incr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        self.delete_local([key], version)
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.delete_local(keys, version)
+        self.shared.delete_many(keys, version=version)
+
+    def delete_local(self, keys, version=None):
+        self.local.delete_many(keys, version=version)
+        publish_invalidation(keys)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
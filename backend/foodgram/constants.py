@@ -15,3 +15,25 @@ MAX_LENGTH_FIELD_OF_EMAIL = 254
 ERROR_MESSAGE = {
     'does_not_exist': "Запись не существует!"
 }
+
+MINHASH_PERMUTATIONS = 64
+
+LSH_BANDS = 16
+
+MAX_SIMILAR_RECIPES = 50
+
+FAVORITE_SCORE_WEIGHT = 2
+
+SHOPPING_CART_SCORE_WEIGHT = 1
+
+MIN_TRENDING_SCORE = 0.01
+
+SUBSCRIPTIONS_RECIPES_LIMIT_COST_STEP = 10
+
+MAX_IMAGE_SIDE = 8000
+
+MAX_IMAGE_PIXELS = 40_000_000
+
+BASE64_DECODE_CHUNK_SIZE = 4 * 64 * 1024
+
+MAX_MULTI_GET_IDS = 100
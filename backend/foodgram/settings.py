@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -27,14 +28,19 @@ INSTALLED_APPS = [
     'recipes.apps.RecipesConfig',
     'api.apps.ApiConfig',
     'users.apps.UsersConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.LatencyMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ProfilingMiddleware',
+    'api.middleware.SlowQueryMiddleware',
+    'api.middleware.QueryCountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -91,10 +97,139 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.LoadSheddingThrottle',
+        'api.throttling.CostWeightedThrottle',
+    ],
+
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'foodgram.cache.TwoTierCache',
+        'LOCATION': 'foodgram',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': int(
+                os.getenv('CACHE_LOCAL_MAX_ENTRIES', 10000)
+            ),
+            'LOCAL_TIMEOUT': int(os.getenv('CACHE_LOCAL_TIMEOUT', 60)),
+            'METRICS_INTERVAL': int(os.getenv('CACHE_METRICS_INTERVAL', 10)),
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', '/var/tmp/foodgram_cache'),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', ''),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+
+RECIPE_DOCUMENT_CACHE_TIMEOUT = int(
+    os.getenv('RECIPE_DOCUMENT_CACHE_TIMEOUT', 3600)
+)
+
+VIEWER_CONTEXT_MAX_SET_SIZE = int(
+    os.getenv('VIEWER_CONTEXT_MAX_SET_SIZE', 1000)
+)
+VIEWER_CONTEXT_CACHE_TIMEOUT = int(
+    os.getenv('VIEWER_CONTEXT_CACHE_TIMEOUT', 300)
+)
+
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv('FEED_FANOUT_MAX_FOLLOWERS', 1000))
+FEED_POPULAR_AUTHORS_CACHE_TIMEOUT = int(
+    os.getenv('FEED_POPULAR_AUTHORS_CACHE_TIMEOUT', 300)
+)
+FEED_POPULAR_AUTHORS_REFRESH_INTERVAL = int(
+    os.getenv('FEED_POPULAR_AUTHORS_REFRESH_INTERVAL', 300)
+)
+FEED_BACKFILL_SIZE = int(os.getenv('FEED_BACKFILL_SIZE', 50))
+FEED_BATCH_SIZE = int(os.getenv('FEED_BATCH_SIZE', 1000))
+
+INGREDIENT_INDEX_POLL_INTERVAL = int(
+    os.getenv('INGREDIENT_INDEX_POLL_INTERVAL', 10)
+)
+
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', 24))
+
+THROTTLE_BUCKET_CAPACITY = int(os.getenv('THROTTLE_BUCKET_CAPACITY', 120))
+THROTTLE_BUCKET_RATE = float(os.getenv('THROTTLE_BUCKET_RATE', 2))
+THROTTLE_BUCKET_SLOTS = int(os.getenv('THROTTLE_BUCKET_SLOTS', 65536))
+
+LOAD_SHEDDING = {
+    'MAX_QUEUE_TIME': float(os.getenv('LOAD_SHEDDING_MAX_QUEUE_TIME', 1)),
+    'MAX_LATENCY': float(os.getenv('LOAD_SHEDDING_MAX_LATENCY', 2)),
+    'LATENCY_SMOOTHING': float(
+        os.getenv('LOAD_SHEDDING_LATENCY_SMOOTHING', 0.05)
+    ),
+    'RETRY_AFTER': int(os.getenv('LOAD_SHEDDING_RETRY_AFTER', 5)),
+}
+
+SHARED_MEMORY_DIR = os.getenv(
+    'SHARED_MEMORY_DIR',
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+)
+
+STARTUP_BUDGET = {
+    'SECONDS': float(os.getenv('STARTUP_BUDGET_SECONDS', 2)),
+    'RSS_MB': float(os.getenv('STARTUP_BUDGET_RSS_MB', 150)),
+}
+
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv('CHANGE_LOG_RETENTION_DAYS', 30))
+
+PROFILER = {
+    'SAMPLE_RATE': int(os.getenv('PROFILER_SAMPLE_RATE', 0)),
+    'INTERVAL': float(os.getenv('PROFILER_INTERVAL', 0.005)),
+}
+
+SLOW_QUERY_LOG = {
+    'THRESHOLD': float(os.getenv('SLOW_QUERY_THRESHOLD', 200)),
+    'EXPLAIN_SAMPLE_RATE': int(
+        os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 10)
+    ),
+    'EXPLAIN_TIMEOUT': int(os.getenv('SLOW_QUERY_EXPLAIN_TIMEOUT', 30000)),
+}
+
+SQL_COUNT_HEADER = bool(os.getenv('SQL_COUNT_HEADER'))
+
+JOBS = {
+    'EAGER': bool(os.getenv('JOBS_EAGER')),
+    'MAX_ATTEMPTS': int(os.getenv('JOBS_MAX_ATTEMPTS', 5)),
+    'BACKOFF': float(os.getenv('JOBS_BACKOFF', 10)),
+    'MAX_BACKOFF': float(os.getenv('JOBS_MAX_BACKOFF', 3600)),
+    'TIMEOUT': int(os.getenv('JOBS_TIMEOUT', 600)),
+    'RETENTION_DAYS': int(os.getenv('JOBS_RETENTION_DAYS', 7)),
+    'PERIODIC': {
+        'recipes.feed.refresh_popular_authors': (
+            FEED_POPULAR_AUTHORS_REFRESH_INTERVAL
+        ),
+        'recipes.scores.decay_trending': int(
+            os.getenv('TRENDING_DECAY_INTERVAL', 3600)
+        ),
+    },
+}
+
+EVENTS = {
+    'HEARTBEAT': float(os.getenv('EVENTS_HEARTBEAT', 15)),
+    'BUFFER_SIZE': int(os.getenv('EVENTS_BUFFER_SIZE', 32)),
+    'RETRY': int(os.getenv('EVENTS_RETRY', 5000)),
+    'RECONNECT_DELAY': float(os.getenv('EVENTS_RECONNECT_DELAY', 5)),
+    'TICKET_MAX_AGE': int(os.getenv('EVENTS_TICKET_MAX_AGE', 60)),
+}
+
 DJOSER = {
     'HIDE_USERS': False,
 
@@ -126,6 +261,14 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+MAX_IMAGE_UPLOAD_SIZE = int(os.getenv('MAX_IMAGE_UPLOAD_SIZE', 10 * 1024 ** 2))
+
+IMAGE_DELETE_GRACE = int(os.getenv('IMAGE_DELETE_GRACE', 300))
+
+DATA_UPLOAD_MAX_MEMORY_SIZE = MAX_IMAGE_UPLOAD_SIZE * 4 // 3 + 1024 ** 2
+
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 ** 2
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.User'
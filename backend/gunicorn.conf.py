@@ -0,0 +1,42 @@
+import gc
+import multiprocessing
+import os
+
+bind = '0.0.0.0:8000'
+
+workers = int(
+    os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+)
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+
+def when_ready(server):
+    """Догружает приложение в мастер-процессе перед запуском воркеров.
+
+    С preload_app воркеры получают уже импортированные модули, urls и
+    индекс ингредиентов через copy-on-write, а gc.freeze() не даёт
+    сборщику мусора трогать эти объекты и копировать страницы памяти в
+    каждом воркере. Соединения с базой закрываются, чтобы воркеры не
+    унаследовали общий сокет.
+    """
+    if not preload_app:
+        return
+    from django.db import connections
+    from django.urls import get_resolver
+
+    from api.ingredient_index import ingredient_index
+    get_resolver().url_patterns
+    ingredient_index.warm()
+    connections.close_all()
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """Строит индекс ингредиентов до первого запроса воркера.
+
+    Если индекс уже загружен в мастер-процессе, только догоняет
+    журнал изменений.
+    """
+    from api.ingredient_index import ingredient_index
+    ingredient_index.warm()
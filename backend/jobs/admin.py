@@ -0,0 +1,33 @@
+from django.contrib import admin
+
+from jobs.models import Job, Schedule
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Админ модель для фоновых задач."""
+    list_display = (
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'finished_at',
+        'worker',
+    )
+    list_filter = (
+        'status',
+        'name',
+    )
+    search_fields = (
+        'dedup_key',
+    )
+
+
+@admin.register(Schedule)
+class ScheduleAdmin(admin.ModelAdmin):
+    """Админ модель для расписания периодических задач."""
+    list_display = (
+        'name',
+        'last_run_at',
+        'next_run_at',
+    )
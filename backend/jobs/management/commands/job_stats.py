@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from jobs.models import Job
+from jobs.queue import get_metrics
+
+
+class Command(BaseCommand):
+    help = 'Выводит размер очереди фоновых задач и статистику выполнения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=1,
+            help='за сколько последних часов считать статистику задач',
+        )
+
+    def handle(self, *args, **options):
+        metrics = get_metrics(options['hours'])
+        for status, label in Job.STATUSES:
+            self.stdout.write(
+                f'{label}: {metrics["statuses"].get(status, 0)}'
+            )
+        self.stdout.write(f'Задержка очереди: {metrics["lag"]:.1f} с')
+        for task in metrics['tasks']:
+            duration = task['duration']
+            seconds = duration.total_seconds() if duration else 0
+            self.stdout.write(
+                f'{task["name"]}: выполнено {task["done"]}, '
+                f'ошибок {task["failed"]}, '
+                f'в среднем {seconds:.2f} с'
+            )
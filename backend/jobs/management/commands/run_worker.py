@@ -0,0 +1,64 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import Worker
+
+
+def run_worker(threads, poll_interval, once):
+    worker = Worker(threads=threads, poll_interval=poll_interval, once=once)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает воркер очереди фоновых задач. Процессы и потоки '
+        'разбирают общую очередь в базе, не мешая друг другу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--threads', type=int, default=1)
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1,
+            help='пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='выполнить готовые задачи и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        worker_args = (
+            options['threads'],
+            options['poll_interval'],
+            options['once'],
+        )
+        if options['processes'] == 1:
+            run_worker(*worker_args)
+            return
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=run_worker, args=worker_args)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+
+        def stop(*args):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for process in processes:
+            process.join()
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-19 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Schedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Задача')),
+                ('next_run_at', models.DateTimeField(verbose_name='Следующий запуск')),
+                ('last_run_at', models.DateTimeField(blank=True, null=True, verbose_name='Предыдущий запуск')),
+            ],
+            options={
+                'verbose_name': 'объект "Расписание задачи"',
+                'verbose_name_plural': 'Расписание задач',
+            },
+        ),
+    ]
@@ -0,0 +1,116 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Модель для фоновой задачи в очереди."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+    name = models.CharField(
+        verbose_name='Задача',
+        max_length=255,
+    )
+    args = models.JSONField(
+        verbose_name='Аргументы',
+        default=list,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    dedup_key = models.CharField(
+        verbose_name='Ключ дедупликации',
+        max_length=255,
+        null=True,
+        blank=True,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0,
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток',
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Запустить после',
+        default=timezone.now,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+    started_at = models.DateTimeField(
+        verbose_name='Дата запуска',
+        null=True,
+        blank=True,
+    )
+    finished_at = models.DateTimeField(
+        verbose_name='Дата завершения',
+        null=True,
+        blank=True,
+    )
+    worker = models.CharField(
+        verbose_name='Воркер',
+        max_length=255,
+        blank=True,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = 'объект "Фоновая задача"'
+        verbose_name_plural = 'Фоновые задачи'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=Q(status='queued'),
+                name='unique_queued_job_dedup_key',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'],
+                name='job_status_run_at_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.name} ({self.get_status_display()})'
+
+
+class Schedule(models.Model):
+    """Модель для расписания периодической задачи."""
+    name = models.CharField(
+        verbose_name='Задача',
+        max_length=255,
+        unique=True,
+    )
+    next_run_at = models.DateTimeField(
+        verbose_name='Следующий запуск',
+    )
+    last_run_at = models.DateTimeField(
+        verbose_name='Предыдущий запуск',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'объект "Расписание задачи"'
+        verbose_name_plural = 'Расписание задач'
+
+    def __str__(self) -> str:
+        return self.name
@@ -0,0 +1,293 @@
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (DatabaseError, IntegrityError, close_old_connections,
+                       transaction)
+from django.db.models import Avg, Count, F, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from jobs.models import Job, Schedule
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def get_task_name(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def task(func=None, *, max_attempts=None):
+    """Регистрирует функцию как фоновую задачу.
+
+    Аргументы задачи хранятся в JSON, поэтому должны в него
+    сериализоваться.
+    """
+    def register(func):
+        TASKS[get_task_name(func)] = (func, max_attempts)
+        return func
+
+    return register if func is None else register(func)
+
+
+def enqueue(func, *args, dedup_key=None, delay=0):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Задача станет видна воркерам после коммита. Пока в очереди ждёт
+    задача с тем же dedup_key, новая не добавляется. При JOBS['EAGER']
+    задача выполняется в процессе сразу после коммита.
+    """
+    name = get_task_name(func)
+    if name not in TASKS:
+        raise ValueError(f'{name} не зарегистрирована как задача')
+    if settings.JOBS['EAGER']:
+        transaction.on_commit(lambda: run_eagerly(func, args))
+        return
+    Job.objects.bulk_create(
+        [Job(
+            name=name,
+            args=list(args),
+            dedup_key=dedup_key,
+            max_attempts=(
+                TASKS[name][1] or settings.JOBS['MAX_ATTEMPTS']
+            ),
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )],
+        ignore_conflicts=dedup_key is not None,
+    )
+
+
+def run_eagerly(func, args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Ошибка в задаче %s', get_task_name(func))
+
+
+def get_backoff(attempts):
+    """Задержка перед повтором: экспонента с разбросом до 10%."""
+    delay = min(
+        settings.JOBS['BACKOFF'] * 2 ** (attempts - 1),
+        settings.JOBS['MAX_BACKOFF'],
+    )
+    return timedelta(seconds=delay * random.uniform(1, 1.1))
+
+
+def requeue(job, error, run_at):
+    """Возвращает задачу в очередь для повтора.
+
+    Если в очереди уже ждёт задача с тем же ключом, повтор не нужен:
+    она сделает ту же работу.
+    """
+    try:
+        with transaction.atomic():
+            Job.objects.filter(id=job.id).update(
+                status=Job.QUEUED,
+                run_at=run_at,
+                last_error=error,
+            )
+    except IntegrityError:
+        Job.objects.filter(id=job.id).update(
+            status=Job.DONE,
+            finished_at=timezone.now(),
+            last_error=error,
+        )
+
+
+def claim_job(worker):
+    """Забирает одну готовую к запуску задачу.
+
+    SKIP LOCKED позволяет нескольким воркерам разбирать очередь
+    параллельно, не блокируя друг друга на одних и тех же строках.
+    """
+    with transaction.atomic():
+        job = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.QUEUED,
+            run_at__lte=timezone.now(),
+        ).order_by('run_at', 'id').first()
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.started_at = timezone.now()
+        job.worker = worker
+        job.save(update_fields=('status', 'attempts', 'started_at', 'worker'))
+    return job
+
+
+def execute_job(job):
+    """Выполняет задачу и записывает результат."""
+    if job.name not in TASKS:
+        try:
+            import_string(job.name)
+        except ImportError:
+            pass
+    try:
+        func, _ = TASKS[job.name]
+        func(*job.args)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Ошибка в задаче %s #%s', job.name, job.id)
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(id=job.id).update(
+                status=Job.FAILED,
+                finished_at=timezone.now(),
+                last_error=error,
+            )
+        else:
+            requeue(job, error, timezone.now() + get_backoff(job.attempts))
+        return False
+    Job.objects.filter(id=job.id).update(
+        status=Job.DONE,
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def requeue_stale_jobs():
+    """Возвращает в очередь задачи воркеров, завершившихся аварийно."""
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        started_at__lt=timezone.now() - timedelta(
+            seconds=settings.JOBS['TIMEOUT'],
+        ),
+    )
+    for job in stale:
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(id=job.id).update(
+                status=Job.FAILED,
+                finished_at=timezone.now(),
+                last_error='Превышено время выполнения',
+            )
+        else:
+            requeue(job, 'Превышено время выполнения', timezone.now())
+
+
+def purge_jobs(days):
+    """Удаляет выполненные задачи старше days дней."""
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE,
+        finished_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
+
+
+def get_metrics(hours=1):
+    """Размер очереди, задержка и статистика задач за последние часы."""
+    now = timezone.now()
+    since = now - timedelta(hours=hours)
+    statuses = dict(
+        Job.objects.values_list('status').annotate(count=Count('id'))
+    )
+    oldest = Job.objects.filter(
+        status=Job.QUEUED,
+        run_at__lte=now,
+    ).aggregate(oldest=Min('run_at'))['oldest']
+    tasks = Job.objects.filter(finished_at__gte=since).values('name').annotate(
+        done=Count('id', filter=Q(status=Job.DONE)),
+        failed=Count('id', filter=Q(status=Job.FAILED)),
+        duration=Avg(F('finished_at') - F('started_at')),
+    ).order_by('name')
+    return {
+        'statuses': statuses,
+        'lag': (now - oldest).total_seconds() if oldest else 0,
+        'tasks': list(tasks),
+    }
+
+
+def schedule_periodic_jobs():
+    """Ставит в очередь периодические задачи из JOBS['PERIODIC'].
+
+    Задача получает число секунд с предыдущего запуска. Время
+    следующего запуска сдвигается условным UPDATE, поэтому при
+    нескольких воркерах задачу ставит в очередь ровно один из них.
+    """
+    now = timezone.now()
+    for name, interval in settings.JOBS['PERIODIC'].items():
+        schedule, _ = Schedule.objects.get_or_create(
+            name=name,
+            defaults={'next_run_at': now},
+        )
+        if schedule.next_run_at > now:
+            continue
+        with transaction.atomic():
+            claimed = Schedule.objects.filter(
+                id=schedule.id,
+                next_run_at=schedule.next_run_at,
+            ).update(
+                next_run_at=now + timedelta(seconds=interval),
+                last_run_at=now,
+            )
+            if not claimed:
+                continue
+            elapsed = interval
+            if schedule.last_run_at is not None:
+                elapsed = (now - schedule.last_run_at).total_seconds()
+            enqueue(import_string(name), elapsed)
+
+
+class Worker:
+    """Воркер очереди с пулом потоков."""
+    def __init__(self, threads=1, poll_interval=1, once=False):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.once = once
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopped = threading.Event()
+        self.purged_at = None
+
+    def stop(self, *args):
+        self.stopped.set()
+
+    def maintain(self):
+        requeue_stale_jobs()
+        schedule_periodic_jobs()
+        now = timezone.now()
+        if self.purged_at is None or now - self.purged_at > timedelta(
+            hours=1,
+        ):
+            purge_jobs(settings.JOBS['RETENTION_DAYS'])
+            self.purged_at = now
+
+    def work(self, number):
+        name = f'{self.name}:{number}'
+        try:
+            while not self.stopped.is_set():
+                close_old_connections()
+                try:
+                    job = claim_job(name)
+                except DatabaseError:
+                    logger.exception('Не удалось получить задачу')
+                    self.stopped.wait(self.poll_interval)
+                    continue
+                if job is not None:
+                    execute_job(job)
+                elif self.once:
+                    return
+                else:
+                    self.stopped.wait(self.poll_interval)
+        finally:
+            close_old_connections()
+
+    def run(self):
+        """Запускает потоки и ждёт их завершения или сигнала остановки."""
+        self.maintain()
+        threads = [
+            threading.Thread(target=self.work, args=(number,))
+            for number in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            if self.stopped.wait(self.poll_interval * 30):
+                break
+            self.maintain()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,78 @@
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim_job, enqueue, execute_job, task
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def fail(value):
+    raise ValueError(value)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_queued(self):
+        job = claim_job('tests')
+        while job is not None:
+            execute_job(job)
+            job = claim_job('tests')
+
+    def test_job_runs_after_enqueue(self):
+        enqueue(remember, 'value')
+        self.assertEqual(calls, [])
+        self.run_queued()
+        self.assertEqual(calls, ['value'])
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+    def test_dedup_key_skips_waiting_duplicates(self):
+        enqueue(remember, 1, dedup_key='remember')
+        enqueue(remember, 2, dedup_key='remember')
+        self.run_queued()
+        self.assertEqual(calls, [1])
+        enqueue(remember, 3, dedup_key='remember')
+        self.run_queued()
+        self.assertEqual(calls, [1, 3])
+
+    def test_delay(self):
+        enqueue(remember, 'later', delay=60)
+        self.run_queued()
+        self.assertEqual(calls, [])
+
+    def test_failed_job_is_retried_then_failed(self):
+        enqueue(fail, 'boom')
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.run_queued()
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('boom', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.run_queued()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_unregistered_task(self):
+        with self.assertRaises(ValueError):
+            enqueue(print, 'value')
+
+    def test_eager_runs_after_commit(self):
+        with override_settings(JOBS={'EAGER': True}):
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue(remember, 'eager')
+                self.assertEqual(calls, [])
+        self.assertEqual(calls, ['eager'])
+        self.assertFalse(Job.objects.exists())
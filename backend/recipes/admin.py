@@ -1,7 +1,8 @@
 from django.contrib import admin
 
-from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                            ShoppingCart, Tag)
+from recipes.models import (ChangeLogEntry, Favorite, FeedEntry, Ingredient,
+                            IngredientRecipe, PopularAuthor, Recipe,
+                            ShoppingCart, StoredImage, Tag)
 
 admin.site.empty_value_display = 'Не задано'
 
@@ -118,3 +119,47 @@ class ShoppingCartAdmin(admin.ModelAdmin):
         'user',
         'recipe',
     )
+
+
+@admin.register(FeedEntry)
+class FeedEntryAdmin(admin.ModelAdmin):
+    """Админ модель для ленты подписок."""
+    list_display = (
+        'user',
+        'author',
+        'recipe',
+    )
+
+
+@admin.register(PopularAuthor)
+class PopularAuthorAdmin(admin.ModelAdmin):
+    """Админ модель для популярных авторов."""
+    list_display = (
+        'author',
+    )
+
+
+@admin.register(StoredImage)
+class StoredImageAdmin(admin.ModelAdmin):
+    """Админ модель для файлов картинок."""
+    list_display = (
+        'name',
+        'references',
+    )
+    search_fields = (
+        'name',
+    )
+
+
+@admin.register(ChangeLogEntry)
+class ChangeLogEntryAdmin(admin.ModelAdmin):
+    """Админ модель для журнала изменений."""
+    list_display = (
+        'created_at',
+        'recipe_id',
+        'action',
+        'user',
+    )
+    list_filter = (
+        'action',
+    )
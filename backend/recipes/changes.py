@@ -0,0 +1,207 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from jobs.queue import task
+from recipes.models import ChangeLogEntry, Recipe
+from recipes.signals import recipes_touched
+
+MAX_TXID = 2 ** 63 - 1
+TOUCH_BATCH_SIZE = 1000
+
+USER_ACTIONS = {
+    ChangeLogEntry.FAVORITED: ('favorites', True),
+    ChangeLogEntry.UNFAVORITED: ('favorites', False),
+    ChangeLogEntry.ADDED_TO_CART: ('shopping_cart', True),
+    ChangeLogEntry.REMOVED_FROM_CART: ('shopping_cart', False),
+}
+
+
+def get_current_txid():
+    """id текущей транзакции Postgres.
+
+    В других базах запись сериализуется, поэтому порядок id записей
+    совпадает с порядком коммитов и txid не нужен.
+    """
+    if connection.vendor != 'postgresql':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_current()')
+        return cursor.fetchone()[0]
+
+
+def get_synced_txid():
+    """Граница чтения журнала.
+
+    id записей выдаются при вставке, а видны после коммита, поэтому
+    журнал читается по (txid, id) и только до xmin текущего снимка: все
+    транзакции с меньшим txid уже завершены, и запись с курсором меньше
+    прочитанного позже не появится.
+    """
+    if connection.vendor != 'postgresql':
+        return MAX_TXID
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0]
+
+
+def log_changes(action, recipe_ids, user_id=None):
+    """Записывает действие над рецептами в журнал изменений."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    txid = get_current_txid()
+    ChangeLogEntry.objects.bulk_create(
+        ChangeLogEntry(
+            txid=txid,
+            user_id=user_id,
+            recipe_id=recipe_id,
+            action=action,
+        )
+        for recipe_id in recipe_ids
+    )
+
+
+@task
+def touch_recipes(recipe_ids):
+    """Обновляет дату изменения рецептов без вызова save(), отмечает их
+    в журнале изменений и сообщает об этом сигналом recipes_touched."""
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), TOUCH_BATCH_SIZE):
+        batch = recipe_ids[start:start + TOUCH_BATCH_SIZE]
+        Recipe.objects.filter(id__in=batch).update(updated_at=timezone.now())
+        log_changes(ChangeLogEntry.UPDATED, batch)
+        recipes_touched.send(sender=Recipe, recipe_ids=batch)
+
+
+class TouchedRecipes:
+    """Отметка о рецептах, уже отмеченных изменёнными в транзакции.
+
+    Лежит среди callback'ов on_commit соединения и при коммите ничего
+    не делает. При откате транзакции или точки сохранения, в которой
+    рецепты отмечались, Django убирает её вместе с остальными.
+    """
+    def __init__(self, recipe_ids):
+        self.recipe_ids = recipe_ids
+
+    def __call__(self):
+        pass
+
+
+def get_touched_recipes():
+    return {
+        recipe_id
+        for _, callback, _ in connection.run_on_commit
+        if isinstance(callback, TouchedRecipes)
+        for recipe_id in callback.recipe_ids
+    }
+
+
+def mark_touched(recipe_ids):
+    """Отмечает рецепты изменёнными до конца текущей транзакции."""
+    transaction.on_commit(TouchedRecipes(set(recipe_ids)))
+
+
+def touch_recipes_once(recipe_ids):
+    """touch_recipes для рецептов, ещё не отмеченных в транзакции.
+
+    Правка рецепта вызывает сигналы сохранения, тегов и каждого
+    ингредиента, а в журнал и кеш попадает один раз.
+    """
+    recipe_ids = set(recipe_ids)
+    if connection.in_atomic_block:
+        recipe_ids -= get_touched_recipes()
+        if recipe_ids:
+            mark_touched(recipe_ids)
+    if recipe_ids:
+        touch_recipes(sorted(recipe_ids))
+
+
+@task
+def touch_related_recipes(relation, related_id):
+    """Отмечает изменёнными рецепты тега или ингредиента."""
+    touch_recipes(Recipe.objects.filter(
+        **{relation: related_id},
+    ).values_list('id', flat=True))
+
+
+def get_last_cursor(until):
+    """Курсор последней записи журнала, которую можно прочитать."""
+    return ChangeLogEntry.objects.filter(
+        txid__lt=until,
+    ).order_by('-txid', '-id').values_list('txid', 'id').first() or (0, 0)
+
+
+def get_first_cursor(since):
+    """Курсор, после которого начинаются записи не раньше since."""
+    entry = ChangeLogEntry.objects.filter(
+        created_at__gte=since,
+    ).order_by('txid', 'id').values_list('txid', 'id').first()
+    if entry is None:
+        return get_last_cursor(get_synced_txid())
+    txid, entry_id = entry
+    return txid, entry_id - 1
+
+
+def get_changes(user, after, limit, until):
+    """Записи журнала после курсора after, видимые пользователю, по
+    порядку (txid, id)."""
+    txid, entry_id = after
+    entries = ChangeLogEntry.objects.filter(
+        Q(txid__gt=txid) | Q(txid=txid, id__gt=entry_id),
+        txid__lt=until,
+    )
+    if user.is_authenticated:
+        entries = entries.filter(Q(user=None) | Q(user=user))
+    else:
+        entries = entries.filter(user=None)
+    return list(entries.order_by('txid', 'id').values_list(
+        'txid',
+        'id',
+        'created_at',
+        'recipe_id',
+        'action',
+    )[:limit])
+
+
+def summarize_changes(entries):
+    """Сворачивает записи: для каждого рецепта важно последнее действие."""
+    recipes = {}
+    relations = {'favorites': {}, 'shopping_cart': {}}
+    for _, _, _, recipe_id, action in entries:
+        if action in USER_ACTIONS:
+            relation, added = USER_ACTIONS[action]
+            relations[relation][recipe_id] = added
+        else:
+            recipes[recipe_id] = action
+    summary = {
+        'updated': [
+            recipe_id for recipe_id, action in recipes.items()
+            if action == ChangeLogEntry.UPDATED
+        ],
+        'deleted': [
+            recipe_id for recipe_id, action in recipes.items()
+            if action == ChangeLogEntry.DELETED
+        ],
+    }
+    for relation, changes in relations.items():
+        summary[relation] = {
+            'added': [
+                recipe_id for recipe_id, added in changes.items() if added
+            ],
+            'removed': [
+                recipe_id for recipe_id, added in changes.items()
+                if not added
+            ],
+        }
+    return summary
+
+
+def prune_changes(days):
+    """Удаляет записи старше days дней."""
+    deleted, _ = ChangeLogEntry.objects.filter(
+        created_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
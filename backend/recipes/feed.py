@@ -0,0 +1,183 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from jobs.queue import enqueue, task
+from recipes.models import FeedEntry, PopularAuthor, Recipe
+from users.models import Subscriber
+
+POPULAR_AUTHORS_KEY = 'feed_popular_authors'
+
+
+def get_popular_authors():
+    """Авторы, рецепты которых читаются в ленту напрямую, а не рассылаются.
+
+    Множество хранится в PopularAuthor, его обновляет периодическая
+    задача refresh_popular_authors, а в кеше лежит его копия.
+    """
+    authors = cache.get(POPULAR_AUTHORS_KEY)
+    if authors is None:
+        authors = frozenset(
+            PopularAuthor.objects.values_list('author_id', flat=True)
+        )
+        cache.set(
+            POPULAR_AUTHORS_KEY,
+            authors,
+            settings.FEED_POPULAR_AUTHORS_CACHE_TIMEOUT,
+        )
+    return authors
+
+
+@task
+def refresh_popular_authors(elapsed=None):
+    """Пересчитывает популярных авторов по числу подписчиков.
+
+    Рецепты, опубликованные автором, пока он был популярным, в ленты не
+    рассылались. Поэтому автору, который перестал быть популярным,
+    ставится в очередь backfill_author. Новому популярному автору
+    ничего не нужно: его рецепты подмешиваются в ленту при чтении.
+    """
+    current = set(
+        Subscriber.objects.values('author').annotate(
+            followers=Count('id'),
+        ).filter(
+            followers__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+        ).values_list('author', flat=True)
+    )
+    with transaction.atomic():
+        previous = set(
+            PopularAuthor.objects.select_for_update().values_list(
+                'author_id',
+                flat=True,
+            )
+        )
+        PopularAuthor.objects.bulk_create(
+            [
+                PopularAuthor(author_id=author_id)
+                for author_id in current - previous
+            ],
+            ignore_conflicts=True,
+        )
+        PopularAuthor.objects.filter(
+            author_id__in=previous - current,
+        ).delete()
+        transaction.on_commit(lambda: cache.delete(POPULAR_AUTHORS_KEY))
+        for author_id in previous - current:
+            enqueue(
+                backfill_author, author_id,
+                dedup_key=f'backfill_author:{author_id}',
+            )
+
+
+def create_entries(entries):
+    """Сохраняет записи ленты пачками по FEED_BATCH_SIZE."""
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= settings.FEED_BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def get_recent_recipe_ids(author_id):
+    return list(Recipe.objects.filter(
+        author_id=author_id,
+    ).order_by('-id').values_list(
+        'id',
+        flat=True,
+    )[:settings.FEED_BACKFILL_SIZE])
+
+
+def iter_follower_ids(author_id):
+    return Subscriber.objects.filter(
+        author_id=author_id,
+    ).values_list('user_id', flat=True).iterator(
+        chunk_size=settings.FEED_BATCH_SIZE,
+    )
+
+
+@task
+def fan_out_recipe(recipe_id):
+    """Добавляет новый рецепт в ленты подписчиков автора."""
+    recipe = Recipe.objects.filter(id=recipe_id).only('author_id').first()
+    if recipe is None or recipe.author_id in get_popular_authors():
+        return
+    create_entries(
+        FeedEntry(
+            user_id=user_id,
+            author_id=recipe.author_id,
+            recipe_id=recipe_id,
+        )
+        for user_id in iter_follower_ids(recipe.author_id)
+    )
+
+
+@task
+def backfill_author(author_id):
+    """Добавляет последние рецепты автора в ленты всех его подписчиков,
+    если он не популярен."""
+    if author_id in get_popular_authors():
+        return
+    recipe_ids = get_recent_recipe_ids(author_id)
+    create_entries(
+        FeedEntry(user_id=user_id, author_id=author_id, recipe_id=recipe_id)
+        for user_id in iter_follower_ids(author_id)
+        for recipe_id in recipe_ids
+    )
+
+
+@task
+def sync_author(user_id, author_id):
+    """Приводит рецепты автора в ленте к текущему состоянию подписки.
+
+    Подписка и отписка ставят одну задачу с общим ключом, а задача
+    перечитывает Subscriber, поэтому быстрая переподписка не теряется,
+    в каком бы порядке ни выполнялись задачи.
+    """
+    subscribed = Subscriber.objects.filter(
+        user_id=user_id,
+        author_id=author_id,
+    ).exists()
+    if not subscribed:
+        FeedEntry.objects.filter(
+            user_id=user_id,
+            author_id=author_id,
+        ).delete()
+        return
+    if author_id in get_popular_authors():
+        return
+    create_entries(
+        FeedEntry(user_id=user_id, author_id=author_id, recipe_id=recipe_id)
+        for recipe_id in get_recent_recipe_ids(author_id)
+    )
+
+
+def get_feed_recipe_ids(user, before=None, limit=None):
+    """Возвращает id рецептов ленты, начиная с рецепта до before.
+
+    Рецепты из таблицы ленты читаются одним проходом по индексу, к ним
+    подмешиваются свежие рецепты популярных авторов из подписок.
+    """
+    entries = FeedEntry.objects.filter(user=user)
+    popular = get_popular_authors()
+    if popular:
+        popular = list(Subscriber.objects.filter(
+            user=user,
+            author_id__in=popular,
+        ).values_list('author_id', flat=True))
+    pulled = Recipe.objects.filter(author_id__in=popular)
+    if before is not None:
+        entries = entries.filter(recipe_id__lt=before)
+        pulled = pulled.filter(id__lt=before)
+    recipe_ids = set(entries.order_by('-recipe_id').values_list(
+        'recipe_id',
+        flat=True,
+    )[:limit])
+    if popular:
+        recipe_ids.update(pulled.order_by('-id').values_list(
+            'id',
+            flat=True,
+        )[:limit])
+    return sorted(recipe_ids, reverse=True)[:limit]
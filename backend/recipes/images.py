@@ -0,0 +1,70 @@
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from recipes.models import Recipe, StoredImage
+from recipes.storage import image_storage
+
+ACQUIRE_IMAGE_SQL = '''
+    INSERT INTO {table} (name, {references}) VALUES (%s, 1)
+    ON CONFLICT (name) DO UPDATE SET {references} = {table}.{references} + 1
+'''
+
+
+def acquire_image(name):
+    """Увеличивает число рецептов, ссылающихся на файл.
+
+    Учёт создаётся и увеличивается одним UPSERT, поэтому параллельное
+    удаление учёта в delete_unreferenced не теряет ссылку.
+    """
+    if not name:
+        return
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            ACQUIRE_IMAGE_SQL.format(
+                table=quote_name(StoredImage._meta.db_table),
+                references=quote_name('references'),
+            ),
+            [name],
+        )
+
+
+def delete_unreferenced(name, deadline):
+    """Удаляет учёт и файл, на который не ссылается ни один рецепт.
+
+    Ссылки перепроверяются под блокировкой строки учёта. Файл остаётся,
+    если его сохраняли заново после deadline: ссылка на него могла ещё
+    не дойти до учёта. Возвращает True, если файл удалён.
+    """
+    with transaction.atomic():
+        image = StoredImage.objects.select_for_update().filter(
+            name=name,
+        ).first()
+        if image is not None and image.references:
+            return False
+        if Recipe.objects.filter(image=name).exists():
+            return False
+        if image is not None:
+            image.delete()
+        return image_storage.delete_if_unmodified(name, deadline)
+
+
+def release_image(name):
+    """Уменьшает число ссылок и удаляет файл, на который никто не ссылается.
+
+    Файл удаляется после коммита, если на него не появилось новых
+    ссылок и его не загружали заново за IMAGE_DELETE_GRACE секунд.
+    """
+    if not name:
+        return
+    StoredImage.objects.filter(name=name).update(
+        references=Greatest(F('references') - 1, 0),
+    )
+    transaction.on_commit(lambda: delete_unreferenced(
+        name,
+        time.time() - settings.IMAGE_DELETE_GRACE,
+    ))
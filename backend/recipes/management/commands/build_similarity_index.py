@@ -0,0 +1,116 @@
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.similarity import (estimate_similarity, get_buckets,
+                                get_signature, index_recipes)
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит MinHash/LSH-индекс похожих рецептов. С --benchmark '
+        'замеряет построение и поиск на сгенерированных данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--benchmark',
+            type=int,
+            metavar='N',
+            help='количество сгенерированных рецептов для замера',
+        )
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            return self.benchmark(options['benchmark'])
+        start_time = datetime.now()
+        recipe_ids = Recipe.objects.order_by('id').values_list(
+            'id',
+            flat=True,
+        )
+        batch = []
+        for recipe_id in recipe_ids.iterator():
+            batch.append(recipe_id)
+            if len(batch) >= options['batch_size']:
+                index_recipes(batch)
+                batch = []
+        if batch:
+            index_recipes(batch)
+        duration = datetime.now() - start_time
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Индекс похожих рецептов построен за '
+                f'{duration.total_seconds():.1f} секунд'
+            )
+        )
+
+    def benchmark(self, size, ingredients=2000, tags=10, queries=100):
+        generator = random.Random(0)
+        features = [
+            {
+                f'i{ingredient}' for ingredient in generator.sample(
+                    range(ingredients), generator.randint(5, 15),
+                )
+            } | {
+                f't{tag}' for tag in generator.sample(
+                    range(tags), generator.randint(1, 3),
+                )
+            }
+            for _ in range(size)
+        ]
+
+        start = time.perf_counter()
+        signatures = [get_signature(recipe) for recipe in features]
+        index = defaultdict(list)
+        for recipe_id, signature in enumerate(signatures):
+            for band, bucket in enumerate(get_buckets(signature)):
+                index[band, bucket].append(recipe_id)
+        build_time = time.perf_counter() - start
+
+        sample = generator.sample(range(size), min(queries, size))
+        start = time.perf_counter()
+        candidates_total = 0
+        for recipe_id in sample:
+            candidates = {
+                candidate
+                for band, bucket in enumerate(get_buckets(
+                    signatures[recipe_id]
+                ))
+                for candidate in index[band, bucket]
+            }
+            candidates.discard(recipe_id)
+            candidates_total += len(candidates)
+            sorted(
+                candidates,
+                key=lambda candidate: estimate_similarity(
+                    signatures[recipe_id], signatures[candidate],
+                ),
+                reverse=True,
+            )
+        lsh_time = (time.perf_counter() - start) / len(sample)
+
+        start = time.perf_counter()
+        for recipe_id in sample[:10]:
+            recipe = features[recipe_id]
+            sorted(
+                range(size),
+                key=lambda other: (
+                    len(recipe & features[other])
+                    / len(recipe | features[other])
+                ),
+                reverse=True,
+            )
+        brute_time = (time.perf_counter() - start) / len(sample[:10])
+
+        self.stdout.write(
+            f'Рецептов: {size}\n'
+            f'Построение индекса: {build_time:.2f} с\n'
+            f'Поиск через LSH: {lsh_time * 1000:.2f} мс, '
+            f'кандидатов в среднем {candidates_total / len(sample):.0f}\n'
+            f'Полный перебор по Жаккару: {brute_time * 1000:.2f} мс'
+        )
@@ -0,0 +1,126 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from recipes.images import delete_unreferenced
+from recipes.models import Recipe, StoredImage
+from recipes.storage import image_storage
+
+
+def iter_files(path):
+    """Обходит дерево каталогов, не собирая список файлов в памяти."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def iter_own_files(path):
+    """Файлы каталога без подкаталогов."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def get_referenced(names):
+    """Имена из names, на которые ссылаются рецепты или учёт ссылок."""
+    referenced = set(
+        Recipe.objects.filter(image__in=names).values_list('image', flat=True)
+    )
+    referenced.update(StoredImage.objects.filter(
+        name__in=names,
+        references__gt=0,
+    ).values_list('name', flat=True))
+    return referenced
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет файлы картинок, на которые не ссылается ни один рецепт. '
+        'Каталог картинок делится на шарды по подкаталогам, которые '
+        'обходятся параллельно; имена файлов сверяются с базой пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='не трогать файлы, изменённые за последние часы',
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.deadline = time.time() - options['grace_hours'] * 3600
+        self.root = root = image_storage.path(Recipe.image.field.upload_to)
+        if not os.path.isdir(root):
+            self.stdout.write(f'Каталог {root} не найден')
+            return
+        shards = [root]
+        with os.scandir(root) as entries:
+            shards.extend(
+                entry.path for entry in entries
+                if entry.is_dir(follow_symlinks=False)
+            )
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            results = list(executor.map(self.collect_shard, shards))
+        scanned = sum(result[0] for result in results)
+        orphaned = sum(result[1] for result in results)
+        reclaimed = sum(result[2] for result in results)
+        verb = 'Можно освободить' if options['dry_run'] else 'Освобождено'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Проверено файлов: {scanned}, без ссылок: {orphaned}. '
+                f'{verb} {reclaimed} байт ({reclaimed / 1024 / 1024:.1f} МБ)'
+            )
+        )
+
+    def collect_shard(self, path):
+        """Обрабатывает шард: из корня берутся только его собственные
+        файлы, подкаталоги обходят другие потоки."""
+        scanned = orphaned = reclaimed = 0
+        batch = {}
+        if path == self.root:
+            entries = iter_own_files(path)
+        else:
+            entries = iter_files(path)
+        try:
+            for entry in entries:
+                scanned += 1
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime > self.deadline:
+                    continue
+                name = os.path.relpath(entry.path, image_storage.location)
+                batch[name.replace(os.sep, '/')] = stat.st_size
+                if len(batch) >= self.options['batch_size']:
+                    count, size = self.collect_batch(batch)
+                    orphaned += count
+                    reclaimed += size
+                    batch = {}
+            count, size = self.collect_batch(batch)
+            return scanned, orphaned + count, reclaimed + size
+        finally:
+            connection.close()
+
+    def collect_batch(self, batch):
+        if not batch:
+            return 0, 0
+        orphans = set(batch) - get_referenced(list(batch))
+        if not self.options['dry_run']:
+            orphans = {
+                name for name in orphans
+                if delete_unreferenced(name, self.deadline)
+            }
+        if self.options['verbosity'] > 1:
+            for name in orphans:
+                self.stdout.write(f'{name} ({batch[name]} байт)')
+        return len(orphans), sum(batch[name] for name in orphans)
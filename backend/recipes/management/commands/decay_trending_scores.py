@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipes.scores import decay_trending_scores, get_decay_factor
+
+
+class Command(BaseCommand):
+    help = (
+        'Уменьшает рейтинг рецептов в трендах за --hours часов. Обычно '
+        "рейтинги уменьшает воркер очереди по JOBS['PERIODIC'], команда "
+        'нужна для ручного запуска.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=float,
+            default=1,
+            help='сколько часов прошло с предыдущего запуска',
+        )
+
+    def handle(self, *args, **options):
+        factor = get_decay_factor(options['hours'] * 3600)
+        reset = decay_trending_scores(factor)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Рейтинги уменьшены в {1 / factor:.3f} раза, '
+                f'обнулено рецептов: {reset}'
+            )
+        )
@@ -0,0 +1,69 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from recipes.changes import touch_recipes
+from recipes.models import Recipe, StoredImage
+from recipes.storage import image_storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки рецептов в хранилище с адресацией по '
+        'содержимому и пересчитывает ссылки на файлы. Рецепты с '
+        'перенесёнными картинками отмечаются изменёнными до удаления '
+        'старых файлов, поэтому кеши и клиенты синхронизации не получат '
+        'ссылок на удалённые файлы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        recipes = defaultdict(list)
+        for recipe_id, name in Recipe.objects.exclude(
+            image='',
+        ).values_list('id', 'image').iterator():
+            if not image_storage.is_content_addressed(name):
+                recipes[name].append(recipe_id)
+        moved = {}
+        for name, recipe_ids in recipes.items():
+            if not image_storage.exists(name):
+                self.stderr.write(f'Файл {name} не найден')
+                continue
+            with image_storage.open(name) as file:
+                if options['dry_run']:
+                    moved[name] = image_storage.get_content_name(name, file)
+                    continue
+                moved[name] = image_storage.save(name, file)
+            with transaction.atomic():
+                Recipe.objects.filter(id__in=recipe_ids).update(
+                    image=moved[name],
+                )
+                touch_recipes(recipe_ids)
+        if options['dry_run']:
+            self.stdout.write(f'Будет перенесено файлов: {len(moved)}')
+            return
+        for name in moved:
+            image_storage.delete(name)
+        images = Recipe.objects.exclude(image='').values('image')
+        references = images.annotate(references=Count('id'))
+        StoredImage.objects.bulk_create(
+            [
+                StoredImage(name=row['image'], references=row['references'])
+                for row in references
+            ],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['name'],
+            update_fields=['references'],
+        )
+        StoredImage.objects.exclude(name__in=images).update(references=0)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Перенесено файлов: {len(moved)}, '
+                f'учтено файлов: {len(references)}'
+            )
+        )
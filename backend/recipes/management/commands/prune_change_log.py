@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.changes import prune_changes
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из журнала изменений записи старше срока хранения. '
+        'Клиенты с более старым курсором получат 410 и выполнят полную '
+        'синхронизацию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.CHANGE_LOG_RETENTION_DAYS,
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_changes(options['days'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено записей журнала: {deleted}')
+        )
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_feed_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSignature',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('signature', models.JSONField(verbose_name='Сигнатура')),
+            ],
+            options={
+                'verbose_name': 'объект "Сигнатура рецепта"',
+                'verbose_name_plural': 'Сигнатуры рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField(verbose_name='Полоса')),
+                ('bucket', models.BigIntegerField(verbose_name='Корзина')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'объект "Корзина рецепта"',
+                'verbose_name_plural': 'Корзины рецептов',
+                'indexes': [models.Index(fields=['band', 'bucket'], name='recipe_bucket_idx')],
+                'constraints': [models.UniqueConstraint(fields=('recipe', 'band'), name='unique_recipe_band')],
+            },
+        ),
+    ]
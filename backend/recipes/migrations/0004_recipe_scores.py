@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:46
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+from foodgram import constants
+
+
+def fill_scores(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    recipes = Recipe.objects.annotate(
+        favorites_count=Count('favorites', distinct=True),
+        shopping_carts_count=Count('shopping_carts', distinct=True),
+    )
+    for recipe in recipes.iterator():
+        recipe.popularity = (
+            recipe.favorites_count * constants.FAVORITE_SCORE_WEIGHT
+            + recipe.shopping_carts_count
+            * constants.SHOPPING_CART_SCORE_WEIGHT
+        )
+        recipe.trending_score = recipe.popularity
+        recipe.save(update_fields=('popularity', 'trending_score'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_similarity_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity',
+            field=models.PositiveIntegerField(default=0, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, verbose_name='Рейтинг в трендах'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-popularity', '-id'], name='recipe_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-id'], name='recipe_trending_idx'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
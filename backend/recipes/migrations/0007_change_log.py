@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата')),
+                ('recipe_id', models.PositiveIntegerField(verbose_name='Рецепт')),
+                ('action', models.CharField(choices=[('updated', 'Изменён'), ('deleted', 'Удалён'), ('favorited', 'Добавлен в избранное'), ('unfavorited', 'Удалён из избранного'), ('added_to_cart', 'Добавлен в список покупок'), ('removed_from_cart', 'Удалён из списка покупок')], max_length=20, verbose_name='Действие')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'объект "Запись журнала изменений"',
+                'verbose_name_plural': 'Журнал изменений',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['user', 'id'], name='change_log_user_id_idx')],
+            },
+        ),
+    ]
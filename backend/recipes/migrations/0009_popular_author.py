@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-19 08:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_favorite_shopping_cart_created_at'),
+        ('users', '0003_alter_user_managers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularAuthor',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'объект "Популярный автор"',
+                'verbose_name_plural': 'Популярные авторы',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-19 08:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_popular_author'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='changelogentry',
+            options={'ordering': ['txid', 'id'], 'verbose_name': 'объект "Запись журнала изменений"', 'verbose_name_plural': 'Журнал изменений'},
+        ),
+        migrations.RemoveIndex(
+            model_name='changelogentry',
+            name='change_log_user_id_idx',
+        ),
+        migrations.AddField(
+            model_name='changelogentry',
+            name='txid',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Транзакция'),
+        ),
+        migrations.AlterField(
+            model_name='changelogentry',
+            name='recipe_id',
+            field=models.PositiveBigIntegerField(verbose_name='Рецепт'),
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['txid', 'id'], name='change_log_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['user', 'txid', 'id'], name='change_log_user_cursor_idx'),
+        ),
+    ]
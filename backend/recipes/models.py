@@ -4,6 +4,7 @@ from django.core.validators import (MaxValueValidator, MinValueValidator,
 from django.db import models
 
 from foodgram import constants
+from recipes.storage import get_image_storage
 
 User = get_user_model()
 
@@ -72,6 +73,7 @@ class Recipe(NameModel):
     )
     image = models.ImageField(
         upload_to='recipes_images',
+        storage=get_image_storage,
         verbose_name='Картинка',
     )
     text = models.TextField(
@@ -107,11 +109,37 @@ class Recipe(NameModel):
         ],
         verbose_name='Время приготовления',
     )
+    popularity = models.PositiveIntegerField(
+        verbose_name='Популярность',
+        default=0,
+    )
+    trending_score = models.FloatField(
+        verbose_name='Рейтинг в трендах',
+        default=0,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
 
     class Meta:
         ordering = ['-id']
         verbose_name = 'объект "Рецепт"'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['author', '-id'],
+                name='recipe_author_id_idx',
+            ),
+            models.Index(
+                fields=['-popularity', '-id'],
+                name='recipe_popularity_idx',
+            ),
+            models.Index(
+                fields=['-trending_score', '-id'],
+                name='recipe_trending_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -174,6 +202,10 @@ class FavoriteAndShoppingCartModel(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Рецепт',
     )
+    created_at = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+    )
 
     class Meta:
         abstract = True
@@ -215,3 +247,205 @@ class ShoppingCart(FavoriteAndShoppingCartModel):
         return (
             f'{self.user} добавил рецепт "{self.recipe}" в Список покупок'
         )
+
+
+class FeedEntry(models.Model):
+    """Модель для ленты рецептов от авторов из подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='feed_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='+',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+        related_name='feed_entries',
+    )
+
+    class Meta:
+        ordering = ['-recipe']
+        verbose_name = 'объект "Запись ленты"'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='feed_entry_user_author_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.recipe} в ленте {self.user}'
+
+
+class PopularAuthor(models.Model):
+    """Модель для автора, рецепты которого не рассылаются по лентам
+    подписчиков, а подмешиваются в ленту при чтении."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Автор',
+        related_name='+',
+    )
+
+    class Meta:
+        verbose_name = 'объект "Популярный автор"'
+        verbose_name_plural = 'Популярные авторы'
+
+    def __str__(self) -> str:
+        return str(self.author)
+
+
+class RecipeSignature(models.Model):
+    """Модель для MinHash-сигнатуры рецепта."""
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Рецепт',
+        related_name='signature',
+    )
+    signature = models.JSONField(
+        verbose_name='Сигнатура',
+    )
+
+    class Meta:
+        verbose_name = 'объект "Сигнатура рецепта"'
+        verbose_name_plural = 'Сигнатуры рецептов'
+
+    def __str__(self) -> str:
+        return f'Сигнатура рецепта {self.recipe_id}'
+
+
+class RecipeBucket(models.Model):
+    """Модель для LSH-корзины рецепта в одной из полос сигнатуры."""
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+        related_name='buckets',
+    )
+    band = models.PositiveSmallIntegerField(
+        verbose_name='Полоса',
+    )
+    bucket = models.BigIntegerField(
+        verbose_name='Корзина',
+    )
+
+    class Meta:
+        verbose_name = 'объект "Корзина рецепта"'
+        verbose_name_plural = 'Корзины рецептов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'band'],
+                name='unique_recipe_band',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['band', 'bucket'],
+                name='recipe_bucket_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Рецепт {self.recipe_id}: {self.band}/{self.bucket}'
+
+
+class StoredImage(models.Model):
+    """Модель для учёта ссылок рецептов на файлы картинок."""
+    name = models.CharField(
+        verbose_name='Файл',
+        max_length=255,
+        unique=True,
+    )
+    references = models.PositiveIntegerField(
+        verbose_name='Количество ссылок',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'объект "Файл картинки"'
+        verbose_name_plural = 'Файлы картинок'
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class ChangeLogEntry(models.Model):
+    """Модель для журнала изменений рецептов для синхронизации клиентов.
+
+    Записи с пустым user видны всем, остальные — только пользователю,
+    изменившему своё избранное или список покупок.
+    """
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    FAVORITED = 'favorited'
+    UNFAVORITED = 'unfavorited'
+    ADDED_TO_CART = 'added_to_cart'
+    REMOVED_FROM_CART = 'removed_from_cart'
+    ACTIONS = (
+        (UPDATED, 'Изменён'),
+        (DELETED, 'Удалён'),
+        (FAVORITED, 'Добавлен в избранное'),
+        (UNFAVORITED, 'Удалён из избранного'),
+        (ADDED_TO_CART, 'Добавлен в список покупок'),
+        (REMOVED_FROM_CART, 'Удалён из списка покупок'),
+    )
+    txid = models.PositiveBigIntegerField(
+        verbose_name='Транзакция',
+        default=0,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата',
+        auto_now_add=True,
+        db_index=True,
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='+',
+        null=True,
+        blank=True,
+    )
+    recipe_id = models.PositiveBigIntegerField(
+        verbose_name='Рецепт',
+    )
+    action = models.CharField(
+        verbose_name='Действие',
+        max_length=20,
+        choices=ACTIONS,
+    )
+
+    class Meta:
+        ordering = ['txid', 'id']
+        verbose_name = 'объект "Запись журнала изменений"'
+        verbose_name_plural = 'Журнал изменений'
+        indexes = [
+            models.Index(
+                fields=['txid', 'id'],
+                name='change_log_cursor_idx',
+            ),
+            models.Index(
+                fields=['user', 'txid', 'id'],
+                name='change_log_user_cursor_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Рецепт {self.recipe_id}: {self.get_action_display()}'
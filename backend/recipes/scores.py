@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from foodgram import constants
+from jobs.queue import task
+from recipes.models import Recipe
+
+
+def get_decay_factor(seconds):
+    """Во сколько раз уменьшается рейтинг в трендах за seconds секунд."""
+    return 0.5 ** (seconds / 3600 / settings.TRENDING_HALF_LIFE_HOURS)
+
+
+def change_score(recipe_id, weight, trending_weight=None):
+    """Меняет популярность рецепта на weight, а рейтинг в трендах — на
+    trending_weight, по умолчанию тоже на weight."""
+    if trending_weight is None:
+        trending_weight = weight
+    Recipe.objects.filter(id=recipe_id).update(
+        popularity=Greatest(F('popularity') + weight, 0),
+        trending_score=Greatest(F('trending_score') + trending_weight, 0.0),
+    )
+
+
+def decay_trending_scores(factor):
+    """Уменьшает рейтинг в трендах у всех рецептов в factor раз.
+
+    Слишком маленькие рейтинги обнуляются, чтобы не держать в индексе
+    рецепты, которые уже давно не набирают активности.
+    """
+    Recipe.objects.filter(trending_score__gt=0).update(
+        trending_score=F('trending_score') * factor,
+    )
+    return Recipe.objects.filter(
+        trending_score__gt=0,
+        trending_score__lt=constants.MIN_TRENDING_SCORE,
+    ).update(trending_score=0)
+
+
+@task
+def decay_trending(elapsed):
+    """Периодическая задача: уменьшает рейтинги за прошедшие elapsed
+    секунд."""
+    decay_trending_scores(get_decay_factor(elapsed))
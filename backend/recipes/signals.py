@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Отправляется после QuerySet.update(), изменившего рецепты в обход
+# save(): такое обновление не вызывает post_save. Аргумент:
+# recipe_ids — id изменённых рецептов.
+recipes_touched = Signal()
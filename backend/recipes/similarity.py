@@ -0,0 +1,143 @@
+import hashlib
+import random
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+
+from foodgram import constants
+from jobs.queue import enqueue, task
+from recipes.models import (IngredientRecipe, Recipe, RecipeBucket,
+                            RecipeSignature)
+
+MERSENNE_PRIME = (1 << 61) - 1
+ROWS_PER_BAND = constants.MINHASH_PERMUTATIONS // constants.LSH_BANDS
+
+_random = random.Random(42)
+PERMUTATIONS = [
+    (_random.randrange(1, MERSENNE_PRIME), _random.randrange(MERSENNE_PRIME))
+    for _ in range(constants.MINHASH_PERMUTATIONS)
+]
+
+
+def hash_value(value):
+    """Стабильный между процессами 64-битный хеш со знаком."""
+    return int.from_bytes(
+        hashlib.blake2b(str(value).encode(), digest_size=8).digest(),
+        'big',
+        signed=True,
+    )
+
+
+def get_signature(features):
+    """Считает MinHash-сигнатуру множества признаков рецепта."""
+    hashes = [hash_value(feature) % MERSENNE_PRIME for feature in features]
+    return [
+        min((a * value + b) % MERSENNE_PRIME for value in hashes)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def get_buckets(signature):
+    """Разбивает сигнатуру на полосы и возвращает корзину каждой полосы."""
+    return [
+        hash_value(tuple(signature[start:start + ROWS_PER_BAND]))
+        for start in range(0, len(signature), ROWS_PER_BAND)
+    ]
+
+
+def estimate_similarity(first, second):
+    """Оценка коэффициента Жаккара по двум сигнатурам."""
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+def get_features(recipe_ids):
+    """Собирает признаки рецептов: ингредиенты и теги."""
+    features = defaultdict(set)
+    for recipe_id, ingredient_id in IngredientRecipe.objects.filter(
+        recipe_id__in=recipe_ids,
+    ).values_list('recipe_id', 'ingredient_id'):
+        features[recipe_id].add(f'i{ingredient_id}')
+    for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids,
+    ).values_list('recipe_id', 'tag_id'):
+        features[recipe_id].add(f't{tag_id}')
+    return features
+
+
+@task
+def index_recipes(recipe_ids):
+    """Пересчитывает сигнатуры и корзины для переданных рецептов.
+
+    Рецепт без ингредиентов и тегов получает пустую сигнатуру без
+    корзин: похожих у него нет, и индексировать его снова не нужно.
+    """
+    recipe_ids = list(recipe_ids)
+    features = get_features(recipe_ids)
+    existing = set(Recipe.objects.filter(
+        id__in=recipe_ids,
+    ).values_list('id', flat=True))
+    signatures = []
+    buckets = []
+    for recipe_id in existing:
+        recipe_features = features.get(recipe_id)
+        if not recipe_features:
+            signatures.append(
+                RecipeSignature(recipe_id=recipe_id, signature=[])
+            )
+            continue
+        signature = get_signature(recipe_features)
+        signatures.append(
+            RecipeSignature(recipe_id=recipe_id, signature=signature)
+        )
+        buckets.extend(
+            RecipeBucket(recipe_id=recipe_id, band=band, bucket=bucket)
+            for band, bucket in enumerate(get_buckets(signature))
+        )
+    with transaction.atomic():
+        RecipeSignature.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeBucket.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeSignature.objects.bulk_create(signatures)
+        RecipeBucket.objects.bulk_create(buckets)
+
+
+def enqueue_index_recipe(recipe_id):
+    enqueue(
+        index_recipes, [recipe_id],
+        dedup_key=f'index_recipes:{recipe_id}',
+    )
+
+
+def get_similar_recipe_ids(recipe_id, limit):
+    """Возвращает id похожих рецептов по убыванию сходства.
+
+    Кандидатами считаются только рецепты, попавшие с исходным хотя бы
+    в одну корзину, поэтому запрос не перебирает весь каталог. Если
+    рецепт ещё не проиндексирован, индексация ставится в очередь, а
+    похожих пока нет.
+    """
+    signature = RecipeSignature.objects.filter(recipe_id=recipe_id).first()
+    if signature is None:
+        enqueue_index_recipe(recipe_id)
+        return []
+    if not signature.signature:
+        return []
+    buckets = get_buckets(signature.signature)
+    candidates = RecipeBucket.objects.filter(
+        reduce(or_, (
+            Q(band=band, bucket=bucket)
+            for band, bucket in enumerate(buckets)
+        )),
+    ).exclude(
+        recipe_id=recipe_id,
+    ).values_list('recipe_id', flat=True).distinct()
+    scored = [
+        (estimate_similarity(signature.signature, candidate), candidate_id)
+        for candidate_id, candidate in RecipeSignature.objects.filter(
+            recipe_id__in=candidates,
+        ).values_list('recipe_id', 'signature')
+    ]
+    scored.sort(reverse=True)
+    return [candidate_id for _, candidate_id in scored[:limit]]
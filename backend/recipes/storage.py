@@ -0,0 +1,110 @@
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.core.files import locks
+from django.core.files.storage import FileSystemStorage
+
+LOCK_NAME = '.lock'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по SHA-256 их содержимого.
+
+    Файлы раскладываются по подкаталогам из первых символов хеша, а
+    повторная загрузка той же картинки не пишет файл заново.
+    """
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        digest = digest.hexdigest()
+        return os.path.join(
+            os.path.dirname(name),
+            digest[:2],
+            digest[2:4],
+            digest + os.path.splitext(name)[1].lower(),
+        )
+
+    def is_content_addressed(self, name):
+        """Проверяет, что файл уже лежит по адресу из своего хеша."""
+        parts = name.split('/')
+        return (
+            len(parts) >= 3
+            and len(parts[-3]) == 2
+            and len(parts[-2]) == 2
+            and parts[-1].startswith(parts[-3] + parts[-2])
+        )
+
+    @contextmanager
+    def lock(self):
+        """Блокировка хранилища, общая для всех процессов."""
+        os.makedirs(self.location, exist_ok=True)
+        with open(os.path.join(self.location, LOCK_NAME), 'wb') as file:
+            locks.lock(file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(file)
+
+    def touch(self, path):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def save(self, name, content, max_length=None):
+        """Сохраняет файл под именем из хеша содержимого.
+
+        Файл пишется во временный и ссылкой переносится на итоговое имя,
+        поэтому параллельная загрузка той же картинки не создаёт копий.
+        Если файл уже есть, ему обновляется mtime: новая ссылка на файл
+        продлевает ему отсрочку от удаления в delete_if_unmodified.
+        """
+        name = self.get_content_name(name, content)
+        path = self.path(name)
+        with self.lock():
+            if self.touch(path):
+                return name
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            with self.lock():
+                try:
+                    os.link(temp_path, path)
+                except FileExistsError:
+                    os.utime(path)
+        finally:
+            os.remove(temp_path)
+        return name
+
+    def delete_if_unmodified(self, name, deadline):
+        """Удаляет файл, если его не сохраняли заново после deadline."""
+        path = self.path(name)
+        with self.lock():
+            try:
+                if os.stat(path).st_mtime > deadline:
+                    return False
+            except FileNotFoundError:
+                return False
+            os.remove(path)
+        return True
+
+
+image_storage = ContentAddressedStorage()
+
+
+def get_image_storage():
+    return image_storage
@@ -1,10 +1,28 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.contrib.auth.password_validation import validate_password
 from django.core.validators import RegexValidator
 from django.db import models
 from django.db.models import F, Q
 
 from foodgram import constants
+from users.signals import credentials_changed
+
+CREDENTIAL_FIELDS = frozenset(('is_active', 'password'))
+
+
+class UserQuerySet(models.QuerySet):
+    """Queryset пользователей, сообщающий о массовой смене учётных данных."""
+    def update(self, **kwargs):
+        if CREDENTIAL_FIELDS.isdisjoint(kwargs):
+            return super().update(**kwargs)
+        user_ids = list(self.values_list('id', flat=True))
+        rows = super().update(**kwargs)
+        credentials_changed.send(sender=self.model, user_ids=user_ids)
+        return rows
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
+    """Менеджер пользователей с UserQuerySet."""
 
 
 class User(AbstractUser):
@@ -38,6 +56,13 @@ class User(AbstractUser):
         verbose_name='Пароль',
         validators=[validate_password],
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+
+    objects = CustomUserManager()
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = (
         'username',
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Отправляется после QuerySet.update(), изменившего is_active или пароль
+# пользователей: такое обновление не вызывает post_save. Аргумент:
+# user_ids — id изменённых пользователей.
+credentials_changed = Signal()